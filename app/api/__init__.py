@@ -1,7 +1,11 @@
 from fastapi import APIRouter
 from app.api.word_transformer import word_transformer_router
 from app.api.wine_tournament import wine_tournament_router
+from app.api.tournaments import tournaments_router
+from app.api.admin import admin_router
 app_router = APIRouter()
 
 app_router.include_router(word_transformer_router, prefix="/words", tags=["Words"])
 app_router.include_router(wine_tournament_router, prefix="/tournament", tags=["Wine Tournament"])
+app_router.include_router(tournaments_router, prefix="/tournaments", tags=["Tournaments"])
+app_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+from app.api.auth import validate_apikey_request
+from utils.sampling_profiler import SamplingProfiler
+
+admin_router = APIRouter(dependencies=[Depends(validate_apikey_request)])
+
+MAX_PROFILE_SECONDS = 300
+
+profiler = SamplingProfiler()
+# Set to end the running profile before its duration is up
+_stop_profile = asyncio.Event()
+
+
+@admin_router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10, gt=0, le=MAX_PROFILE_SECONDS, description="How long to sample"),
+    interval_ms: float = Query(default=5, ge=1, le=1000, description="Time between samples"),
+):
+    """Sample every thread's stack for `seconds` and return collapsed stacks, one line per stack,
+    ready for flamegraph.pl or speedscope. `DELETE /profile` ends the run early."""
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    profiler.interval_seconds = interval_ms / 1000
+    _stop_profile.clear()
+    profiler.start()
+    try:
+        await asyncio.wait_for(_stop_profile.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        # Also when the client goes away, so the sampler never outlives the request
+        stacks = profiler.stop()
+    filename = time.strftime("profile-%Y%m%d-%H%M%S.folded", time.gmtime())
+    return PlainTextResponse(stacks, headers={"Content-Disposition": f'attachment; filename="{filename}"',
+                                              "X-Profile-Samples": str(profiler.samples)})
+
+
+@admin_router.delete("/profile", status_code=204)
+async def stop_profile():
+    if not profiler.running:
+        raise HTTPException(status_code=404, detail="No profile is running")
+    _stop_profile.set()
+    return Response(status_code=204)
+
+
+@admin_router.get("/slow-requests")
+async def get_slow_requests(request: Request, limit: int = Query(default=50, ge=1, le=1000)):
+    """Requests over the slow request threshold, newest first, with time per layer
+    (repository, use_case, serialization, other) and per operation"""
+    slow_requests = request.app.state.slow_requests
+    return {"threshold_ms": slow_requests.threshold_ms, "captured": slow_requests.captured,
+            "requests": slow_requests.entries(limit)}
+
+
+@admin_router.delete("/slow-requests", status_code=204)
+async def clear_slow_requests(request: Request):
+    request.app.state.slow_requests.clear()
+    return Response(status_code=204)
@@ -0,0 +1,199 @@
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+DEFAULT_ALLOW_METHODS = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+DEFAULT_ALLOW_HEADERS = ("Authorization", "Content-Type", "API-KEY")
+DEFAULT_MAX_AGE = 600
+# Below this, gzip framing eats most of the saving
+DEFAULT_MINIMUM_SIZE = 1000
+# Close to level 9's ratio on JSON for a fraction of the CPU
+DEFAULT_COMPRESS_LEVEL = 6
+# Already compressed, or held open for a long time where buffering inside zlib would delay events
+UNCOMPRESSED_TYPES = (b"text/event-stream", b"image/", b"video/", b"audio/", b"application/zip",
+                      b"application/gzip", b"application/octet-stream", b"font/woff")
+NO_BODY_STATUSES = (204, 206, 304)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class CORSPolicy:
+    """Which origins may call the API cross-origin, as ready-made response headers"""
+
+    def __init__(self, allow_origins: Iterable[str] = ("*",), allow_methods: Iterable[str] = DEFAULT_ALLOW_METHODS,
+                 allow_headers: Iterable[str] = DEFAULT_ALLOW_HEADERS, max_age: int = DEFAULT_MAX_AGE):
+        allow_origins = tuple(allow_origins)
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self._common = [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")),
+            (b"access-control-allow-headers", ", ".join(allow_headers).encode("latin-1")),
+        ]
+        self.preflight_headers = [(b"access-control-max-age", str(max_age).encode("latin-1"))]
+        if self.allow_all_origins:
+            # Same for every request: build the list once
+            self._common.insert(0, (b"access-control-allow-origin", b"*"))
+
+    def headers(self, origin: Optional[bytes]) -> Headers:
+        """Response headers for a request from `origin`; without Allow-Origin when it is not allowed"""
+        if self.allow_all_origins:
+            return self._common
+        if origin is None or origin not in self.allow_origins:
+            # The answer depends on the origin, so caches must keep them apart
+            return [(b"vary", b"Origin")]
+        return [(b"access-control-allow-origin", origin), (b"vary", b"Origin"), *self._common]
+
+
+class EdgeMiddleware:
+    """Pure ASGI middleware for CORS and response compression.
+
+    Preflight requests are answered here without reaching the router. Other
+    responses get their CORS headers appended to the start message, and bodies
+    of at least `minimum_size` bytes are gzipped when the client accepts it,
+    unless they already carry a Content-Encoding (precompressed static files,
+    cached API bodies) or are of a type that does not compress. A single-part
+    body is compressed in one call; a streamed body is compressed chunk by
+    chunk with a sync flush, so every chunk reaches the client as soon as it
+    was produced.
+    """
+
+    def __init__(self, app, cors: CORSPolicy, minimum_size: int = DEFAULT_MINIMUM_SIZE,
+                 compress_level: int = DEFAULT_COMPRESS_LEVEL):
+        self.app = app
+        self.cors = cors
+        self.minimum_size = minimum_size
+        self.compress_level = compress_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        origin = None
+        accepts_gzip = False
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"accept-encoding":
+                accepts_gzip = _accepts_gzip(value)
+        cors = self.cors.headers(origin)
+
+        if scope["method"] == "OPTIONS":
+            # Preflight (and any other OPTIONS): nothing behind us handles it
+            await send({"type": "http.response.start", "status": 204,
+                        "headers": [*cors, *self.cors.preflight_headers]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if not accepts_gzip:
+            async def send_with_cors(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", ()), *cors]
+                await send(message)
+
+            return await self.app(scope, receive, send_with_cors)
+
+        await self.app(scope, receive, _GzipResponder(send, cors, self.minimum_size, self.compress_level))
+
+
+class _GzipResponder:
+    """`send` for one response: holds the start message until the first body part decides on compression"""
+
+    __slots__ = ("send", "cors", "minimum_size", "compress_level", "start", "compressor")
+
+    def __init__(self, send, cors: Headers, minimum_size: int, compress_level: int):
+        self.send = send
+        self.cors = cors
+        self.minimum_size = minimum_size
+        self.compress_level = compress_level
+        self.start = None
+        self.compressor = None
+
+    async def __call__(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            message["headers"] = [*message.get("headers", ()), *self.cors]
+            if _compressible(message["status"], message["headers"]):
+                # Wait for the body before deciding
+                self.start = message
+            else:
+                await self.send(message)
+        elif self.start is not None:
+            start, self.start = self.start, None
+            start["headers"] = _add_vary(start["headers"])
+            if message_type != "http.response.body":
+                # e.g. a file sent by path: leave it alone
+                await self.send(start)
+                await self.send(message)
+            else:
+                await self._start_body(start, message)
+        elif self.compressor is not None and message_type == "http.response.body":
+            await self._compress_chunk(message.get("body", b""), message.get("more_body", False))
+        else:
+            await self.send(message)
+
+    async def _start_body(self, start, message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not more_body and len(body) < self.minimum_size:
+            await self.send(start)
+            await self.send(message)
+            return
+        headers = [(name, value) for name, value in start["headers"] if name != b"content-length"]
+        headers.append((b"content-encoding", b"gzip"))
+        if not more_body:
+            body = zlib.compress(body, self.compress_level, wbits=31)
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            start["headers"] = headers
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        start["headers"] = headers
+        await self.send(start)
+        self.compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, 31)
+        await self._compress_chunk(body, more_body)
+
+    async def _compress_chunk(self, body: bytes, more_body: bool):
+        if more_body:
+            # Sync flush: the client can decode everything sent so far
+            chunk = self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.flush()
+            self.compressor = None
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+def _accepts_gzip(accept_encoding: bytes) -> bool:
+    for item in accept_encoding.split(b","):
+        coding, _, params = item.partition(b";")
+        if coding.strip().lower() in (b"gzip", b"*"):
+            params = params.strip()
+            return not params.startswith(b"q=") or _quality(params[2:]) > 0
+    return False
+
+
+def _quality(value: bytes) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def _compressible(status: int, headers: Headers) -> bool:
+    if status in NO_BODY_STATUSES:
+        return False
+    for name, value in headers:
+        if name == b"content-encoding" or name == b"content-range":
+            return False
+        if name == b"content-type" and value.lower().startswith(UNCOMPRESSED_TYPES):
+            return False
+    return True
+
+
+def _add_vary(headers: Headers) -> Headers:
+    for i, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" in value.lower() or value.strip() == b"*":
+                return headers
+            headers = list(headers)
+            headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    return [*headers, (b"vary", b"Accept-Encoding")]
@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from starlette.requests import Request
+from starlette.responses import Response
+from app.metrics import RESPONSE_CACHE_REQUESTS
+from app.tracing import SERIALIZATION, span
+from utils import fast_json
+
+GZIP_MINIMUM_SIZE = 1000
+
+
+class CachedBody:
+    __slots__ = ("version", "body", "gzip_body", "etag", "last_modified")
+
+    def __init__(self, version: Hashable, body: bytes, last_modified: float):
+        self.version = version
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MINIMUM_SIZE else None
+        # Content-based, so tags stay valid across restarts that reset the version counter
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """Pre-serialized JSON responses keyed on the tournament state version.
+
+    A response is rebuilt only when the repository version changes. Versions
+    must identify the repository instance as well (see
+    `TournamentRepository.get_cache_version`): a reloaded tournament counts
+    from zero again. Bodies are
+    kept both plain and gzip-compressed (GZipMiddleware passes responses that
+    already carry a Content-Encoding through untouched), and conditional
+    requests are answered with 304.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[Hashable, asyncio.Future]] = {}
+
+    async def respond(self, request: Request, version: Optional[Hashable], build: Callable[[], Awaitable[Any]]) -> Response:
+        if version is None:
+            # Backend without versioning: nothing can be cached
+            content = await build()
+            with span(SERIALIZATION, "json"):
+                return _json_response(_dumps(content))
+
+        key = request.url.path + "?" + request.url.query
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            RESPONSE_CACHE_REQUESTS.labels("hit").inc()
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            RESPONSE_CACHE_REQUESTS.labels("miss").inc()
+            entry = await self._build(key, version, build)
+
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        use_gzip = entry.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", "")
+        if use_gzip:
+            # Each encoding is a distinct representation with its own tag
+            headers["ETag"] = entry.etag[:-1] + '-gzip"'
+        if _not_modified(request, entry):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            return _json_response(entry.gzip_body, {**headers, "Content-Encoding": "gzip"})
+        return _json_response(entry.body, headers)
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def _build(self, key: str, version: Hashable, build: Callable[[], Awaitable[Any]]) -> CachedBody:
+        # Concurrent misses for the same key and version share one build
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] == version:
+            return await asyncio.shield(inflight[1])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (version, future)
+        try:
+            previous = self._entries.get(key)
+            content = await build()
+            with span(SERIALIZATION, "json"):
+                body = _dumps(content)
+            # Unchanged payloads (e.g. a write to another view's data) keep their Last-Modified
+            last_modified = previous.last_modified if previous is not None and previous.body == body else time.time()
+            with span(SERIALIZATION, "gzip"):
+                entry = CachedBody(version, body, last_modified)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+
+
+def _dumps(content: Any) -> bytes:
+    return fast_json.dumps(content)
+
+
+def _json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _not_modified(request: Request, entry: CachedBody) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/").replace('-gzip"', '"') for tag in if_none_match.split(",")}
+        return entry.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(entry.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
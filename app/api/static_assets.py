@@ -0,0 +1,141 @@
+import hashlib
+import os
+from email.utils import formatdate
+from typing import Dict, Mapping, Optional, Tuple
+from loguru import logger
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from utils.asset_pipeline import load_manifest
+
+# Hashed names change with their content, so clients may keep them for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pages keep their URL; clients revalidate them with the ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip")
+# Files up to this size are served from memory; larger ones are streamed from disk
+MAX_MEMORY_BODY = 1024 * 1024
+
+
+class _Representation:
+    __slots__ = ("path", "body", "stat", "etag")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stat = os.stat(path)
+        with open(path, "rb") as f:
+            content = f.read()
+        # Content-based, so each encoding has its own tag and tags survive rebuilds of unchanged files
+        self.etag = '"' + hashlib.blake2b(content, digest_size=12).hexdigest() + '"'
+        self.body: Optional[bytes] = content if len(content) <= MAX_MEMORY_BODY else None
+
+
+class _Asset:
+    __slots__ = ("content_type", "cache_control", "last_modified", "representations")
+
+    def __init__(self, content_type: str, immutable: bool, representations: Dict[Optional[str], _Representation]):
+        self.content_type = content_type
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        identity = representations[None]
+        self.last_modified = formatdate(identity.stat.st_mtime, usegmt=True)
+        # encoding (None for identity) -> representation
+        self.representations = representations
+
+
+class StaticAssets:
+    """ASGI app serving the output of `scripts/build_assets.py`, mounted at /static.
+
+    Every file, header and ETag is prepared at startup; a request only picks the
+    representation matching its Accept-Encoding. Hashed files are cacheable
+    forever, and also answer under their source name (revalidated, for pages
+    and clients still holding old references). Paths missing from the build,
+    or everything when there is no build, are served from `source_dir`.
+    """
+
+    def __init__(self, build_dir: str, source_dir: str):
+        self.source_dir = source_dir
+        self.fallback = StaticFiles(directory=source_dir)
+        self.assets: Dict[str, _Asset] = {}
+        manifest = load_manifest(build_dir)
+        if manifest is None:
+            logger.warning(f"No asset build in {build_dir}, serving {source_dir} as is; "
+                           "run scripts/build_assets.py for hashed, precompressed assets")
+            return
+        for logical, entry in manifest["assets"].items():
+            representations = {None: _Representation(os.path.join(build_dir, entry["file"]))}
+            for encoding, file in entry["encodings"].items():
+                representations[encoding] = _Representation(os.path.join(build_dir, file))
+            self.assets[entry["file"]] = _Asset(entry["type"], entry["immutable"], representations)
+            for content_type, file in entry.get("variants", {}).items():
+                self.assets[file] = _Asset(content_type, True, {None: _Representation(os.path.join(build_dir, file))})
+            if logical != entry["file"]:
+                self.assets[logical] = _Asset(entry["type"], False, representations)
+
+    async def __call__(self, scope, receive, send):
+        path = scope["path"][len(scope.get("root_path", "")):].lstrip("/")
+        asset = self.assets.get(path)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await self.fallback(scope, receive, send)
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]
+                   if k in (b"accept-encoding", b"if-none-match")}
+        await self._response(asset, headers, scope["method"])(scope, receive, send)
+
+    def page(self, path: str, request_headers: Mapping[str, str]) -> Response:
+        """Response for a page served outside the mount, e.g. index.html at /"""
+        asset = self.assets.get(path)
+        if asset is None:
+            return FileResponse(os.path.join(self.source_dir, path))
+        return self._response(asset, request_headers, "GET")
+
+    def _response(self, asset: _Asset, request_headers: Mapping[str, str], method: str) -> Response:
+        encoding, representation = _negotiate(asset, request_headers.get("accept-encoding", ""))
+        headers = {
+            "Cache-Control": asset.cache_control,
+            "ETag": representation.etag,
+            "Last-Modified": asset.last_modified,
+        }
+        if len(asset.representations) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        if _matches(request_headers.get("if-none-match"), representation.etag):
+            return Response(status_code=304, headers=headers)
+        if representation.body is None:
+            return FileResponse(representation.path, headers=headers, media_type=asset.content_type,
+                                stat_result=representation.stat)
+        body = representation.body if method == "GET" else b""
+        response = Response(body, headers=headers, media_type=asset.content_type)
+        if method == "HEAD":
+            response.headers["content-length"] = str(len(representation.body))
+        return response
+
+
+def _negotiate(asset: _Asset, accept_encoding: str) -> Tuple[Optional[str], _Representation]:
+    if len(asset.representations) > 1 and accept_encoding:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in asset.representations and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding, asset.representations[encoding]
+    return None, asset.representations[None]
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    return if_none_match.strip() == "*" or etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
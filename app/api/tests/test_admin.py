@@ -0,0 +1,80 @@
+import time
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+from app import tracing
+from app.api.admin import admin_router
+from app.metrics import MetricsMiddleware
+
+API_KEY = {"API-KEY": "secret"}
+
+
+class SlowRepository:
+    def get_rows(self):
+        time.sleep(0.02)
+        return [{"id": 1}]
+
+
+class UseCase:
+    def __init__(self):
+        self.repo = SlowRepository()
+
+    async def rows(self):
+        rows = tracing.traced(self.repo, tracing.REPOSITORY).get_rows()
+        time.sleep(0.01)
+        return rows
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("SERVICE_API_KEY", "secret")
+    app = FastAPI()
+    app.state.slow_requests = tracing.SlowRequestLog(threshold_ms=25, size=2)
+    app.include_router(admin_router, prefix="/admin")
+    use_case = UseCase()
+
+    @app.get("/rows")
+    async def rows(fast: bool = False):
+        if fast:
+            return []
+        result = await tracing.traced(use_case, tracing.USE_CASE).rows()
+        with tracing.span(tracing.SERIALIZATION, "json"):
+            return result
+
+    app.add_middleware(MetricsMiddleware, slow_requests=app.state.slow_requests)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_slow_requests_are_kept_with_time_per_layer(client):
+    assert client.get("/admin/slow-requests").status_code == 401
+    client.get("/rows?fast=true")
+    for _ in range(3):
+        client.get("/rows")
+
+    slow = client.get("/admin/slow-requests", headers=API_KEY).json()
+    assert slow["captured"] == 3
+    # Ring buffer of two
+    assert len(slow["requests"]) == 2
+    request = slow["requests"][0]
+    assert request["route"] == "/rows" and request["status"] == 200
+    layers = request["layers"]
+    assert layers["repository"] >= 20
+    # Exclusive of the repository call it made
+    assert 10 <= layers["use_case"] < 20
+    assert "serialization" in layers
+    assert [op["operation"] for op in request["operations"]][:2] == ["use_case.rows", "repository.get_rows"]
+
+    assert client.delete("/admin/slow-requests", headers=API_KEY).status_code == 204
+    assert client.get("/admin/slow-requests", headers=API_KEY).json()["requests"] == []
+
+
+def test_profile_returns_collapsed_stacks(client):
+    response = client.post("/admin/profile?seconds=0.2&interval_ms=2", headers=API_KEY)
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and ";" in stack
@@ -0,0 +1,99 @@
+import zlib
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.responses import Response
+from starlette.testclient import TestClient
+from app.api.edge_middleware import CORSPolicy, EdgeMiddleware
+
+BIG = b'{"rows":"' + b"x" * 5000 + b'"}'
+GZIP = {"accept-encoding": "gzip"}
+
+
+def client(**policy) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return Response(BIG, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return {"message": "pong"}
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return Response(zlib.compress(BIG, wbits=31), media_type="application/json",
+                        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield b'{"line":%d}\n' % i
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    async def events():
+        async def lines():
+            yield b"data: 1\n\n" * 200
+        return StreamingResponse(lines(), media_type="text/event-stream")
+
+    app.add_middleware(EdgeMiddleware, cors=CORSPolicy(**policy))
+    return TestClient(app)
+
+
+def test_preflight_and_cors_headers():
+    with client(allow_origins=["https://venue.example"]) as c:
+        preflight = c.options("/big", headers={"origin": "https://venue.example", "access-control-request-method": "POST"})
+        assert preflight.status_code == 204
+        assert preflight.headers["access-control-allow-origin"] == "https://venue.example"
+        assert "POST" in preflight.headers["access-control-allow-methods"]
+        assert preflight.headers["access-control-max-age"]
+
+        other = c.get("/small", headers={"origin": "https://elsewhere.example"})
+        assert "access-control-allow-origin" not in other.headers and "Origin" in other.headers["vary"]
+
+    with client() as c:
+        assert c.get("/small").headers["access-control-allow-origin"] == "*"
+
+
+def test_compression_is_conditional():
+    with client() as c:
+        big = c.get("/big", headers=GZIP)
+        assert big.headers["content-encoding"] == "gzip" and big.content == BIG
+        assert int(big.headers["content-length"]) < len(BIG)
+        assert big.headers["vary"] == "Accept-Encoding"
+
+        assert "content-encoding" not in c.get("/big", headers={"accept-encoding": "gzip;q=0"}).headers
+        assert "content-encoding" not in c.get("/small", headers=GZIP).headers
+
+        # Compressed once, by whoever built the body
+        precompressed = c.get("/precompressed", headers=GZIP)
+        assert precompressed.content == BIG and precompressed.headers["vary"] == "Accept-Encoding"
+
+        assert "content-encoding" not in c.get("/events", headers=GZIP).headers
+
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_are_decodable_as_they_arrive():
+    async def lines(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": b'{"line":%d}\n' % i, "more_body": i < 2})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    await EdgeMiddleware(lines, cors=CORSPolicy())(scope, None, send)
+
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+    decoder = zlib.decompressobj(wbits=31)
+    # Each chunk decodes on its own, nothing held back in the compressor
+    assert [decoder.decompress(message["body"]) for message in sent[1:]] == \
+        [b'{"line":0}\n', b'{"line":1}\n', b'{"line":2}\n']
+    assert decoder.eof
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, FastAPI
+from loguru import logger
+from prometheus_client import REGISTRY
+from starlette.testclient import TestClient
+from app import metrics
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template_and_logs_carry_timing():
+    app = FastAPI()
+    router = APIRouter()
+    records = []
+
+    @router.get("/{item_id}")
+    async def item(item_id: int):
+        logger.patch(metrics.add_request_fields).info("reading item")
+        return {"id": item_id}
+
+    app.include_router(router, prefix="/items")
+    app.add_middleware(metrics.MetricsMiddleware)
+    before = sample("http_requests_total", method="GET", route="/items/{item_id}", status="200")
+    sink = logger.add(lambda message: records.append(message.record["extra"]))
+    try:
+        with TestClient(app) as client:
+            assert client.get("/items/1").status_code == 200
+            assert client.get("/items/2").status_code == 200
+            assert client.get("/missing").status_code == 404
+    finally:
+        logger.remove(sink)
+
+    assert sample("http_requests_total", method="GET", route="/items/{item_id}", status="200") == before + 2
+    assert sample("http_requests_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="404") >= 1
+    assert sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}") >= 2
+    assert sample("http_requests_in_flight", method="GET") == 0
+    assert [(extra["method"], extra["path"]) for extra in records] == [("GET", "/items/1"), ("GET", "/items/2")]
+    assert all(extra["request_elapsed_ms"] >= 0 for extra in records)
+
+
+def test_route_label_of_nested_routers_does_not_depend_on_parameter_values():
+    app = FastAPI()
+    outer, inner = APIRouter(), APIRouter()
+
+    @inner.get("/wines/{wine_id}")
+    async def wine(tournament_id: str, wine_id: str):
+        return {}
+
+    outer.include_router(inner, prefix="/{tournament_id}")
+    app.include_router(outer, prefix="/tournaments")
+    app.add_middleware(metrics.MetricsMiddleware)
+    route = "/tournaments/{tournament_id}/wines/{wine_id}"
+    before = sample("http_requests_total", method="GET", route=route, status="200")
+    with TestClient(app) as client:
+        # Same value for both parameters, and one that is also a path segment
+        assert client.get("/tournaments/7/wines/7").status_code == 200
+        assert client.get("/tournaments/wines/wines/wines").status_code == 200
+
+    assert sample("http_requests_total", method="GET", route=route, status="200") == before + 2
+
+
+def test_repository_timings_count_bytes():
+    before = sample("tournament_repository_bytes_total", backend="test", operation="write")
+    with metrics.time_repository("test", "write") as moved:
+        moved.append(128)
+    assert sample("tournament_repository_bytes_total", backend="test", operation="write") == before + 128
+    assert sample("tournament_repository_operation_seconds_count", backend="test", operation="write") >= 1
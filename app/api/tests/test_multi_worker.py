@@ -0,0 +1,16 @@
+import os
+import pytest
+from decouple import config
+from benchmarks.multi_worker import run
+
+WORKERS = 4
+
+
+@pytest.mark.skipif(not config("MULTI_WORKER_TESTS", default=False, cast=bool),
+                    reason="Multi-worker tests are disabled")
+@pytest.mark.skipif((os.cpu_count() or 1) < WORKERS, reason=f"Needs at least {WORKERS} CPUs")
+def test_vote_throughput_scales_with_workers():
+    single = run(workers=1, participants=400, rounds=4, concurrency=64)
+    several = run(workers=WORKERS, participants=400, rounds=4, concurrency=64)
+    assert single["errors"] == several["errors"] == 0
+    assert several["throughput_rps"] > 1.5 * single["throughput_rps"]
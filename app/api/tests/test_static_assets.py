@@ -0,0 +1,55 @@
+import io
+import re
+import pytest
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+from app.api.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssets
+from utils.asset_pipeline import build
+
+
+@pytest.fixture
+def client(tmp_path):
+    source = tmp_path / "static"
+    (source / "css").mkdir(parents=True)
+    (source / "images").mkdir()
+    # Noise compresses badly as PNG, so the AVIF/WebP variants come out smaller
+    Image.effect_noise((400, 200), 64).convert("RGB").save(source / "images" / "hero.png")
+    (source / "css" / "style.css").write_text(
+        "body { color: black; }\n" * 40 + ".hero { background: url('/static/images/hero.png') center / cover; }\n")
+    (source / "index.html").write_text('<link rel="stylesheet" href="/static/css/style.css">' + " " * 300)
+    build(str(source), str(tmp_path / "build"), max_image_width=200)
+
+    assets = StaticAssets(build_dir=str(tmp_path / "build"), source_dir=str(source))
+    with TestClient(Starlette(routes=[Mount("/static", assets)])) as client:
+        client.assets = assets
+        yield client
+
+
+def test_built_assets_are_hashed_precompressed_and_immutable(client):
+    page = client.assets.page("index.html", {"accept-encoding": "gzip, br"})
+    assert page.headers["content-encoding"] == "br" and page.headers["cache-control"] == "no-cache"
+    css_path = re.search(r'href="(/static/css/style\.\w+\.css)"', client.get("/static/index.html").text)[1]
+
+    css = client.get(css_path, headers={"accept-encoding": "gzip"})
+    assert css.headers["content-encoding"] == "gzip"
+    assert css.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert css.headers["vary"] == "Accept-Encoding"
+    assert client.get(css_path, headers={"accept-encoding": "br;q=0, identity"}).headers.get("content-encoding") is None
+    assert client.get(css_path, headers={"accept-encoding": "gzip", "if-none-match": css.headers["etag"]}) \
+        .status_code == 304
+
+    # The background is offered as AVIF and WebP, after a plain fallback declaration
+    fallback, avif, webp = re.findall(r"/static/(images/hero\.\w+\.(png|avif|webp))", css.text)[:3]
+    assert [fallback[1], avif[1], webp[1]] == ["png", "avif", "webp"]
+    image = client.get("/static/" + avif[0], headers={"accept-encoding": "gzip"})
+    assert image.headers["content-type"] == "image/avif" and "content-encoding" not in image.headers
+    assert image.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    png = client.get("/static/" + fallback[0])
+    assert png.headers["content-type"] == "image/png"
+    assert Image.open(io.BytesIO(png.content)).size == (200, 100)
+
+    # Source names still work, revalidated instead of cached for good
+    assert client.get("/static/css/style.css").headers["cache-control"] == "no-cache"
+    assert client.get("/static/missing.js").status_code == 404
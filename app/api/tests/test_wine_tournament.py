@@ -0,0 +1,35 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.api.wine_tournament import MAX_LINE_BYTES, _read_batch
+from app.model.wine_tournament import Vote
+
+
+def ndjson_request(*chunks: bytes) -> Request:
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    return Request({"type": "http", "method": "POST", "headers": [(b"content-type", b"application/x-ndjson")]},
+                   receive)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_batch_lines_may_span_chunks():
+    request = ndjson_request(b'{"participantId": "p1", "firstPlace": 1, "secondPl',
+                             b'ace": 2, "thirdPlace": 3}\nnot json\n{"participantId": "p2", ',
+                             b'"firstPlace": 4, "secondPlace": 5, "thirdPlace": 6}')
+    items, errors = await _read_batch(request, Vote)
+    assert [(index, vote.participant_id) for index, vote in items] == [(0, "p1"), (2, "p2")]
+    assert [error.index for error in errors] == [1]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_batch_line_over_the_cap_is_refused():
+    # No newline ever arrives: refused once the line passes the cap, not buffered to the end
+    request = ndjson_request(*[b"x" * (MAX_LINE_BYTES // 2)] * 3, *[b"never read"] * 100)
+    with pytest.raises(HTTPException) as refused:
+        await _read_batch(request, Vote)
+    assert refused.value.status_code == 413
@@ -0,0 +1,105 @@
+import json
+import inject
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+from app.api.word_transformer import LINE_TOO_LONG, MAX_LINE_BYTES, word_transformer_router
+from app.gateway.my_ip import MyIP
+from app.model.word import WordRepository
+from app.repository.words_in_memory import WordsInMemoryRepository
+from app.usecase.word_transformer import WordTransformerUC, WordTransformerUCImpl
+
+API_KEY = {"API-KEY": "secret"}
+
+
+class CountingIP(MyIP):
+    def __init__(self):
+        self.calls = 0
+
+    async def get_ip(self) -> str:
+        self.calls += 1
+        return "203.0.113.7"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("SERVICE_API_KEY", "secret")
+    ip, repo = CountingIP(), WordsInMemoryRepository()
+
+    def di(binder):
+        binder.bind(MyIP, ip)
+        binder.bind(WordRepository, repo)
+        binder.bind(WordTransformerUC, WordTransformerUCImpl(concat_with="!"))
+
+    inject.clear_and_configure(di)
+    app = FastAPI()
+    app.include_router(word_transformer_router, prefix="/words")
+    with TestClient(app) as client:
+        client.ip, client.repo = ip, repo
+        yield client
+    inject.clear()
+
+
+def test_batch_transforms_in_order_with_one_ip_lookup(client):
+    words = [f"word{i}" for i in range(450)]
+    response = client.post("/words/transform:batch", json=[*words[:10], 42, *[{"word": w} for w in words[10:]]],
+                           headers=API_KEY)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows[10] == {"index": 10, "error": 'Expected a string or {"word": string}'}
+    del rows[10]
+    assert [row["reverseWord"] for row in rows] == [w[::-1] + "!" for w in words]
+    assert {row["fromIp"] for row in rows} == {"203.0.113.7"} and client.ip.calls == 1
+    assert client.repo.get_word(rows[-1]["id"]).word == "word449"
+
+    assert client.post("/words/transform:batch", json={"word": "nope"}, headers=API_KEY).status_code == 400
+
+
+def test_ndjson_body_is_streamed_through(client):
+    def body():
+        yield b'"abc"\n{"word": "de'
+        yield b'f"}\nnot json\n'
+        yield b'"ghi"'
+
+    response = client.post("/words/transform:batch", content=body(),
+                           headers={**API_KEY, "content-type": "application/x-ndjson"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row.get("reverseWord") for row in rows] == ["cba!", "fed!", None, "ihg!"]
+    assert rows[2]["index"] == 2 and client.ip.calls == 1
+
+
+def test_overlong_ndjson_line_is_reported_without_buffering_it(client):
+    def body():
+        yield b'"abc"\n'
+        for _ in range(3):
+            yield b"x" * MAX_LINE_BYTES
+        yield b'\n"def"\n'
+
+    response = client.post("/words/transform:batch", content=body(),
+                           headers={**API_KEY, "content-type": "application/x-ndjson"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [rows[0], {"index": 1, "error": LINE_TOO_LONG}, rows[2]]
+    assert [rows[0]["reverseWord"], rows[2]["reverseWord"]] == ["cba!", "fed!"]
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_stops_the_batch(client):
+    words = [f"word{i}" for i in range(1000)]
+    messages = [{"type": "http.request", "body": json.dumps(words).encode(), "more_body": False}]
+    sent = []
+
+    async def receive():
+        # The client leaves as soon as its body is sent
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/words/transform:batch",
+             "raw_path": b"/words/transform:batch", "root_path": "", "query_string": b"",
+             "headers": [(b"api-key", b"secret"), (b"content-type", b"application/json")],
+             "client": ("127.0.0.1", 50000), "server": ("testserver", 80)}
+    await client.app(scope, receive, send)
+    assert len(client.repo) < len(words)
+    assert not any(message.get("more_body") is False for message in sent)
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from typing import List
+import inject
+from app.usecase.tournament_manager import TournamentManagerUC
+from app.api.wine_tournament import wine_tournament_router
+from app.model.tournament import Tournament, CreateTournamentRequest
+
+tournaments_router = APIRouter()
+
+
+async def require_tournament(tournament_id: str = Path(description="Tournament id")):
+    manager: TournamentManagerUC = inject.instance(TournamentManagerUC)
+    if await manager.get_tournament(tournament_id) is None:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+
+
+@tournaments_router.post("", response_model=Tournament, status_code=201)
+async def create_tournament(request: CreateTournamentRequest):
+    manager: TournamentManagerUC = inject.instance(TournamentManagerUC)
+    try:
+        return await manager.create_tournament(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@tournaments_router.get("", response_model=List[Tournament])
+async def get_all_tournaments():
+    manager: TournamentManagerUC = inject.instance(TournamentManagerUC)
+    return await manager.get_all_tournaments()
+
+
+@tournaments_router.get("/{tournament_id}", response_model=Tournament)
+async def get_tournament(tournament_id: str):
+    manager: TournamentManagerUC = inject.instance(TournamentManagerUC)
+    tournament = await manager.get_tournament(tournament_id)
+    if tournament is None:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    return tournament
+
+
+# Same participant, vote, leaderboard and stream endpoints as /tournament, scoped to one tournament
+tournaments_router.include_router(wine_tournament_router, prefix="/{tournament_id}",
+                                  dependencies=[Depends(require_tournament)])
@@ -1,24 +1,72 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+import asyncio
+from itertools import chain, islice
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Type, Union
 import inject
-from app.usecase.wine_tournament import WineTournamentUC
+from app.usecase.wine_tournament import WineTournamentUC, participant_status
+from app.usecase.tournament_manager import TournamentManagerUC
+from app.usecase.tournament_events import RESYNC, format_event
+from app.usecase.vote_ingestion import VoteBatchTooLarge, VoteQueueFull
+from app.api.response_cache import ResponseCache
+from app.metrics import RESPONSE_CACHE_HIT_RATIO
+from app.tracing import USE_CASE, traced
+from app.model.vote_columns import ANALYTICS_ORDERS
+from app.model.ranking import RANKING_METHODS
+from utils import fast_json
 from app.model.wine_tournament import (
+    MAX_WINES,
     CreateParticipantRequest,
     CreateParticipantResponse,
     Participant,
     Vote,
-    WineScore
+    WineScore,
+    BatchItemResult,
+    BatchResponse,
+    ParticipantPage,
+    WineAnalytics,
+    RankedWine
 )
 
 wine_tournament_router = APIRouter()
 
+STREAM_KEEPALIVE_SECONDS = 15
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows serialized per chunk of an NDJSON response
+NDJSON_CHUNK_SIZE = 200
+# Items accepted by one batch request (the default vote queue size)
+MAX_BATCH_SIZE = 5000
+# Longest NDJSON line of a batch request; an item is far shorter
+MAX_LINE_BYTES = 64 * 1024
+
+# Read endpoints are served from here until the tournament state version changes
+response_cache = ResponseCache()
+RESPONSE_CACHE_HIT_RATIO.set_function(response_cache.hit_ratio)
+
+
+async def get_tournament_uc(request: Request) -> AsyncIterator[WineTournamentUC]:
+    """The tournament addressed by the `tournament_id` path parameter, or the default one.
+
+    A tournament stays loaded until the request is done with it.
+    """
+    tournament_id = request.path_params.get("tournament_id")
+    if tournament_id is None:
+        yield traced(inject.instance(WineTournamentUC), USE_CASE)
+        return
+    async with inject.instance(TournamentManagerUC).use_tournament(tournament_id) as tournament_uc:
+        if tournament_uc is None:
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        yield traced(tournament_uc, USE_CASE)
+
 
 @wine_tournament_router.post("/participants/suggest", response_model=CreateParticipantResponse)
 async def suggest_participant_wines(
     request: CreateParticipantRequest,
-    total_wines: int = Query(default=20, description="Total number of wines in the tournament")
+    total_wines: int = Query(default=20, ge=1, le=MAX_WINES, description="Total number of wines in the tournament"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
 ):
-    tournament_uc: WineTournamentUC = inject.instance(WineTournamentUC)
     try:
         response = await tournament_uc.create_participant(request, total_wines)
         return response
@@ -27,8 +75,7 @@ async def suggest_participant_wines(
 
 
 @wine_tournament_router.post("/participants/confirm", response_model=dict)
-async def confirm_participant(participant: Participant):
-    tournament_uc: WineTournamentUC = inject.instance(WineTournamentUC)
+async def confirm_participant(participant: Participant, tournament_uc: WineTournamentUC = Depends(get_tournament_uc)):
     try:
         success = await tournament_uc.confirm_participant(participant)
         if success:
@@ -39,67 +86,291 @@ async def confirm_participant(participant: Participant):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@wine_tournament_router.get("/participants", response_model=List[Participant])
-async def get_all_participants():
-    tournament_uc: WineTournamentUC = inject.instance(WineTournamentUC)
+@wine_tournament_router.post("/participants:batch", response_model=BatchResponse)
+async def register_participants_batch(
+    request: Request,
+    total_wines: int = Query(default=20, ge=1, le=MAX_WINES, description="Total number of wines in the tournament"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
+):
+    """Register many participants at once from a JSON array or an NDJSON stream
+    of `{"name": ..., "assigned_wines": [...]}` objects"""
+    items, errors = await _read_batch(request, CreateParticipantRequest)
+    try:
+        results = await tournament_uc.register_participants([item for _, item in items], total_wines)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _batch_response(items, results, errors)
+
+
+@wine_tournament_router.get("/participants", response_model=Union[List[Participant], ParticipantPage])
+async def get_all_participants(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(default=None, description="`nextCursor` of the previous page"),
+    has_voted: Optional[bool] = Query(default=None, description="Only participants who have (not) voted"),
+    name_prefix: Optional[str] = Query(default=None, min_length=1, description="Case-insensitive name prefix"),
+    format: Optional[str] = Query(default=None, pattern="^ndjson$", description="`ndjson` streams one participant per line"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
+):
+    """All participants as a JSON array, or, with any of `limit`, `cursor` or the filters,
+    one page of `{"items": [...], "nextCursor": ...}` in registration order"""
+    after = _parse_cursor(cursor)
+    if _wants_ndjson(request, format):
+        rows = tournament_uc.iter_participants(after, has_voted, name_prefix)
+        return _ndjson_response(p.to_wire() for _, p, _ in islice(rows, limit))
+
+    if limit is None and cursor is None and has_voted is None and name_prefix is None:
+        build = tournament_uc.get_participant_rows
+    else:
+        async def build():
+            rows, next_after = await tournament_uc.get_participants_page(after, limit or DEFAULT_PAGE_SIZE,
+                                                                         has_voted, name_prefix)
+            # Same shape as ParticipantPage, built without validating every row again
+            return {"items": [p.to_wire() for p, _ in rows], "nextCursor": _format_cursor(next_after)}
+
     try:
-        participants = await tournament_uc.get_all_participants()
-        return participants
+        return await response_cache.respond(request, tournament_uc.tournament_repo.get_cache_version(), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @wine_tournament_router.post("/votes", response_model=dict)
-async def submit_vote(vote: Vote):
-    tournament_uc: WineTournamentUC = inject.instance(WineTournamentUC)
+async def submit_vote(vote: Vote, tournament_uc: WineTournamentUC = Depends(get_tournament_uc)):
     try:
         success = await tournament_uc.submit_vote(vote)
-        if success:
-            return {"success": True, "message": "Vote submitted successfully"}
-        else:
-            raise HTTPException(status_code=400, detail="Invalid vote - check participant ID and wine assignments")
+    except VoteQueueFull as e:
+        raise _queue_full(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not success:
+        raise HTTPException(status_code=400, detail="Invalid vote - check participant ID and wine assignments")
+    return {"success": True, "message": "Vote submitted successfully"}
+
+
+@wine_tournament_router.post("/votes:batch", response_model=BatchResponse)
+async def submit_votes_batch(request: Request, tournament_uc: WineTournamentUC = Depends(get_tournament_uc)):
+    """Submit many ballots at once from a JSON array or an NDJSON stream of votes"""
+    items, errors = await _read_batch(request, Vote)
+    try:
+        results = await tournament_uc.submit_votes([item for _, item in items])
+    except VoteQueueFull as e:
+        raise _queue_full(e)
+    except VoteBatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _batch_response(items, results, errors)
+
+
+@wine_tournament_router.get("/votes/queue", response_model=dict)
+async def get_vote_queue_stats(tournament_uc: WineTournamentUC = Depends(get_tournament_uc)):
+    """Ballots waiting to be written, and how long recent group commits took"""
+    return tournament_uc.vote_queue.stats()
+
+
+def _queue_full(e: VoteQueueFull) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
 
 @wine_tournament_router.get("/leaderboard", response_model=List[WineScore])
-async def get_leaderboard():
-    tournament_uc: WineTournamentUC = inject.instance(WineTournamentUC)
+async def get_leaderboard(
+    request: Request,
+    top: Optional[int] = Query(default=None, ge=1, description="Only return the top N wines"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
+):
+
+    async def build():
+        return await tournament_uc.get_leaderboard_rows(top)
+
+    try:
+        return await response_cache.respond(request, tournament_uc.tournament_repo.get_cache_version(), build)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@wine_tournament_router.get("/leaderboard/analytics", response_model=List[WineAnalytics])
+async def get_wine_analytics(
+    request: Request,
+    top: Optional[int] = Query(default=None, ge=1, description="Only return the top N wines"),
+    order_by: str = Query(default="points", pattern=f"^({'|'.join(ANALYTICS_ORDERS)})$",
+                          description="Rank by total points or by points per assigned taster"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
+):
+
+    async def build():
+        return await tournament_uc.get_wine_analytics(top, order_by)
+
     try:
-        leaderboard = await tournament_uc.get_leaderboard()
-        return leaderboard
+        return await response_cache.respond(request, tournament_uc.tournament_repo.get_cache_version(), build)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@wine_tournament_router.get("/rankings", response_model=List[RankedWine])
+async def get_rankings(
+    request: Request,
+    method: str = Query(default="points", pattern=f"^({'|'.join(RANKING_METHODS)})$",
+                        description="points, normalized (points per ballot that had the wine), "
+                                    "bayesian (average shrunk towards the mean) or schulze (pairwise)"),
+    top: Optional[int] = Query(default=None, ge=1, description="Only return the top N wines"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
+):
+
+    async def build():
+        return await tournament_uc.get_rankings(method, top)
+
+    try:
+        return await response_cache.respond(request, tournament_uc.tournament_repo.get_cache_version(), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @wine_tournament_router.get("/voting-stats", response_model=dict)
-async def get_voting_stats():
-    tournament_uc: WineTournamentUC = inject.instance(WineTournamentUC)
+async def get_voting_stats(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size of `participant_status`"),
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` of the previous page"),
+    has_voted: Optional[bool] = Query(default=None, description="Only participants who have (not) voted"),
+    name_prefix: Optional[str] = Query(default=None, min_length=1, description="Case-insensitive name prefix"),
+    format: Optional[str] = Query(default=None, pattern="^ndjson$",
+                                  description="`ndjson` streams the totals, then one participant status per line"),
+    tournament_uc: WineTournamentUC = Depends(get_tournament_uc)
+):
+    after = _parse_cursor(cursor)
+    if _wants_ndjson(request, format):
+        totals = await tournament_uc.get_voting_totals()
+        rows = tournament_uc.iter_participants(after, has_voted, name_prefix)
+        return _ndjson_response(chain([totals], (participant_status(p, voted) for _, p, voted in islice(rows, limit))))
+
+    if limit is None and cursor is None and has_voted is None and name_prefix is None:
+        build = tournament_uc.get_voting_stats
+    else:
+        async def build():
+            rows, next_after = await tournament_uc.get_participants_page(after, limit or DEFAULT_PAGE_SIZE,
+                                                                         has_voted, name_prefix)
+            return {
+                **await tournament_uc.get_voting_totals(),
+                "participant_status": [participant_status(p, voted) for p, voted in rows],
+                "next_cursor": _format_cursor(next_after),
+            }
+
     try:
-        votes = tournament_uc.tournament_repo.get_all_votes()
-        participants = await tournament_uc.get_all_participants()
-        
-        # Get unique participant IDs who have voted
-        voted_participant_ids = set(vote.participant_id for vote in votes)
-        
-        total_votes = len(votes)
-        total_participants = len(participants)
-        voting_percentage = (total_votes / total_participants * 100) if total_participants > 0 else 0
-        
-        # Create participant status list
-        participant_status = []
-        for participant in participants:
-            participant_status.append({
-                "id": participant.id,
-                "name": participant.name,
-                "has_voted": participant.id in voted_participant_ids
-            })
-        
-        return {
-            "total_votes": total_votes,
-            "total_participants": total_participants,
-            "voting_percentage": round(voting_percentage, 1),
-            "participant_status": participant_status
-        }
+        return await response_cache.respond(request, tournament_uc.tournament_repo.get_cache_version(), build)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@wine_tournament_router.get("/stream")
+async def stream_tournament(tournament_uc: WineTournamentUC = Depends(get_tournament_uc)):
+    """Server-Sent Events: a `snapshot` event, then `leaderboard`, `progress`
+    and `participants` deltas as votes and participants are committed. A client
+    too slow to keep up gets a new `snapshot` in place of the deltas it missed"""
+    # Subscribe before taking the snapshot so no commit falls in between
+    queue = tournament_uc.events.subscribe()
+
+    async def event_source():
+        try:
+            yield format_event("snapshot", await tournament_uc.get_stream_snapshot())
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event is RESYNC:
+                    event = format_event("snapshot", await tournament_uc.get_stream_snapshot())
+                yield event
+        finally:
+            tournament_uc.events.unsubscribe(queue)
+
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _parse_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return 0
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _format_cursor(after: Optional[int]) -> Optional[str]:
+    return str(after) if after is not None else None
+
+
+def _wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    return format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", "")
+
+
+def _ndjson_response(rows: Iterator[dict]) -> StreamingResponse:
+    """Serialize rows as they are read, so memory does not grow with the size of the event"""
+    async def lines():
+        for batch in _batched(rows, NDJSON_CHUNK_SIZE):
+            yield b"".join(fast_json.dumps(row) + b"\n" for row in batch)
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _batched(rows: Iterator, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+async def _read_batch(request: Request, model: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[BatchItemResult]]:
+    """Parse a JSON array or NDJSON body into (index, item) pairs plus per-item parse errors.
+
+    Bodies of more than MAX_BATCH_SIZE items, or with NDJSON lines over
+    MAX_LINE_BYTES, are refused with 413.
+    """
+    items, errors = [], []
+
+    def parse(index: int, raw):
+        if index >= MAX_BATCH_SIZE:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+        try:
+            items.append((index, model.model_validate(raw if not isinstance(raw, (str, bytes)) else fast_json.loads(raw))))
+        except (ValidationError, ValueError) as e:
+            errors.append(BatchItemResult(index=index, success=False, error=str(e)))
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        # Parse line by line as the body streams in; only the unfinished last line is carried over
+        index, tail = 0, b""
+        async for chunk in request.stream():
+            *lines, rest = chunk.split(b"\n")
+            if lines:
+                lines[0], tail = tail + lines[0], rest
+            else:
+                tail += rest
+            if len(tail) > MAX_LINE_BYTES or any(len(line) > MAX_LINE_BYTES for line in lines):
+                raise HTTPException(status_code=413, detail=f"Lines must be at most {MAX_LINE_BYTES} bytes")
+            for line in lines:
+                if line.strip():
+                    parse(index, line)
+                    index += 1
+        if tail.strip():
+            parse(index, tail)
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        for index, raw in enumerate(body):
+            parse(index, raw)
+    return items, errors
+
+
+def _batch_response(items: List[Tuple[int, BaseModel]], results: List[BatchItemResult],
+                    errors: List[BatchItemResult]) -> BatchResponse:
+    # The use case numbers results by position among the parsed items
+    for result in results:
+        result.index = items[result.index][0]
+    results = sorted(results + errors, key=lambda r: r.index)
+    succeeded = sum(1 for r in results if r.success)
+    return BatchResponse(total=len(results), succeeded=succeeded, failed=len(results) - succeeded, results=results)
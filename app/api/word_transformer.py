@@ -1,13 +1,26 @@
+import asyncio
 import inject
-from typing import Optional
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Tuple
 from app.api.auth import validate_apikey_request
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.usecase.word_transformer import WordTransformerUC
+from app.gateway.my_ip import GatewayUnavailable
+from utils import fast_json
 
 word_transformer_router = APIRouter()
 
+# Words transformed and saved together, and written to the response as one piece
+WORDS_CHUNK_SIZE = 200
+# Longest NDJSON line kept; longer ones are dropped as they arrive and reported as errors
+MAX_LINE_BYTES = 64 * 1024
+NOT_A_WORD = 'Expected a string or {"word": string}'
+LINE_TOO_LONG = f"Line longer than {MAX_LINE_BYTES} bytes"
+# Stands in for a dropped line
+_TOO_LONG = object()
+
 
 class WordTransformRequest(BaseModel):
     word: str
@@ -19,5 +32,145 @@ async def handler(
         _=Depends(validate_apikey_request)
 ):
     uc:WordTransformerUC = inject.instance(WordTransformerUC)
-    new_word = await uc.reverse_and_concat(word_transform_request.word)
+    try:
+        new_word = await uc.reverse_and_concat(word_transform_request.word)
+    except GatewayUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     return new_word
+
+
+@word_transformer_router.post("/transform:batch")
+async def batch_handler(request: Request, _=Depends(validate_apikey_request)):
+    """Transform a JSON array or an NDJSON stream of words, each a string or `{"word": ...}`.
+
+    Answers NDJSON with one line per input item, in input order: the
+    transformed word, or `{"index": ..., "error": ...}` for an item that is not
+    a word. NDJSON input is transformed and streamed back while it is still
+    arriving, so memory does not grow with the size of the input; lines over
+    MAX_LINE_BYTES are reported as errors.
+    """
+    uc: WordTransformerUC = inject.instance(WordTransformerUC)
+    body_read = asyncio.Event()
+    if "ndjson" in request.headers.get("content-type", ""):
+        items = _ndjson_chunks(request, body_read)
+    else:
+        try:
+            body = fast_json.loads(await request.body())
+        except ValueError:
+            body = None
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        body_read.set()
+        items = _array_chunks(body)
+    # Per chunk handed to the use case: (position in the chunk, error line) of the items left out of it
+    skipped: Deque[List[Tuple[int, dict]]] = deque()
+
+    async def word_chunks() -> AsyncIterator[List[str]]:
+        async for chunk in items:
+            words, errors = [], []
+            for index, raw in chunk:
+                word = _parse_word(raw)
+                if word is None:
+                    error = LINE_TOO_LONG if raw is _TOO_LONG else NOT_A_WORD
+                    errors.append((len(words) + len(errors), {"index": index, "error": error}))
+                else:
+                    words.append(word)
+            skipped.append(errors)
+            yield words
+
+    try:
+        results = await uc.reverse_and_concat_many(word_chunks())
+    except GatewayUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def lines():
+        async for rows in results:
+            for position, error in skipped.popleft():
+                rows.insert(position, error)
+            yield b"".join(fast_json.dumps(row) + b"\n" for row in rows)
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+
+    return _DuplexStreamingResponse(lines(), body_read, media_type="application/x-ndjson")
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """Streams while the request body is still being read.
+
+    StreamingResponse may listen for a disconnect by calling `receive` alongside
+    the body iterator, which would take request chunks away from it. Here the
+    iterator is the only reader until `body_read` is set (a disconnect ends it
+    through `request.stream()`); after that the response listens for the
+    disconnect itself and stops the iterator, since servers may silently drop
+    what is sent to a client that is gone.
+    """
+
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def __call__(self, scope, receive, send):
+        streaming = asyncio.create_task(self.stream_response(send))
+        disconnected = asyncio.create_task(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait((streaming, disconnected), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            streaming.cancel()
+            disconnected.cancel()
+            await asyncio.gather(streaming, disconnected, return_exceptions=True)
+        if streaming.cancelled():
+            # The client left: nothing more is transformed or saved
+            return
+        if streaming.exception() is not None:
+            raise streaming.exception()
+        if self.background is not None:
+            await self.background()
+
+    async def _wait_for_disconnect(self, receive):
+        await self.body_read.wait()
+        await self.listen_for_disconnect(receive)
+
+
+async def _ndjson_chunks(request: Request, body_read: asyncio.Event) -> AsyncIterator[List[Tuple[int, object]]]:
+    """(index, decoded line) pairs, handed on as soon as each piece of the body has arrived"""
+    index, buffer, too_long = 0, b"", False
+    async for data in request.stream():
+        *received, buffer = (buffer + data).split(b"\n")
+        chunk = []
+        for line in received:
+            if too_long or len(line) > MAX_LINE_BYTES:
+                # Includes the end of a line that was dropped as it arrived
+                chunk.append((index, _TOO_LONG))
+                index += 1
+                too_long = False
+            elif line.strip():
+                chunk.append((index, _decode(line)))
+                index += 1
+        if len(buffer) > MAX_LINE_BYTES:
+            buffer, too_long = b"", True
+        for start in range(0, len(chunk), WORDS_CHUNK_SIZE):
+            yield chunk[start:start + WORDS_CHUNK_SIZE]
+    body_read.set()
+    if too_long:
+        yield [(index, _TOO_LONG)]
+    elif buffer.strip():
+        yield [(index, _decode(buffer))]
+
+
+async def _array_chunks(items: list) -> AsyncIterator[List[Tuple[int, object]]]:
+    for start in range(0, len(items), WORDS_CHUNK_SIZE):
+        yield list(enumerate(items[start:start + WORDS_CHUNK_SIZE], start))
+
+
+def _decode(line: bytes) -> object:
+    try:
+        return fast_json.loads(line)
+    except ValueError:
+        # Reported as an item that is not a word
+        return None
+
+
+def _parse_word(raw) -> Optional[str]:
+    if isinstance(raw, dict):
+        raw = raw.get("word")
+    return raw if isinstance(raw, str) else None
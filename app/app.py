@@ -1,56 +1,59 @@
+import asyncio
 import inject
 from loguru import logger
+from decouple import config, Csv
 
 # Inject Configured Dependencies
 from app.api import app_router
-from app.config import di_configuration
+from app.config import di_configuration, worker_count
+from app.usecase.wine_tournament import WineTournamentUC
+from app.usecase.tournament_manager import TournamentManagerUC
+from app.usecase.change_follower import follow_external_changes
+from app.gateway.http_client import SharedHttpClient
+from utils.loop_lag import LoopLagMonitor
+from app import metrics
+from app.tracing import SlowRequestLog
+from app.api.static_assets import StaticAssets
+from app.api.edge_middleware import CORSPolicy, EdgeMiddleware
 
 inject.configure(di_configuration)
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError, ValidationException
-from starlette.responses import Response, JSONResponse, PlainTextResponse, FileResponse
+from starlette.responses import Response, JSONResponse, PlainTextResponse
 from starlette.requests import Request
+from prometheus_client import REGISTRY
+
+# Log records written while handling a request carry its method, path and elapsed time
+logger.configure(patcher=metrics.add_request_fields)
 
 app = FastAPI(title="Wine Tournament Manager", version="0.1")
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.state.loop_lag = LoopLagMonitor(interval_seconds=config("LOOP_LAG_INTERVAL_SECONDS", default=0.05, cast=float),
+                                    on_sample=metrics.EVENT_LOOP_LAG.observe)
+# Span breakdowns of requests slower than SLOW_REQUEST_MS, served at /api/v1/admin/slow-requests
+app.state.slow_requests = SlowRequestLog(threshold_ms=config("SLOW_REQUEST_MS", default=500, cast=float),
+                                         size=config("SLOW_REQUEST_BUFFER", default=100, cast=int))
+# Comma-separated origins allowed to call the API from a browser, or *
+cors_policy = CORSPolicy(allow_origins=config("CORS_ALLOWED_ORIGINS", default="*", cast=Csv()))
+# CORS headers, preflight answers and gzip for dynamic bodies; static files and cached bodies come precompressed
+app.add_middleware(EdgeMiddleware, cors=cors_policy)
+# Added last so it is outermost and times the whole request, CORS and compression included
+app.add_middleware(metrics.MetricsMiddleware, slow_requests=app.state.slow_requests)
 app.include_router(app_router, prefix="/api/v1")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files: the output of scripts/build_assets.py, or the sources when not built
+static_assets = StaticAssets(build_dir=config("STATIC_BUILD_DIR", default="build/static"), source_dir="static")
+app.mount("/static", static_assets, name="static")
 
-ALLOWED_ORIGINS = '*'  # or 'foo.com', etc.
 logger.info("Hello World!")
 
 
-# handle CORS preflight requests
-@app.options('/{rest_of_path:path}', include_in_schema=False)
-async def preflight_handler(request: Request, rest_of_path: str) -> Response:
-    response = Response()
-    response.headers['Access-Control-Allow-Origin'] = ALLOWED_ORIGINS
-    response.headers['Access-Control-Allow-Methods'] = 'POST, GET, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type'
-    return response
-
-
-# set CORS headers
-@app.middleware("http")
-async def add_CORS_header(request: Request, call_next):
-    response = await call_next(request)
-    response.headers['Access-Control-Allow-Origin'] = ALLOWED_ORIGINS
-    response.headers['Access-Control-Allow-Methods'] = 'POST, GET, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type'
-    return response
-
-
 @app.exception_handler(500)
 async def add_CORS_header_500(request: Request, call_next):
+    # Sent from outside the middleware stack, so the CORS headers are added here
     response = JSONResponse(content={"detail": "something went wrong :("}, status_code=500)
-    response.headers['Access-Control-Allow-Origin'] = ALLOWED_ORIGINS
-    response.headers['Access-Control-Allow-Methods'] = 'POST, GET, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type'
+    origin = request.headers.get("origin")
+    response.raw_headers.extend(cors_policy.headers(origin.encode("latin-1") if origin is not None else None))
     return response
 
 
@@ -67,7 +70,19 @@ async def validation_exception_handler(request, exc):
 @app.on_event("startup")
 # Code to be run when the server starts.
 async def startup_event():
-    pass
+    app.state.loop_lag_task = asyncio.create_task(app.state.loop_lag.run())
+    if worker_count() > 1:
+        # Other worker processes write to the same database
+        app.state.change_follower = asyncio.create_task(follow_external_changes(
+            lambda: [inject.instance(WineTournamentUC), *inject.instance(TournamentManagerUC).loaded_use_cases()],
+            interval_seconds=config("CHANGE_POLL_SECONDS", default=0.2, cast=float)
+        ))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Pooled outbound connections
+    await inject.instance(SharedHttpClient).aclose()
 
 
 @app.get("/ping")
@@ -75,6 +90,27 @@ async def ping():
     return JSONResponse({"message": "pong"})
 
 
+@app.get("/loop-lag")
+async def loop_lag():
+    """How late the event loop has been running scheduled work; high values mean something blocks it"""
+    return JSONResponse(app.state.loop_lag.stats())
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+
+def _vote_queues():
+    manager = inject.instance(TournamentManagerUC)
+    yield "default", inject.instance(WineTournamentUC).vote_queue
+    yield from zip(manager.loaded_tournaments(), (uc.vote_queue for uc in manager.loaded_use_cases()))
+
+
+REGISTRY.register(metrics.VoteQueueCollector(_vote_queues))
+
+
 @app.get("/")
-async def home():
-    return FileResponse("static/index.html")
+async def home(request: Request):
+    return static_assets.page("index.html", request.headers)
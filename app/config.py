@@ -1,3 +1,4 @@
+import os
 from decouple import config
 from pydantic import BaseModel
 from typing import Optional
@@ -5,6 +6,7 @@ from loggers_conf.gcp import configure_logger as gcp_configure_logger
 from utils.secret_manager import set_env_vars_from_gcp_secret_manager
 from loguru import logger
 
+from app.gateway.http_client import SharedHttpClient
 from app.gateway.my_ip import MyIP, MyIPImpl
 
 from app.model.word import WordRepository
@@ -14,8 +16,14 @@ from app.usecase.word_transformer import WordTransformerUC, WordTransformerUCImp
 
 from app.model.wine_tournament import TournamentRepository
 from app.repository.tournament_json import TournamentJsonRepository
+from app.repository.tournament_log import TournamentLogRepository
+from app.repository.tournament_sqlite import TournamentSqliteRepository
 from app.usecase.wine_tournament import WineTournamentUC, WineTournamentUCImpl
 
+from app.model.tournament import TournamentCatalogRepository
+from app.repository.tournament_catalog_json import TournamentCatalogJsonRepository
+from app.usecase.tournament_manager import TournamentManagerUC, TournamentManagerUCImpl
+
 
 class Configuration(BaseModel):
     ENVIRONMENT: Optional[str] = None
@@ -49,14 +57,80 @@ def new_configuration():
     return configuration
 
 
+def worker_count() -> int:
+    return config("WORKERS", default=1, cast=int)
+
+
+def new_tournament_repository(data_dir: str, sqlite_file: Optional[str] = None) -> TournamentRepository:
+    storage = config("TOURNAMENT_STORAGE", default="json")
+    group_commit_seconds = config("TOURNAMENT_GROUP_COMMIT_SECONDS", default=0.002, cast=float)
+    if worker_count() > 1 and storage != "sqlite":
+        # The JSON and log backends keep the tournament in memory and assume a single writer process
+        raise ValueError("WORKERS > 1 requires TOURNAMENT_STORAGE=sqlite")
+    if storage == "log":
+        return TournamentLogRepository(
+            data_dir=data_dir,
+            compact_every=config("TOURNAMENT_LOG_COMPACT_EVERY", default=1000, cast=int),
+            group_commit_seconds=group_commit_seconds
+        )
+    if storage == "sqlite":
+        return TournamentSqliteRepository(
+            db_file=sqlite_file or os.path.join(data_dir, "tournament.db"),
+            # Workers follow each other's writes through the database
+            change_feed=worker_count() > 1,
+            group_commit_seconds=group_commit_seconds
+        )
+    return TournamentJsonRepository(
+        participants_file=os.path.join(data_dir, "participants.json"),
+        votes_file=os.path.join(data_dir, "votes.json"),
+        group_commit_seconds=group_commit_seconds
+    )
+
+
+def new_tournament_manager(data_dir: str) -> TournamentManagerUC:
+    # Every tournament is stored in its own directory
+    tournaments_dir = os.path.join(data_dir, "tournaments")
+    return TournamentManagerUCImpl(
+        repository_factory=lambda tournament_id: new_tournament_repository(os.path.join(tournaments_dir, tournament_id)),
+        max_loaded=config("TOURNAMENT_MAX_LOADED", default=32, cast=int),
+        idle_seconds=config("TOURNAMENT_IDLE_SECONDS", default=3600, cast=float),
+        reservation_ttl_seconds=config("RESERVATION_TTL_SECONDS", default=120, cast=float),
+        vote_queue_size=config("VOTE_QUEUE_SIZE", default=5000, cast=int)
+    )
+
+
+def new_my_ip(http: SharedHttpClient) -> MyIP:
+    return MyIPImpl(
+        http,
+        url=config("MY_IP_URL", default="https://api.ipify.org"),
+        timeout_seconds=config("MY_IP_TIMEOUT_SECONDS", default=2.0, cast=float),
+        ttl_seconds=config("MY_IP_CACHE_SECONDS", default=300, cast=float),
+        stale_seconds=config("MY_IP_STALE_SECONDS", default=3600, cast=float),
+        failure_threshold=config("MY_IP_FAILURE_THRESHOLD", default=3, cast=int),
+        reset_seconds=config("MY_IP_RESET_SECONDS", default=30, cast=float)
+    )
+
+
 def di_configuration(binder, _=new_configuration()):
     # Repositories
-    binder.bind(WordRepository, WordsInMemoryRepository())
-    binder.bind(TournamentRepository, TournamentJsonRepository())
-    # Gateways
-    binder.bind(MyIP, MyIPImpl())
+    binder.bind(WordRepository, WordsInMemoryRepository(
+        capacity=config("WORDS_CAPACITY", default=10000, cast=int),
+        ttl_seconds=config("WORDS_TTL_SECONDS", default=0, cast=float) or None,
+        spill_file=config("WORDS_SPILL_FILE", default="") or None
+    ))
+    data_dir = config("TOURNAMENT_DATA_DIR", default="data")
+    binder.bind(TournamentRepository, new_tournament_repository(data_dir, config("TOURNAMENT_SQLITE_FILE", default=None)))
+    binder.bind(TournamentCatalogRepository, TournamentCatalogJsonRepository(os.path.join(data_dir, "tournaments.json")))
+    # Gateways share one connection pool, closed at shutdown
+    http = SharedHttpClient()
+    binder.bind(SharedHttpClient, http)
+    binder.bind(MyIP, new_my_ip(http))
     # Usecases
     binder.bind(WordTransformerUC, WordTransformerUCImpl(
         concat_with=" --> hello :)"
     ))
-    binder.bind(WineTournamentUC, WineTournamentUCImpl())
+    binder.bind(WineTournamentUC, WineTournamentUCImpl(
+        reservation_ttl_seconds=config("RESERVATION_TTL_SECONDS", default=120, cast=float),
+        vote_queue_size=config("VOTE_QUEUE_SIZE", default=5000, cast=int)
+    ))
+    binder.bind(TournamentManagerUC, new_tournament_manager(data_dir))
@@ -0,0 +1,45 @@
+"""The process-wide outbound HTTP client, shared by every gateway.
+
+One connection pool means keep-alive connections (and their DNS lookups and
+TLS handshakes) are reused across requests instead of being paid on each call.
+HTTP/2 is negotiated when `h2` is installed (the `httpx[http2]` extra in requirements.txt).
+"""
+from typing import Optional
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - exercised only without h2
+    HTTP2_AVAILABLE = False
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+# Idle pooled connections are closed after this long
+DEFAULT_KEEPALIVE_SECONDS = 30.0
+DEFAULT_TIMEOUT_SECONDS = 5.0
+
+
+class SharedHttpClient:
+    """Holds one `httpx.AsyncClient`, created on first use and closed at application shutdown"""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+                 keepalive_seconds: float = DEFAULT_KEEPALIVE_SECONDS,
+                 timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS):
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_seconds)
+        self.timeout = httpx.Timeout(timeout_seconds)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=HTTP2_AVAILABLE)
+        return self._client
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
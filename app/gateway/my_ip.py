@@ -1,5 +1,18 @@
 import abc
 import httpx
+from app.gateway.http_client import SharedHttpClient
+from app.gateway.resilience import CircuitBreaker, CircuitOpen, StaleWhileRevalidateCache
+from app.metrics import GATEWAY_CACHE_REQUESTS, GATEWAY_REQUEST_SECONDS
+
+DEFAULT_URL = "https://api.ipify.org"
+
+
+class GatewayUnavailable(Exception):
+    """An upstream could not answer; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class MyIP(abc.ABC):
@@ -9,7 +22,34 @@ class MyIP(abc.ABC):
 
 
 class MyIPImpl(MyIP):
+    """Public IP from ipify, through the shared client.
+
+    The address rarely changes, so it is cached for `ttl_seconds` and served
+    stale while a refresh runs for `stale_seconds` more. After repeated
+    failures or timeouts the circuit opens and callers fail fast with
+    `GatewayUnavailable` instead of each waiting `timeout_seconds`.
+    """
+
+    def __init__(self, http: SharedHttpClient, url: str = DEFAULT_URL, timeout_seconds: float = 2.0,
+                 ttl_seconds: float = 300.0, stale_seconds: float = 3600.0, failure_threshold: int = 3,
+                 reset_seconds: float = 30.0):
+        self.http = http
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.cache = StaleWhileRevalidateCache(ttl_seconds, stale_seconds,
+                                               on_lookup=lambda result: GATEWAY_CACHE_REQUESTS.labels("my_ip", result).inc())
+        self.breaker = CircuitBreaker("my_ip", failure_threshold=failure_threshold, reset_seconds=reset_seconds)
+
     async def get_ip(self) -> str:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("https://api.ipify.org", timeout=30)
-            return response.text
+        try:
+            return await self.cache.get(self.url, lambda: self.breaker.call(self._fetch))
+        except CircuitOpen as e:
+            raise GatewayUnavailable(str(e), retry_after=round(e.retry_after)) from e
+        except httpx.HTTPError as e:
+            raise GatewayUnavailable(f"my_ip request failed: {e!r}", retry_after=1) from e
+
+    async def _fetch(self) -> str:
+        with GATEWAY_REQUEST_SECONDS.labels("my_ip").time():
+            response = await self.http.client.get(self.url, timeout=self.timeout_seconds)
+        response.raise_for_status()
+        return response.text.strip()
@@ -0,0 +1,134 @@
+"""Caching and failure handling for calls to upstream services."""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+from loguru import logger
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """The upstream failed repeatedly; calls are refused for `retry_after` more seconds"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after `failure_threshold` consecutive failures.
+
+    While open, calls fail immediately instead of each waiting for the
+    upstream's timeout. After `reset_seconds` one trial call is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        self._before_call()
+        try:
+            result = await operation()
+        except Exception:
+            self._record_failure()
+            raise
+        except BaseException:
+            # Cancelled: nothing learned about the upstream, but a trial must not leave the
+            # circuit half open (refusing every call); the next call is the trial instead
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+            raise
+        self.state = CLOSED
+        self.failures = 0
+        return result
+
+    def _before_call(self):
+        if self.state == CLOSED:
+            return
+        remaining = self._opened_at + self.reset_seconds - self.clock()
+        if self.state == OPEN and remaining <= 0:
+            # This call is the trial; others keep failing fast until it is done
+            self.state = HALF_OPEN
+            return
+        raise CircuitOpen(self.name, max(remaining, 1.0))
+
+    def _record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+            self.state = OPEN
+            self._opened_at = self.clock()
+
+
+class StaleWhileRevalidateCache(Generic[T]):
+    """Values loaded from an upstream, kept for `ttl_seconds` and served stale for `stale_seconds` more.
+
+    A stale hit answers at once and refreshes in the background. Only one load
+    per key runs at a time: concurrent misses and refreshes wait for the same one.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float, clock: Callable[[], float] = time.monotonic,
+                 on_lookup: Optional[Callable[[str], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.clock = clock
+        # Called with "hit", "stale" or "miss", e.g. to feed a metrics counter
+        self.on_lookup = on_lookup
+        # key -> (value, loaded at)
+        self._entries: Dict[Hashable, Tuple[T, float]] = {}
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self.clock() - entry[1]
+            if age < self.ttl_seconds:
+                self._lookup("hit")
+                return entry[0]
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._lookup("stale")
+                self._load(key, load)
+                return entry[0]
+        self._lookup("miss")
+        # Shielded: a caller giving up does not cancel the load the others wait for
+        return await asyncio.shield(self._load(key, load))
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def _load(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        task = self._loading.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            return task
+        task = asyncio.create_task(load())
+        self._loading[key] = task
+        task.add_done_callback(lambda done: self._loaded(key, done))
+        return task
+
+    def _loaded(self, key: Hashable, task: asyncio.Task):
+        if self._loading.get(key) is task:
+            del self._loading[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # Waiters get the exception; a background refresh only leaves the stale value in place
+            logger.warning(f"Loading {key!r} failed: {task.exception()!r}")
+            return
+        self._entries[key] = (task.result(), self.clock())
+
+    def _lookup(self, result: str):
+        if self.on_lookup is not None:
+            self.on_lookup(result)
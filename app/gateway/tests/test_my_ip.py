@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import pytest_asyncio
+from app.gateway.http_client import SharedHttpClient
+from app.gateway.my_ip import GatewayUnavailable, MyIPImpl
+from app.gateway.resilience import CircuitBreaker, CircuitOpen, HALF_OPEN
+
+
+class StubIpify(BaseHTTPRequestHandler):
+    # Keep-alive, like the real service
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.client_address)
+        time.sleep(server.delay)
+        body = server.ip.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubIpify)
+    server.daemon_threads = True
+    server.requests, server.delay, server.ip = [], 0.0, "203.0.113.7"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest_asyncio.fixture
+async def http():
+    http = SharedHttpClient()
+    yield http
+    await http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_request_and_connection(upstream, http):
+    my_ip = MyIPImpl(http, url=f"http://127.0.0.1:{upstream.server_port}/", ttl_seconds=60, stale_seconds=60)
+    upstream.delay = 0.05
+    assert set(await asyncio.gather(*(my_ip.get_ip() for _ in range(20)))) == {"203.0.113.7"}
+    assert len(upstream.requests) == 1
+
+    # Stale: answered from cache at once, refreshed in the background over the pooled connection
+    now = time.monotonic()
+    my_ip.cache.clock = lambda: now + 90
+    upstream.ip = "203.0.113.8"
+    assert await my_ip.get_ip() == "203.0.113.7"
+    await asyncio.sleep(0.2)
+    assert await my_ip.get_ip() == "203.0.113.8"
+    assert len(upstream.requests) == 2 and upstream.requests[0] == upstream.requests[1]
+
+
+@pytest.mark.asyncio
+async def test_slow_upstream_opens_the_circuit(upstream, http):
+    my_ip = MyIPImpl(http, url=f"http://127.0.0.1:{upstream.server_port}/", timeout_seconds=0.05,
+                     failure_threshold=2, reset_seconds=60)
+    upstream.delay = 0.3
+    for _ in range(2):
+        with pytest.raises(GatewayUnavailable):
+            await my_ip.get_ip()
+
+    started = time.perf_counter()
+    with pytest.raises(GatewayUnavailable) as e:
+        await my_ip.get_ip()
+    assert time.perf_counter() - started < 0.01 and e.value.retry_after > 0
+    assert len(upstream.requests) == 2
+
+    # After the reset period one trial call goes through and closes the circuit
+    upstream.delay = 0.0
+    my_ip.breaker.reset_seconds = 0
+    assert await my_ip.get_ip() == "203.0.113.7"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_does_not_wedge_the_circuit():
+    now = [0.0]
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_seconds=10, clock=lambda: now[0])
+
+    async def fail():
+        raise OSError("down")
+
+    with pytest.raises(OSError):
+        await breaker.call(fail)
+    now[0] = 10
+    trial = asyncio.create_task(breaker.call(lambda: asyncio.sleep(60)))
+    await asyncio.sleep(0)
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        await breaker.call(fail)
+
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    # The next call gets to be the trial
+    assert await breaker.call(lambda: asyncio.sleep(0, result="ok")) == "ok"
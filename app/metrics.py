@@ -0,0 +1,156 @@
+"""Prometheus metrics for requests, repositories, caches, gateways and the event loop, served at /metrics.
+
+Metric objects are module globals so any layer can record into them; all
+hot-path recording is a label lookup and a lock-free add, cheap enough to
+leave on in production. With several worker processes set
+PROMETHEUS_MULTIPROC_DIR so /metrics aggregates every worker.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional, Tuple
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from app import tracing
+
+# Request latencies from sub-millisecond cache hits to slow batch imports
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time until the response was fully sent",
+                                 ["method", "route"], buckets=LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled", ["method"], multiprocess_mode="livesum")
+
+REPOSITORY_SECONDS = Histogram("tournament_repository_operation_seconds", "Repository I/O time",
+                               ["backend", "operation"], buckets=LATENCY_BUCKETS)
+REPOSITORY_BYTES = Counter("tournament_repository_bytes_total", "Bytes read or written by repositories",
+                           ["backend", "operation"])
+
+RESPONSE_CACHE_REQUESTS = Counter("response_cache_requests_total", "Cached read endpoint lookups", ["result"])
+RESPONSE_CACHE_HIT_RATIO = Gauge("response_cache_hit_ratio", "Hits over lookups since start",
+                                 multiprocess_mode="liveall")
+
+VOTE_COMMIT_SECONDS = Histogram("vote_commit_seconds", "Time to make one batch of ballots durable",
+                                buckets=LATENCY_BUCKETS)
+VOTE_COMMIT_BATCH = Histogram("vote_commit_batch_size", "Ballots per committed batch",
+                              buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+VOTES_REJECTED = Counter("votes_rejected_total", "Ballots refused because the ingestion queue was full")
+
+GATEWAY_REQUEST_SECONDS = Histogram("gateway_request_seconds", "Outbound calls to upstream services", ["gateway"],
+                                    buckets=LATENCY_BUCKETS)
+GATEWAY_CACHE_REQUESTS = Counter("gateway_cache_requests_total", "Gateway cache lookups", ["gateway", "result"])
+
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "How late the event loop ran a scheduled wake-up",
+                           buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+
+# Set for the duration of a request, for log records and span capture
+request_context: ContextVar[Optional[Tuple[str, str, float]]] = ContextVar("request_context", default=None)
+
+
+@contextmanager
+def time_repository(backend: str, operation: str):
+    """Time a repository operation; yields a list to append the bytes it moved to"""
+    moved = []
+    started = time.perf_counter()
+    try:
+        yield moved
+    finally:
+        REPOSITORY_SECONDS.labels(backend, operation).observe(time.perf_counter() - started)
+        if moved:
+            REPOSITORY_BYTES.labels(backend, operation).inc(sum(moved))
+
+
+class VoteQueueCollector:
+    """Queue depth of every loaded tournament, read at scrape time"""
+
+    def __init__(self, queues: Callable[[], Iterable[Tuple[str, object]]]):
+        self.queues = queues
+
+    def collect(self):
+        depth = GaugeMetricFamily("vote_queue_depth", "Ballots waiting to be written", labels=["tournament"])
+        for tournament_id, queue in self.queues():
+            depth.add_metric([tournament_id], len(queue))
+        yield depth
+
+
+def render() -> Tuple[bytes, str]:
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method and route template.
+
+    Routes are labelled by their template (`/api/v1/tournaments/{tournament_id}`),
+    never the raw path, so label cardinality stays bounded. With `slow_requests`
+    every request collects spans, and those over its threshold are kept there.
+    """
+
+    def __init__(self, app, slow_requests: Optional[tracing.SlowRequestLog] = None):
+        self.app = app
+        self.slow_requests = slow_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = 500
+        token = request_context.set((method, scope["path"], started))
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        spans_token = tracing.begin() if self.slow_requests is not None else None
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            request_context.reset(token)
+            route = route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            if spans_token is not None:
+                spans = tracing.end(spans_token)
+                self.slow_requests.observe(method, scope["path"], route, status, elapsed, spans)
+
+
+def route_template(scope) -> str:
+    """The matched route as a template, e.g. `/api/v1/tournaments/{tournament_id}/votes`.
+
+    Taken from the route Starlette set on the scope; routes of included
+    routers only know their own suffix, so the prefix of the router FastAPI
+    matched them through is prepended.
+    """
+    route = scope.get("route")
+    if route is None:
+        if "endpoint" in scope:
+            # Mounted app such as the static files: label by its mount point
+            return scope["root_path"][len(scope.get("app_root_path", "")):] + "/{path}"
+        return UNMATCHED_ROUTE
+    included = scope.get("fastapi", {}).get("included_router")
+    prefix = included.include_context.prefix if included is not None else ""
+    return prefix + route.path
+
+
+def add_request_fields(record):
+    """Loguru patcher: records logged while handling a request carry its method, path and elapsed time"""
+    context = request_context.get()
+    if context is not None:
+        method, path, started = context
+        record["extra"].update(method=method, path=path,
+                               request_elapsed_ms=round((time.perf_counter() - started) * 1000, 3))
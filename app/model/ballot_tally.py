@@ -0,0 +1,99 @@
+from typing import Dict, Iterable, List
+import numpy as np
+
+
+class BallotTally:
+    """Per-wine place counts, exposure and pairwise preferences maintained from ballot deltas.
+
+    A ballot ranks three wines out of the ones its taster was assigned. It says
+    the first beats the second and third, the second beats the third, and all
+    three beat every assigned wine left unranked; unranked wines are not
+    compared with each other. `wins[a, b]` counts the ballots preferring wine
+    `a` to wine `b`, and `exposure[w]` the ballots whose taster had wine `w`,
+    so every ranking method can be answered without rescanning the ballots.
+    """
+
+    def __init__(self, size: int = 0):
+        # Rows: first, second and third places
+        self.places = np.zeros((3, size), dtype=np.int64)
+        self.exposure = np.zeros(size, dtype=np.int64)
+        self.wins = np.zeros((size, size), dtype=np.int64)
+        self.ballots = 0
+
+    @classmethod
+    def from_ballots(cls, votes: Iterable, assigned_wines: Dict[str, List[int]]) -> "BallotTally":
+        tally = cls()
+        for vote in votes:
+            tally.add(vote, assigned_wines.get(vote.participant_id, ()))
+        return tally
+
+    def add(self, vote, assigned_wines: Iterable[int]):
+        self.replace(None, (), vote, assigned_wines)
+
+    def remove(self, vote, assigned_wines: Iterable[int]):
+        self._ensure(_size_for(vote, assigned_wines))
+        self._apply(vote, assigned_wines, -1)
+
+    def replace(self, previous, previous_wines: Iterable[int], vote, assigned_wines: Iterable[int]):
+        # Grown up front: once the counts start changing nothing can fail halfway
+        size = _size_for(vote, assigned_wines)
+        if previous is not None:
+            size = max(size, _size_for(previous, previous_wines))
+        self._ensure(size)
+        if previous is not None:
+            self._apply(previous, previous_wines, -1)
+        self._apply(vote, assigned_wines, 1)
+
+    def copy(self) -> "BallotTally":
+        tally = BallotTally()
+        tally.places, tally.exposure, tally.wins = self.places.copy(), self.exposure.copy(), self.wins.copy()
+        tally.ballots = self.ballots
+        return tally
+
+    def wine_ids(self) -> np.ndarray:
+        """Wines that were on at least one ballot's list, ascending"""
+        wine_ids = np.flatnonzero(self.exposure)
+        return wine_ids[wine_ids > 0]
+
+    def _apply(self, vote, assigned_wines: Iterable[int], sign: int):
+        ranked = [vote.first_place, vote.second_place, vote.third_place]
+        unranked = [wine_id for wine_id in dict.fromkeys(assigned_wines) if wine_id not in ranked]
+        self.places[(0, 1, 2), ranked] += sign
+        self.exposure[ranked + unranked] += sign
+        winners = [ranked[0], ranked[0], ranked[1]]
+        losers = [ranked[1], ranked[2], ranked[2]]
+        for wine_id in unranked:
+            winners += ranked
+            losers += [wine_id] * 3
+        np.add.at(self.wins, (winners, losers), sign)
+        self.ballots += sign
+
+    def _ensure(self, size: int):
+        current = self.exposure.shape[0]
+        if size <= current:
+            return
+        # Grow geometrically so a stream of new wine ids stays amortized O(1)
+        size = max(size, 2 * current)
+        places = np.zeros((3, size), dtype=np.int64)
+        places[:, :current] = self.places
+        exposure = np.zeros(size, dtype=np.int64)
+        exposure[:current] = self.exposure
+        wins = np.zeros((size, size), dtype=np.int64)
+        wins[:current, :current] = self.wins
+        self.places, self.exposure, self.wins = places, exposure, wins
+
+
+def _size_for(vote, assigned_wines: Iterable[int]) -> int:
+    wine_ids = [vote.first_place, vote.second_place, vote.third_place, *assigned_wines]
+    if min(wine_ids) < 1:
+        # Numpy would wrap a negative id around to another wine's counters
+        raise ValueError(f"Wine ids must be positive: {wine_ids}")
+    return max(wine_ids) + 1
+
+
+def tally_from_rows(votes: Iterable, wine_rows: Iterable) -> BallotTally:
+    """Tally from ballots and (participant_id, wine_id) assignment rows"""
+    assigned: Dict[str, List[int]] = {}
+    for participant_id, wine_id in wine_rows:
+        assigned.setdefault(participant_id, []).append(wine_id)
+    return BallotTally.from_ballots(votes, assigned)
@@ -0,0 +1,71 @@
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Points awarded for first, second and third place
+PLACE_POINTS = (3, 2, 1)
+
+
+class Leaderboard:
+    """Live ranking of wines maintained from vote deltas.
+
+    Wines are kept ordered by total points, then number of first, second and third
+    places, then wine id, so top-K queries never rescan the votes.
+    """
+
+    def __init__(self):
+        # wine_id -> [total_points, first_places, second_places, third_places]
+        self._scores: Dict[int, List[int]] = {}
+        self._ranking: List[Tuple[int, int, int, int, int]] = []
+
+    def add_vote(self, vote):
+        self._apply(vote, 1)
+
+    def remove_vote(self, vote):
+        self._apply(vote, -1)
+
+    def replace_vote(self, previous, vote):
+        if previous is not None:
+            self.remove_vote(previous)
+        self.add_vote(vote)
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[int, int, int, int, int]]:
+        """(wine_id, total_points, first_places, second_places, third_places) in ranking order"""
+        ranking = self._ranking if k is None else self._ranking[:k]
+        return [(wine_id, -points, -firsts, -seconds, -thirds) for points, firsts, seconds, thirds, wine_id in ranking]
+
+    def ranked(self, wine_ids: Iterable[int]) -> List[Tuple[int, int, int, int, int, int]]:
+        """(rank, wine_id, total_points, first_places, second_places, third_places) of the given wines that
+        have a score, found by bisection instead of walking the ranking"""
+        rows = []
+        for wine_id in wine_ids:
+            score = self._scores.get(wine_id)
+            if score is not None:
+                rank = bisect.bisect_left(self._ranking, self._rank_key(wine_id, score)) + 1
+                rows.append((rank, wine_id, *score))
+        return rows
+
+    def __len__(self):
+        return len(self._ranking)
+
+    def _apply(self, vote, sign: int):
+        places = (vote.first_place, vote.second_place, vote.third_place)
+        for place, (wine_id, points) in enumerate(zip(places, PLACE_POINTS)):
+            score = self._scores.get(wine_id)
+            if score is None:
+                score = self._scores[wine_id] = [0, 0, 0, 0]
+            else:
+                self._unrank(wine_id, score)
+            score[0] += sign * points
+            score[place + 1] += sign
+            if any(score):
+                bisect.insort(self._ranking, self._rank_key(wine_id, score))
+            else:
+                del self._scores[wine_id]
+
+    def _unrank(self, wine_id: int, score: List[int]):
+        index = bisect.bisect_left(self._ranking, self._rank_key(wine_id, score))
+        del self._ranking[index]
+
+    @staticmethod
+    def _rank_key(wine_id: int, score: List[int]) -> Tuple[int, int, int, int, int]:
+        return -score[0], -score[1], -score[2], -score[3], wine_id
@@ -0,0 +1,81 @@
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from app.model.ballot_tally import BallotTally
+from app.model.leaderboard import PLACE_POINTS
+
+
+def _points(tally: BallotTally) -> np.ndarray:
+    return np.asarray(PLACE_POINTS, dtype=np.int64) @ tally.places
+
+
+def rank_by_points(tally: BallotTally, wine_ids: np.ndarray) -> np.ndarray:
+    """The fixed 3/2/1 sum, same order as the leaderboard"""
+    return _points(tally)[wine_ids].astype(np.float64)
+
+
+def rank_by_normalized_points(tally: BallotTally, wine_ids: np.ndarray) -> np.ndarray:
+    """Points per ballot that had the wine on its list, so wines tasted less often are not penalized"""
+    return _points(tally)[wine_ids] / tally.exposure[wine_ids]
+
+
+def rank_by_bayesian_average(tally: BallotTally, wine_ids: np.ndarray) -> np.ndarray:
+    """Points per ballot shrunk towards the event-wide mean.
+
+    A wine tasted by a handful of people cannot jump ahead on one lucky
+    ballot: it starts from the mean points per tasting, weighted as many
+    ballots as an average wine got, and moves away from it as ballots arrive.
+    """
+    points = _points(tally)[wine_ids]
+    exposure = tally.exposure[wine_ids]
+    if not exposure.any():
+        # No ballots yet: no mean to shrink towards
+        return np.zeros(len(wine_ids))
+    prior_mean = points.sum() / exposure.sum()
+    prior_weight = exposure.mean()
+    return (prior_weight * prior_mean + points) / (prior_weight + exposure)
+
+
+def rank_by_schulze(tally: BallotTally, wine_ids: np.ndarray) -> np.ndarray:
+    """Number of wines each wine beats under the Schulze method.
+
+    Strongest paths are computed with a Floyd-Warshall pass over the pairwise
+    matrix, one vectorized step per wine, so the cost depends on the number of
+    wines and not on the number of ballots.
+    """
+    wins = tally.wins[np.ix_(wine_ids, wine_ids)]
+    strength = np.where(wins > wins.T, wins, 0)
+    # Counts per pair of wines are small, and the narrowest type that holds them is several times faster
+    strength = strength.astype(np.min_scalar_type(int(strength.max(initial=0))))
+    through = np.empty_like(strength)
+    for k in range(len(wine_ids)):
+        np.minimum(strength[:, k, None], strength[None, k, :], out=through)
+        np.maximum(strength, through, out=strength)
+    np.fill_diagonal(strength, 0)
+    return (strength > strength.T).sum(axis=1).astype(np.float64)
+
+
+RANKING_METHODS: Dict[str, Callable[[BallotTally, np.ndarray], np.ndarray]] = {
+    "points": rank_by_points,
+    "normalized": rank_by_normalized_points,
+    "bayesian": rank_by_bayesian_average,
+    "schulze": rank_by_schulze,
+}
+
+
+def ranking_rows(tally: BallotTally, method: str = "points", top: Optional[int] = None) -> List[dict]:
+    """Wines ranked by `method` (a RANKING_METHODS key), ties broken like the leaderboard"""
+    wine_ids = tally.wine_ids()
+    scores = RANKING_METHODS[method](tally, wine_ids)
+    points = _points(tally)[wine_ids]
+    places = tally.places[:, wine_ids]
+    order = np.lexsort((wine_ids, -places[2], -places[1], -places[0], -points, -scores))[:top]
+    return [
+        {
+            "wineId": int(wine_ids[i]),
+            "rank": rank,
+            "score": round(float(scores[i]), 4),
+            "totalPoints": int(points[i]),
+            "ballots": int(tally.exposure[wine_ids[i]]),
+        }
+        for rank, i in enumerate(order.tolist(), start=1)
+    ]
@@ -0,0 +1,84 @@
+import abc
+from typing import List
+from app.model.wine_tournament import Participant, Vote, check_wine_ids
+
+
+class _Record(abc.ABC):
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def to_wire(self) -> dict:
+        pass
+
+    def __eq__(self, other):
+        # Equal to a record or model with the same wire form
+        if not hasattr(other, "to_wire"):
+            return NotImplemented
+        return self.to_wire() == other.to_wire()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_wire()!r})"
+
+
+class ParticipantRecord(_Record):
+    """Compact stored form of a Participant.
+
+    Records are built from models (wine ids are checked again, as models may
+    come from `model_construct`) or trusted storage, and turned straight into
+    wire dicts, so read paths never construct or validate a Pydantic model per
+    row. Attribute names match the model's.
+    """
+    __slots__ = ("id", "name", "assigned_wines")
+
+    def __init__(self, id: str, name: str, assigned_wines: List[int]):
+        self.id = id
+        self.name = name
+        self.assigned_wines = assigned_wines
+
+    @classmethod
+    def from_model(cls, participant: Participant) -> "ParticipantRecord":
+        check_wine_ids(participant.assigned_wines)
+        return cls(participant.id, participant.name, list(participant.assigned_wines))
+
+    @classmethod
+    def from_wire(cls, data: dict) -> "ParticipantRecord":
+        return cls(data["id"], data["name"], list(data["assignedWines"]))
+
+    def to_model(self) -> Participant:
+        return Participant.model_construct(id=self.id, name=self.name, assigned_wines=list(self.assigned_wines))
+
+    def to_wire(self) -> dict:
+        # Same keys as Participant.dict(by_alias=True)
+        # The list is copied: callers may mutate the dict, and the record must not change with it
+        return {"id": self.id, "name": self.name, "assignedWines": list(self.assigned_wines)}
+
+
+class VoteRecord(_Record):
+    """Compact stored form of a Vote, see ParticipantRecord"""
+    __slots__ = ("participant_id", "first_place", "second_place", "third_place")
+
+    def __init__(self, participant_id: str, first_place: int, second_place: int, third_place: int):
+        self.participant_id = participant_id
+        self.first_place = first_place
+        self.second_place = second_place
+        self.third_place = third_place
+
+    @classmethod
+    def from_model(cls, vote: Vote) -> "VoteRecord":
+        check_wine_ids((vote.first_place, vote.second_place, vote.third_place))
+        return cls(vote.participant_id, vote.first_place, vote.second_place, vote.third_place)
+
+    @classmethod
+    def from_wire(cls, data: dict) -> "VoteRecord":
+        return cls(data["participantId"], data["firstPlace"], data["secondPlace"], data["thirdPlace"])
+
+    def to_model(self) -> Vote:
+        return Vote.model_construct(participant_id=self.participant_id, first_place=self.first_place,
+                                    second_place=self.second_place, third_place=self.third_place)
+
+    def to_wire(self) -> dict:
+        # Same keys as Vote.dict(by_alias=True)
+        return {"participantId": self.participant_id, "firstPlace": self.first_place,
+                "secondPlace": self.second_place, "thirdPlace": self.third_place}
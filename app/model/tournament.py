@@ -0,0 +1,40 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+import abc
+from app.model.wine_tournament import MAX_WINES
+
+
+class Tournament(BaseModel):
+    id: str = Field(alias="id")
+    name: str = Field(alias="name")
+    total_wines: int = Field(alias="totalWines", ge=1, le=MAX_WINES)
+    max_participants_per_wine: int = Field(alias="maxParticipantsPerWine", default=5, ge=1)
+    created_at: float = Field(alias="createdAt")
+
+    class Config:
+        populate_by_name = True
+        allow_population_by_alias = True
+
+
+class CreateTournamentRequest(BaseModel):
+    name: str = Field(alias="name")
+    total_wines: int = Field(alias="totalWines", ge=1, le=MAX_WINES)
+    max_participants_per_wine: int = Field(alias="maxParticipantsPerWine", default=5, ge=1)
+
+    class Config:
+        populate_by_name = True
+        allow_population_by_alias = True
+
+
+class TournamentCatalogRepository(abc.ABC):
+    @abc.abstractmethod
+    def save_tournament(self, tournament: Tournament) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get_tournament(self, tournament_id: str) -> Optional[Tournament]:
+        pass
+
+    @abc.abstractmethod
+    def get_all_tournaments(self) -> List[Tournament]:
+        pass
@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from app.model.leaderboard import PLACE_POINTS
+
+ANALYTICS_ORDERS = ("points", "points_per_taster")
+
+
+class VoteColumns:
+    """Ballots as columnar integer arrays, one row per participant.
+
+    Row `i` holds the ballot of `participant_ids[i]` (the participant index).
+    The first, second and third place columns are contiguous intp arrays, the
+    type `bincount` takes without a cast, so scoring is three `bincount` calls
+    however many ballots there are. A new ballot from the same participant
+    overwrites its row.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.participant_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._places = np.zeros((3, capacity), dtype=np.intp)
+
+    @classmethod
+    def from_votes(cls, votes: Iterable) -> "VoteColumns":
+        columns = cls()
+        for vote in votes:
+            columns.put(vote)
+        return columns
+
+    def put(self, vote):
+        row = self._rows.get(vote.participant_id)
+        if row is None:
+            row = self._rows[vote.participant_id] = len(self.participant_ids)
+            self.participant_ids.append(vote.participant_id)
+            if row == self._places.shape[1]:
+                # Amortized doubling
+                self._places = np.concatenate([self._places, np.zeros_like(self._places)], axis=1)
+        self._places[:, row] = (vote.first_place, vote.second_place, vote.third_place)
+
+    def remove(self, participant_id: str):
+        row = self._rows.pop(participant_id, None)
+        if row is None:
+            return
+        # The last row moves into the gap, so rows stay contiguous
+        last_id = self.participant_ids.pop()
+        if last_id != participant_id:
+            self.participant_ids[row] = last_id
+            self._rows[last_id] = row
+            self._places[:, row] = self._places[:, len(self.participant_ids)]
+
+    def places(self) -> np.ndarray:
+        """(3, ballots) view of the first, second and third place columns"""
+        return self._places[:, :len(self.participant_ids)]
+
+    def place_counts(self, size: int = 0) -> np.ndarray:
+        """(3, wines) array: how many ballots put each wine id first, second and third"""
+        places = self.places()
+        size = max(size, int(places.max()) + 1 if places.size else 0)
+        return np.stack([np.bincount(column, minlength=size) for column in places])
+
+    def __len__(self):
+        return len(self.participant_ids)
+
+
+def wine_analytics_rows(place_counts: np.ndarray, assigned: np.ndarray, top: Optional[int] = None,
+                        order_by: str = "points") -> List[dict]:
+    """Scores per wine id from (3, wines) place counts and the tasters assigned to each wine.
+
+    Assignments are uneven near capacity, so besides the raw 3/2/1 points every
+    wine gets its points per assigned taster and the share of its tasters who
+    placed it on the podium. Wines nobody tasted or voted for are left out.
+    """
+    size = max(place_counts.shape[1], assigned.shape[0])
+    counts = np.zeros((3, size), dtype=np.int64)
+    counts[:, :place_counts.shape[1]] = place_counts
+    tasters = np.zeros(size, dtype=np.int64)
+    tasters[:assigned.shape[0]] = assigned
+
+    points = np.asarray(PLACE_POINTS, dtype=np.int64) @ counts
+    votes = counts.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        points_per_taster = np.where(tasters > 0, points / tasters, 0.0)
+        podium_rate = np.where(tasters > 0, votes / tasters, 0.0)
+
+    wine_ids = np.flatnonzero((votes > 0) | (tasters > 0))
+    wine_ids = wine_ids[wine_ids > 0]
+    if order_by == "points_per_taster":
+        keys = (wine_ids, -counts[0][wine_ids], -points[wine_ids], -points_per_taster[wine_ids])
+    else:
+        # Same order as the leaderboard: points, then first, second and third places
+        keys = (wine_ids, -counts[2][wine_ids], -counts[1][wine_ids], -counts[0][wine_ids], -points[wine_ids])
+    ranked = wine_ids[np.lexsort(keys)][:top]
+    return [
+        {
+            "wineId": int(wine_id),
+            "rank": rank,
+            "totalPoints": int(points[wine_id]),
+            "firstPlaces": int(counts[0][wine_id]),
+            "secondPlaces": int(counts[1][wine_id]),
+            "thirdPlaces": int(counts[2][wine_id]),
+            "votes": int(votes[wine_id]),
+            "assignedTasters": int(tasters[wine_id]),
+            "pointsPerTaster": round(float(points_per_taster[wine_id]), 4),
+            "podiumRate": round(float(podium_rate[wine_id]), 4),
+        }
+        for rank, wine_id in enumerate(ranked.tolist(), start=1)
+    ]
+
+
+def counts_to_array(counts: Dict[int, int]) -> np.ndarray:
+    array = np.zeros(max(counts, default=0) + 1, dtype=np.int64)
+    for wine_id, count in counts.items():
+        array[wine_id] = count
+    return array
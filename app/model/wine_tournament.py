@@ -1,32 +1,59 @@
-from typing import List, Optional, Dict
+from typing import Annotated, List, Optional, Dict, Iterable, Iterator, Tuple
 from pydantic import BaseModel, Field
 import abc
+import uuid
+import numpy as np
+from app.model.leaderboard import Leaderboard
+from app.model.vote_columns import VoteColumns
+from app.model.ballot_tally import BallotTally
+
+# Largest tournament, and so the largest wine id, the API accepts
+MAX_WINES = 1000
+# Wines are numbered 1..total_wines; scoring indexes arrays by wine id
+WineId = Annotated[int, Field(ge=1, le=MAX_WINES)]
+
+
+def check_wine_ids(wine_ids: Iterable[int]):
+    """Raise ValueError unless every id is a WineId; for writes that bypass model validation"""
+    invalid = [wine_id for wine_id in wine_ids if not 1 <= wine_id <= MAX_WINES]
+    if invalid:
+        raise ValueError(f"Wine ids must be between 1 and {MAX_WINES}: {invalid}")
 
 
 class Participant(BaseModel):
     id: str = Field(alias="id")
     name: str = Field(alias="name")
-    assigned_wines: List[int] = Field(alias="assignedWines")
+    assigned_wines: List[WineId] = Field(alias="assignedWines")
 
     class Config:
         populate_by_name = True
         allow_population_by_alias = True
 
+    def to_wire(self) -> dict:
+        return self.dict(by_alias=True)
+
 
 class Vote(BaseModel):
     participant_id: str = Field(alias="participantId")
-    first_place: int = Field(alias="firstPlace")  # 3 points
-    second_place: int = Field(alias="secondPlace")  # 2 points
-    third_place: int = Field(alias="thirdPlace")  # 1 point
+    first_place: WineId = Field(alias="firstPlace")  # 3 points
+    second_place: WineId = Field(alias="secondPlace")  # 2 points
+    third_place: WineId = Field(alias="thirdPlace")  # 1 point
 
     class Config:
         populate_by_name = True
         allow_population_by_alias = True
 
+    def to_wire(self) -> dict:
+        return self.dict(by_alias=True)
+
 
 class WineScore(BaseModel):
     wine_id: int = Field(alias="wineId")
     total_points: int = Field(alias="totalPoints")
+    rank: Optional[int] = Field(alias="rank", default=None)
+    first_places: int = Field(alias="firstPlaces", default=0)
+    second_places: int = Field(alias="secondPlaces", default=0)
+    third_places: int = Field(alias="thirdPlaces", default=0)
 
     class Config:
         populate_by_name = True
@@ -35,18 +62,90 @@ class WineScore(BaseModel):
 
 class CreateParticipantRequest(BaseModel):
     name: str
-    assigned_wines: Optional[List[int]] = None
+    assigned_wines: Optional[List[WineId]] = None
 
 
 class CreateParticipantResponse(BaseModel):
     participant: Participant
     suggested_wines: List[int] = Field(alias="suggestedWines")
+    # Unix timestamp until which the suggested wines are held for this participant
+    hold_expires_at: Optional[float] = Field(alias="holdExpiresAt", default=None)
+
+    class Config:
+        populate_by_name = True
+        allow_population_by_alias = True
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    assigned_wines: Optional[List[int]] = Field(alias="assignedWines", default=None)
+    error: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+        allow_population_by_alias = True
+
+
+class BatchResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+class WineAnalytics(BaseModel):
+    wine_id: int = Field(alias="wineId")
+    rank: int = Field(alias="rank")
+    total_points: int = Field(alias="totalPoints")
+    first_places: int = Field(alias="firstPlaces")
+    second_places: int = Field(alias="secondPlaces")
+    third_places: int = Field(alias="thirdPlaces")
+    # Ballots that placed the wine first, second or third
+    votes: int = Field(alias="votes")
+    assigned_tasters: int = Field(alias="assignedTasters")
+    points_per_taster: float = Field(alias="pointsPerTaster")
+    podium_rate: float = Field(alias="podiumRate")
+
+    class Config:
+        populate_by_name = True
+        allow_population_by_alias = True
+
+
+class RankedWine(BaseModel):
+    wine_id: int = Field(alias="wineId")
+    rank: int = Field(alias="rank")
+    # Method-specific: points, points per ballot, Bayesian average or Schulze wins
+    score: float = Field(alias="score")
+    total_points: int = Field(alias="totalPoints")
+    # Ballots whose taster was assigned the wine
+    ballots: int = Field(alias="ballots")
 
     class Config:
         populate_by_name = True
         allow_population_by_alias = True
 
 
+class ParticipantPage(BaseModel):
+    items: List[Participant]
+    # Pass back as `cursor` to get the next page; None on the last page
+    next_cursor: Optional[str] = Field(alias="nextCursor", default=None)
+
+    class Config:
+        populate_by_name = True
+        allow_population_by_alias = True
+
+
+class TournamentChange(BaseModel):
+    """A committed write, as seen by other processes sharing the same store"""
+    seq: int
+    kind: str  # "participant" or "vote"
+    record: dict
+    # Vote replaced by this one, if any
+    previous: Optional[dict] = None
+
+
 class TournamentRepository(abc.ABC):
     @abc.abstractmethod
     def save_participant(self, participant: Participant) -> None:
@@ -70,4 +169,188 @@ class TournamentRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_wine_counts(self) -> Dict[int, int]:
-        pass
\ No newline at end of file
+        pass
+
+    def save_participants(self, participants: List[Participant]) -> None:
+        for participant in participants:
+            self.save_participant(participant)
+
+    def save_votes(self, votes: List[Vote]) -> None:
+        """Save several votes; later votes from the same participant replace earlier ones"""
+        for vote in votes:
+            self.save_vote(vote)
+
+    def get_version(self) -> Optional[int]:
+        """Monotonic counter bumped by every write, or None if the backend cannot tell"""
+        return None
+
+    def get_cache_version(self) -> Optional[Tuple[str, int]]:
+        """`get_version()` tagged with this repository instance.
+
+        Counters start over when a tournament is reopened, so caches that outlive
+        one repository instance compare both parts.
+        """
+        version = self.get_version()
+        if version is None:
+            return None
+        epoch = self.__dict__.get("_cache_epoch")
+        if epoch is None:
+            epoch = self._cache_epoch = uuid.uuid4().hex
+        return epoch, version
+
+    def get_changes_since(self, seq: Optional[int]) -> Tuple[Optional[int], List[TournamentChange]]:
+        """Writes committed by other processes after change `seq`, and the new cursor.
+
+        Backends that are not shared between processes have no such writes.
+        """
+        return seq, []
+
+    def iter_participants(self, after: int = 0, has_voted: Optional[bool] = None,
+                          name_prefix: Optional[str] = None) -> Iterator[Tuple[int, Participant, bool]]:
+        """(position, participant, has_voted) in registration order, starting after position `after`.
+
+        Participants are only ever appended, so a position is a stable cursor.
+        Backends may yield lightweight records instead of models: they have the
+        same attributes and `to_wire()`.
+        """
+        voted = {vote.participant_id for vote in self.get_all_votes()}
+        for position, participant in enumerate(self.get_all_participants(), start=1):
+            if position > after and participant_matches(participant, participant.id in voted, has_voted, name_prefix):
+                yield position, participant, participant.id in voted
+
+    def get_participant_rows(self) -> List[dict]:
+        """All participants in wire form (camelCase keys), for responses that skip model construction"""
+        return [p.to_wire() for p in self.get_all_participants()]
+
+    def count_participants(self) -> int:
+        return len(self.get_all_participants())
+
+    def count_votes(self) -> int:
+        return len(self.get_all_votes())
+
+    def get_vote(self, participant_id: str) -> Optional[Vote]:
+        for vote in self.get_all_votes():
+            if vote.participant_id == participant_id:
+                return vote
+        return None
+
+    def get_wine_occupancy(self, wine_ids: Iterable[int], exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        """Current participant count for each of `wine_ids`, optionally ignoring one participant's assignment"""
+        wine_ids = list(wine_ids)
+        wine_counts = self.get_wine_counts()
+        occupancy = {wine_id: wine_counts.get(wine_id, 0) for wine_id in wine_ids}
+        if exclude_participant_id:
+            excluded = self.get_participant(exclude_participant_id)
+            if excluded is not None:
+                for wine_id in excluded.assigned_wines:
+                    if wine_id in occupancy:
+                        occupancy[wine_id] -= 1
+        return occupancy
+
+    def save_participant_within_capacity(self, participant: Participant, max_participants_per_wine: int,
+                                         reserved: Optional[Dict[int, int]] = None) -> bool:
+        """Save the participant only if none of its wines would exceed capacity.
+
+        `reserved` adds slots held elsewhere (e.g. pending reservations) to the stored
+        occupancy. Backends that can check and write in one transaction override this.
+        """
+        reserved = reserved or {}
+        occupancy = self.get_wine_occupancy(participant.assigned_wines, exclude_participant_id=participant.id)
+        if any(count + reserved.get(wine_id, 0) >= max_participants_per_wine for wine_id, count in occupancy.items()):
+            return False
+        self.save_participant(participant)
+        return True
+
+    def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
+        leaderboard = Leaderboard()
+        for vote in self.get_all_votes():
+            leaderboard.add_vote(vote)
+        return leaderboard_to_scores(leaderboard, top)
+
+    def get_leaderboard_rows(self, top: Optional[int] = None) -> List[dict]:
+        """The leaderboard in wire form, see get_participant_rows"""
+        return [score.dict(by_alias=True) for score in self.get_leaderboard(top)]
+
+    def get_leaderboard_rows_for(self, wine_ids: Iterable[int]) -> List[dict]:
+        """Leaderboard rows of just these wines, for the ones that have points"""
+        wine_ids = set(wine_ids)
+        return [row for row in self.get_leaderboard_rows() if row["wineId"] in wine_ids]
+
+    # Awaitable counterparts for callers on the event loop. These defaults run the
+    # blocking method inline; backends that touch the disk override them so the
+    # I/O happens on another thread.
+
+    async def save_vote_async(self, vote: Vote) -> None:
+        self.save_vote(vote)
+
+    async def save_votes_async(self, votes: List[Vote]) -> None:
+        self.save_votes(votes)
+
+    async def save_participants_async(self, participants: List[Participant]) -> None:
+        self.save_participants(participants)
+
+    async def save_participant_within_capacity_async(self, participant: Participant, max_participants_per_wine: int,
+                                                     reserved: Optional[Dict[int, int]] = None) -> bool:
+        return self.save_participant_within_capacity(participant, max_participants_per_wine, reserved)
+
+    async def get_all_participants_async(self) -> List[Participant]:
+        return self.get_all_participants()
+
+    async def get_all_votes_async(self) -> List[Vote]:
+        return self.get_all_votes()
+
+    async def get_ballot_tally_async(self) -> BallotTally:
+        return self.get_ballot_tally()
+
+    def get_place_counts(self) -> np.ndarray:
+        """(3, wines) array of how many ballots put each wine id first, second and third"""
+        return VoteColumns.from_votes(self.get_all_votes()).place_counts()
+
+    def get_ballot_tally(self) -> BallotTally:
+        """Place counts, exposure and pairwise preferences of the current ballots.
+
+        Callers must not modify the result. Backends that keep the tally up to
+        date as ballots change override this; the default rebuilds it.
+        """
+        assigned = {p.id: p.assigned_wines for p in self.get_all_participants()}
+        return BallotTally.from_ballots(self.get_all_votes(), assigned)
+
+
+def leaderboard_to_scores(leaderboard: Leaderboard, top: Optional[int] = None) -> List[WineScore]:
+    return [
+        WineScore(
+            wine_id=wine_id,
+            total_points=points,
+            rank=rank,
+            first_places=firsts,
+            second_places=seconds,
+            third_places=thirds
+        )
+        for rank, (wine_id, points, firsts, seconds, thirds) in enumerate(leaderboard.top(top), start=1)
+    ]
+
+
+def leaderboard_to_rows(leaderboard: Leaderboard, top: Optional[int] = None) -> List[dict]:
+    # Same keys as WineScore.dict(by_alias=True)
+    return [
+        {"wineId": wine_id, "totalPoints": points, "rank": rank,
+         "firstPlaces": firsts, "secondPlaces": seconds, "thirdPlaces": thirds}
+        for rank, (wine_id, points, firsts, seconds, thirds) in enumerate(leaderboard.top(top), start=1)
+    ]
+
+
+def ranked_to_rows(ranked: Iterable[Tuple[int, int, int, int, int, int]]) -> List[dict]:
+    # Same keys as leaderboard_to_rows, from Leaderboard.ranked
+    return [
+        {"wineId": wine_id, "totalPoints": points, "rank": rank,
+         "firstPlaces": firsts, "secondPlaces": seconds, "thirdPlaces": thirds}
+        for rank, wine_id, points, firsts, seconds, thirds in ranked
+    ]
+
+
+def participant_matches(participant: Participant, voted: bool, has_voted: Optional[bool] = None,
+                        name_prefix: Optional[str] = None) -> bool:
+    if has_voted is not None and voted != has_voted:
+        return False
+    # Case-insensitive, like SQLite's LIKE
+    return name_prefix is None or participant.name.casefold().startswith(name_prefix.casefold())
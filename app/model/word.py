@@ -1,5 +1,5 @@
 import abc
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -23,3 +23,20 @@ class WordRepository(abc.ABC):
     @abc.abstractmethod
     def get_word(self, word_id: str) -> Optional[Word]:
         pass
+
+    # Batch counterparts. These defaults go one word at a time; backends override
+    # them to pay their per-call overhead once per batch.
+
+    def save_many(self, words: List[Word]) -> List[Word]:
+        for word in words:
+            self.save(word)
+        return words
+
+    def get_words(self, word_ids: Iterable[str]) -> Dict[str, Word]:
+        """The stored words among `word_ids`, by id; unknown ids are left out"""
+        found = {}
+        for word_id in word_ids:
+            word = self.get_word(word_id)
+            if word is not None:
+                found[word_id] = word
+        return found
@@ -0,0 +1,124 @@
+import asyncio
+import queue
+import threading
+import time
+from itertools import groupby
+from typing import Any, Callable, List, Optional, Tuple
+from loguru import logger
+
+# How long the writer waits for more writes before committing a group
+DEFAULT_WINDOW_SECONDS = 0.002
+DEFAULT_MAX_GROUP = 1000
+
+
+class GroupCommitWriter:
+    """Dedicated writer thread committing queued writes in groups.
+
+    `commit(item)` hands an item to the thread and waits without blocking the
+    event loop. The thread takes whatever is queued, waits up to
+    `window_seconds` for more, and calls `flush(items)` once for the whole
+    group (one write and one fsync), which returns one result per item. If a
+    group fails, its items are retried one at a time so a bad write only fails
+    its own caller.
+
+    `on_committed(items, results)` runs on the caller's event loop after each
+    group, in commit order and before any caller resumes, so backends can make
+    durable writes visible without racing the loop.
+    """
+
+    def __init__(self, flush: Callable[[List[Any]], List[Any]],
+                 on_committed: Optional[Callable[[List[Any], List[Any]], None]] = None,
+                 window_seconds: float = DEFAULT_WINDOW_SECONDS, max_group: int = DEFAULT_MAX_GROUP,
+                 name: str = "group-commit"):
+        self.flush = flush
+        self.on_committed = on_committed
+        self.window_seconds = window_seconds
+        self.max_group = max_group
+        self.name = name
+        self._queue: "queue.Queue[Optional[Tuple[Any, asyncio.Future, asyncio.AbstractEventLoop]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.groups = 0
+        self.items = 0
+
+    async def commit(self, item) -> Any:
+        """Queue `item` and return its flush result once its group is durable"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._ensure_started()
+        self._queue.put((item, future, loop))
+        return await future
+
+    def close(self):
+        """Commit what is queued and stop the thread"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            group = [entry]
+            deadline = time.monotonic() + self.window_seconds
+            stopping = False
+            while len(group) < self.max_group:
+                try:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                group.append(entry)
+            self._commit(group)
+            if stopping:
+                return
+
+    def _commit(self, group: List[tuple]):
+        items = [item for item, _, _ in group]
+        try:
+            outcomes = [(result, None) for result in self.flush(items)]
+        except Exception as e:
+            if len(items) == 1:
+                outcomes = [(None, e)]
+            else:
+                outcomes = [self._flush_one(item) for item in items]
+        self.groups += 1
+        self.items += len(items)
+        # Resolve on each caller's loop, keeping commit order
+        for loop, entries in groupby(zip(group, outcomes), key=lambda entry: entry[0][2]):
+            entries = list(entries)
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._resolve, entries)
+
+    def _flush_one(self, item) -> Tuple[Any, Optional[Exception]]:
+        try:
+            return self.flush([item])[0], None
+        except Exception as e:
+            return None, e
+
+    def _resolve(self, entries: List[tuple]):
+        committed = [(item, result) for (item, _, _), (result, error) in entries if error is None]
+        if committed and self.on_committed is not None:
+            try:
+                self.on_committed([item for item, _ in committed], [result for _, result in committed])
+            except Exception as e:
+                # The writes are durable either way; callers still get their results
+                logger.error(f"{self.name}: applying committed writes failed: {e}")
+        for (_, future, _), (result, error) in entries:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.model.wine_tournament import Participant, Vote
+from app.repository.group_commit import GroupCommitWriter
+from app.repository.tournament_json import TournamentJsonRepository
+from app.repository.tournament_log import TournamentLogRepository
+from app.repository.tournament_sqlite import TournamentSqliteRepository
+
+BACKENDS = {
+    "json": lambda path: TournamentJsonRepository(str(path / "participants.json"), str(path / "votes.json"),
+                                                  group_commit_seconds=0.01),
+    # Compacts several times during the test
+    "log": lambda path: TournamentLogRepository(data_dir=str(path), compact_every=20, group_commit_seconds=0.01),
+    "sqlite": lambda path: TournamentSqliteRepository(db_file=str(path / "tournament.db"), group_commit_seconds=0.01),
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+async def test_concurrent_async_writes_are_grouped_and_durable(backend, tmp_path):
+    repo = BACKENDS[backend](tmp_path)
+    participants = [Participant(id=f"p{i}", name=f"Taster {i}", assigned_wines=[1, 2, 3, 4, 5]) for i in range(10)]
+    await repo.save_participants_async(participants)
+    ballots = [Vote(participant_id=f"p{i % 10}", first_place=1 + r % 5, second_place=1 + (r + 1) % 5,
+                    third_place=1 + (r + 2) % 5) for r in range(5) for i in range(10)]
+
+    await asyncio.gather(*(repo.save_vote_async(vote) for vote in ballots))
+
+    # Latest wins per participant, as with save_vote
+    expected = {vote.participant_id: vote for vote in ballots}
+    assert {vote.participant_id: vote for vote in repo.get_all_votes()} == expected
+    assert repo._writer.groups < repo._writer.items == 51
+    assert not await repo.save_participant_within_capacity_async(
+        Participant(id="late", name="Late", assigned_wines=[1, 6, 7]), max_participants_per_wine=10)
+    repo.close()
+
+    reopened = BACKENDS[backend](tmp_path)
+    assert {vote.participant_id: vote for vote in reopened.get_all_votes()} == expected
+    assert len(reopened.get_all_participants()) == 10
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_a_failing_write_only_fails_its_caller():
+    committed = []
+
+    def flush(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    writer = GroupCommitWriter(flush, on_committed=lambda items, _: committed.extend(items), window_seconds=0.01)
+    results = await asyncio.gather(writer.commit("a"), writer.commit("bad"), writer.commit("b"),
+                                   return_exceptions=True)
+    writer.close()
+
+    assert results[0] == "A" and results[2] == "B"
+    assert isinstance(results[1], ValueError)
+    assert committed == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_failed_json_write_is_rolled_back(tmp_path, monkeypatch):
+    repo = BACKENDS["json"](tmp_path)
+    repo.save_participants([Participant(id=f"p{i}", name=f"Taster {i}", assigned_wines=[1, 2, 3]) for i in range(2)])
+    repo.save_vote(Vote(participant_id="p0", first_place=1, second_place=2, third_place=3))
+    before = (repo.get_participant_rows(), repo.get_all_votes(), repo.get_leaderboard_rows(), repo.get_wine_counts())
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(repo, "_write_file", fail)
+    with pytest.raises(OSError):
+        repo.save_participant(Participant(id="p2", name="Cleo", assigned_wines=[1, 2, 4]))
+    with pytest.raises(OSError):
+        repo.save_vote(Vote(participant_id="p0", first_place=3, second_place=2, third_place=1))
+    results = await asyncio.gather(
+        repo.save_vote_async(Vote(participant_id="p1", first_place=2, second_place=1, third_place=3)),
+        repo.save_participants_async([Participant(id="p1", name="Taster 1", assigned_wines=[4, 5, 6])]),
+        return_exceptions=True)
+    assert all(isinstance(result, OSError) for result in results)
+
+    assert (repo.get_participant_rows(), repo.get_all_votes(), repo.get_leaderboard_rows(),
+            repo.get_wine_counts()) == before
+    repo.close()
@@ -0,0 +1,139 @@
+import json
+import threading
+from app.model.wine_tournament import Participant, Vote, TournamentRepository
+from app.repository import tournament_sqlite
+from app.repository.tournament_sqlite import TournamentSqliteRepository
+
+
+def test_upserts_and_aggregations(tmp_path):
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+    repo.save_participant(Participant(id="p2", name="Bob", assigned_wines=[3, 2, 4]))
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[5, 2, 3]))
+    repo.save_vote(Vote(participant_id="p1", first_place=5, second_place=2, third_place=3))
+    repo.save_vote(Vote(participant_id="p2", first_place=3, second_place=2, third_place=4))
+    repo.save_vote(Vote(participant_id="p1", first_place=2, second_place=5, third_place=3))
+
+    assert [p.id for p in repo.get_all_participants()] == ["p1", "p2"]
+    assert repo.get_participant("p2").assigned_wines == [3, 2, 4]
+    assert repo.get_wine_counts() == {2: 2, 3: 2, 4: 1, 5: 1}
+    assert repo.get_wine_occupancy([2, 5, 9], exclude_participant_id="p1") == {2: 1, 5: 0, 9: 0}
+    assert repo.get_vote("p1").first_place == 2
+    assert repo.get_leaderboard() == TournamentRepository.get_leaderboard(repo)
+    assert [s.wine_id for s in repo.get_leaderboard(top=2)] == [2, 3]
+    repo.close()
+
+
+def test_import_json_only_adds_missing_rows(tmp_path):
+    participants_file, votes_file = tmp_path / "participants.json", tmp_path / "votes.json"
+    participants = [{"id": "p1", "name": "Ana", "assignedWines": [1, 2, 3]}]
+    votes = [{"participantId": "p1", "firstPlace": 1, "secondPlace": 2, "thirdPlace": 3}]
+    participants_file.write_text(json.dumps(participants))
+    votes_file.write_text(json.dumps(votes))
+
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    assert repo.import_json(str(participants_file), str(votes_file)) == (1, 1)
+    # Switched over: a newer ballot lands in SQLite, and one more participant only made it to JSON
+    repo.save_vote(Vote(participant_id="p1", first_place=3, second_place=2, third_place=1))
+    participants_file.write_text(json.dumps(participants + [{"id": "p2", "name": "Bob", "assignedWines": [2, 3, 4]}]))
+
+    assert repo.import_json(str(participants_file), str(votes_file)) == (1, 0)
+    assert [p.id for p in repo.get_all_participants()] == ["p1", "p2"]
+    assert repo.get_vote("p1").first_place == 3
+    repo.close()
+
+
+def test_change_feed_returns_other_workers_writes(tmp_path):
+    worker_a = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"), change_feed=True)
+    worker_b = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"), change_feed=True)
+    cursor_a, _ = worker_a.get_changes_since(None)
+    cursor_b, _ = worker_b.get_changes_since(None)
+
+    worker_a.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+    worker_a.save_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+    worker_b.save_votes([Vote(participant_id="p1", first_place=3, second_place=2, third_place=1)])
+
+    cursor_b, changes = worker_b.get_changes_since(cursor_b)
+    assert [c.kind for c in changes] == ["participant", "vote"]
+    assert changes[0].record["assignedWines"] == [1, 2, 3]
+    cursor_a, changes = worker_a.get_changes_since(cursor_a)
+    assert [c.kind for c in changes] == ["vote"]
+    assert changes[0].record["firstPlace"] == 3 and changes[0].previous["firstPlace"] == 1
+    assert worker_a.get_changes_since(cursor_a) == (cursor_a, [])
+    worker_a.close()
+    worker_b.close()
+
+
+def test_iter_participants_pages_with_filters(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.repository.tournament_sqlite.READ_CHUNK_SIZE", 2)
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    for i, name in enumerate(["Ana", "anton", "Bob", "Ana_b", "Carl"]):
+        repo.save_participant(Participant(id=f"p{i}", name=name, assigned_wines=[i + 1, i + 2, i + 3]))
+    repo.save_vote(Vote(participant_id="p1", first_place=2, second_place=3, third_place=4))
+
+    for filters in ({}, {"has_voted": False}, {"has_voted": True}, {"name_prefix": "an"}, {"name_prefix": "ana_"}):
+        assert list(repo.iter_participants(**filters)) == list(TournamentRepository.iter_participants(repo, **filters))
+    assert [p.name for _, p, _ in repo.iter_participants(after=2, has_voted=False)] == ["Bob", "Ana_b", "Carl"]
+    repo.close()
+
+
+def test_ballot_tally_is_copied_on_write_not_on_read(tmp_path):
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+    repo.save_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+    tally = repo.get_ballot_tally()
+    assert repo.get_ballot_tally() is tally
+    places = tally.places.tolist()
+
+    # The next write copies it before changing it, so readers never see it move
+    repo.save_vote(Vote(participant_id="p1", first_place=3, second_place=2, third_place=1))
+    assert tally.places.tolist() == places
+    assert repo.get_ballot_tally().places[0, 3] == 1
+    repo.close()
+
+
+def test_ballot_tally_rebuild_does_not_block_writes(tmp_path, monkeypatch):
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+    build = tournament_sqlite.tally_from_rows
+
+    def build_during_a_write(votes, participant_wines):
+        # The write lock is free while the tally is rebuilt, so this commits right away
+        repo.save_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+        return build(votes, participant_wines)
+
+    monkeypatch.setattr(tournament_sqlite, "tally_from_rows", build_during_a_write)
+    assert repo.get_ballot_tally().places.sum() == 0
+    monkeypatch.setattr(tournament_sqlite, "tally_from_rows", build)
+    # The snapshot missed that vote, so it was not kept for the writer to update
+    assert repo.get_ballot_tally().places[0, 1] == 1
+    repo.close()
+
+
+def test_reads_do_not_wait_for_a_commit_in_progress(tmp_path):
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+    version = repo.get_version()
+    reads = []
+
+    def read():
+        reads.append((repo.get_version(), repo.get_participant("p1").assigned_wines, repo.count_votes()))
+
+    # Held by the writer thread from BEGIN until after COMMIT's fsync
+    with repo._write_lock:
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=5)
+    assert reads == [(version, [1, 2, 3], 0)]
+
+    repo.save_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+    assert repo.get_version() != version
+    repo.close()
+
+
+def test_commits_are_fsynced(tmp_path):
+    repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    # 2 = FULL: under WAL, NORMAL skips the fsync on COMMIT; reads need no fsync
+    assert repo._write_conn.execute("PRAGMA synchronous").fetchone() == (2,)
+    assert repo._conn.execute("PRAGMA synchronous").fetchone() == (1,)
+    repo.close()
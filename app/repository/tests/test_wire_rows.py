@@ -0,0 +1,90 @@
+import pytest
+from app.model.wine_tournament import Participant, Vote, TournamentRepository
+from app.repository.tournament_json import TournamentJsonRepository
+from app.repository.tournament_log import TournamentLogRepository
+from app.repository.tournament_sqlite import TournamentSqliteRepository
+
+
+@pytest.fixture(params=["json", "log", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "json":
+        repo = TournamentJsonRepository(str(tmp_path / "participants.json"), str(tmp_path / "votes.json"))
+    elif request.param == "log":
+        repo = TournamentLogRepository(data_dir=str(tmp_path))
+    else:
+        repo = TournamentSqliteRepository(db_file=str(tmp_path / "tournament.db"))
+    yield repo
+    if hasattr(repo, "close"):
+        repo.close()
+
+
+def test_rows_match_the_models_wire_form(repo):
+    repo.save_participants([Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]),
+                            Participant(id="p2", name="Bob", assigned_wines=[2, 3, 4])])
+    repo.save_votes([Vote(participant_id="p1", first_place=1, second_place=2, third_place=3),
+                     Vote(participant_id="p2", first_place=4, second_place=3, third_place=2)])
+
+    assert repo.get_participant_rows() == [p.dict(by_alias=True) for p in repo.get_all_participants()]
+    assert repo.get_participant_rows()[0] == {"id": "p1", "name": "Ana", "assignedWines": [1, 2, 3]}
+    assert repo.get_leaderboard_rows() == [s.dict(by_alias=True) for s in repo.get_leaderboard()]
+    assert repo.get_leaderboard_rows(top=1) == TournamentRepository.get_leaderboard_rows(repo, top=1)
+    assert [p.to_wire() for _, p, _ in repo.iter_participants()] == repo.get_participant_rows()
+    assert repo.get_vote("p2") == Vote(participant_id="p2", first_place=4, second_place=3, third_place=2)
+
+
+def test_rows_do_not_share_lists_with_the_stored_state(repo):
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+
+    repo.get_participant_rows()[0]["assignedWines"].append(4)
+    assert repo.get_participant("p1").assigned_wines == [1, 2, 3]
+    assert repo.get_wine_occupancy([1, 4]) == {1: 1, 4: 0}
+
+
+def test_place_counts_agree_with_the_leaderboard(repo):
+    repo.save_participants([Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]),
+                            Participant(id="p2", name="Bob", assigned_wines=[2, 3, 4])])
+    repo.save_votes([Vote(participant_id="p1", first_place=1, second_place=2, third_place=3),
+                     Vote(participant_id="p2", first_place=4, second_place=3, third_place=2)])
+    # A new ballot replaces the participant's previous one
+    repo.save_vote(Vote(participant_id="p1", first_place=2, second_place=1, third_place=3))
+
+    counts = repo.get_place_counts()
+    assert counts.tolist() == TournamentRepository.get_place_counts(repo).tolist()
+    for score in repo.get_leaderboard():
+        assert counts[:, score.wine_id].tolist() == [score.first_places, score.second_places, score.third_places]
+
+
+def test_ballot_tally_is_kept_up_to_date(repo):
+    repo.save_participants([Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3, 4]),
+                            Participant(id="p2", name="Bob", assigned_wines=[2, 3, 4, 5])])
+    repo.get_ballot_tally()
+    repo.save_votes([Vote(participant_id="p1", first_place=1, second_place=2, third_place=3),
+                     Vote(participant_id="p2", first_place=5, second_place=4, third_place=3),
+                     Vote(participant_id="p2", first_place=4, second_place=5, third_place=2)])
+    # Reassigning a taster who already voted changes which wines the ballot left unranked
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3, 6]))
+
+    tally, rebuilt = repo.get_ballot_tally(), TournamentRepository.get_ballot_tally(repo)
+    assert tally.ballots == rebuilt.ballots == 2
+    size = 7
+    assert tally.places[:, :size].tolist() == rebuilt.places[:, :size].tolist()
+    assert tally.exposure[:size].tolist() == rebuilt.exposure[:size].tolist() == [0, 1, 2, 2, 1, 1, 1]
+    assert tally.wins[:size, :size].tolist() == rebuilt.wins[:size, :size].tolist()
+    assert tally.wins[1, 6] == 1 and tally.wins[1, 4] == 0
+
+
+def test_out_of_range_wine_ids_are_rejected_before_anything_changes(repo):
+    repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]))
+    repo.save_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+    wins = repo.get_ballot_tally().wins.copy()
+
+    # model_construct skips validation, as internal callers may
+    with pytest.raises(ValueError):
+        repo.save_participant(Participant.model_construct(id="p1", name="Ana", assigned_wines=[1, 2, 200000]))
+    with pytest.raises(ValueError):
+        repo.save_vote(Vote.model_construct(participant_id="p1", first_place=-1, second_place=2, third_place=3))
+
+    assert repo.get_participant("p1").assigned_wines == [1, 2, 3]
+    assert repo.get_vote("p1").first_place == 1
+    assert [s.total_points for s in repo.get_leaderboard()] == [3, 2, 1]
+    assert repo.get_ballot_tally().wins[:4, :4].tolist() == wins[:4, :4].tolist()
@@ -0,0 +1,46 @@
+from app.model.word import Word
+from app.repository.words_in_memory import WordsInMemoryRepository
+
+
+def word(i: int) -> Word:
+    return Word(id=f"w{i}", word=f"word {i}", transformed_word=f"{i} drow", from_ip="203.0.113.7")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_least_recently_used_and_idle_words_are_evicted():
+    clock = Clock()
+    repo = WordsInMemoryRepository(capacity=3, ttl_seconds=60, clock=clock)
+    repo.save_many([word(1), word(2), word(3)])
+    assert repo.get_word("w1") == word(1)
+
+    # w1 was just read, so w2 is the least recently used
+    repo.save(word(4))
+    assert len(repo) == 3
+    assert set(repo.get_words(["w1", "w2", "w3", "w4", "unknown"])) == {"w1", "w3", "w4"}
+
+    clock.now = 30
+    repo.get_word("w4")
+    clock.now = 70
+    assert list(repo.get_words(["w1", "w3", "w4"])) == ["w4"]
+
+
+def test_evicted_words_spill_to_disk_and_come_back(tmp_path):
+    spill_file = str(tmp_path / "words.db")
+    repo = WordsInMemoryRepository(capacity=10, spill_file=spill_file)
+    repo.save_many([word(i) for i in range(100)])
+    assert len(repo) == 10
+
+    assert repo.get_word("w5") == word(5)
+    assert repo.get_words([f"w{i}" for i in range(100)]) == {f"w{i}": word(i) for i in range(100)}
+    assert len(repo) == 10
+    repo.close()
+
+    # The spill file outlives the process
+    assert WordsInMemoryRepository(capacity=10, spill_file=spill_file).get_word("w42") == word(42)
@@ -0,0 +1,63 @@
+import fcntl
+import json
+import os
+from typing import Dict, List, Optional
+from app.model.tournament import Tournament, TournamentCatalogRepository
+
+
+class TournamentCatalogJsonRepository(TournamentCatalogRepository):
+    """Tournament definitions only; each tournament's participants and votes live in its own repository.
+
+    Several worker processes may share the file: reads pick up the file again when
+    it changed on disk, and writes are serialized with a lock file.
+    """
+
+    def __init__(self, catalog_file: str = "data/tournaments.json"):
+        self.catalog_file = catalog_file
+        os.makedirs(os.path.dirname(catalog_file) or ".", exist_ok=True)
+        self._tournaments: Dict[str, Tournament] = {}
+        self._loaded_mtime = None
+        self._refresh()
+
+    def save_tournament(self, tournament: Tournament) -> None:
+        with open(self.catalog_file + ".lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Start from what other workers may have written since we last looked
+            self._refresh()
+            self._tournaments[tournament.id] = tournament
+            tmp_file = f"{self.catalog_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump([t.dict(by_alias=True) for t in self._tournaments.values()], f, indent=2)
+            os.replace(tmp_file, self.catalog_file)
+            self._loaded_mtime = self._mtime()
+
+    def get_tournament(self, tournament_id: str) -> Optional[Tournament]:
+        tournament = self._tournaments.get(tournament_id)
+        if tournament is None:
+            # Possibly created by another worker
+            self._refresh()
+            tournament = self._tournaments.get(tournament_id)
+        return tournament
+
+    def get_all_tournaments(self) -> List[Tournament]:
+        self._refresh()
+        return list(self._tournaments.values())
+
+    def _refresh(self):
+        mtime = self._mtime()
+        if mtime != self._loaded_mtime:
+            self._tournaments = {t["id"]: Tournament(**t) for t in self._load_from_file()}
+            self._loaded_mtime = mtime
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.catalog_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_from_file(self) -> List[dict]:
+        try:
+            with open(self.catalog_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
@@ -1,18 +1,41 @@
 import json
 import os
-from typing import List, Optional, Dict
-from app.model.wine_tournament import TournamentRepository, Participant, Vote
+import threading
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
+import numpy as np
+from app.metrics import time_repository
+from app.model.ballot_tally import BallotTally
+from app.repository.group_commit import GroupCommitWriter, DEFAULT_WINDOW_SECONDS
+from app.model.wine_tournament import TournamentRepository, Participant, Vote, WineScore
+from app.model.records import ParticipantRecord, VoteRecord
+from app.repository.tournament_state import TournamentState
 
 
 class TournamentJsonRepository(TournamentRepository):
-    def __init__(self, participants_file: str = "data/participants.json", votes_file: str = "data/votes.json"):
+    """Participants and votes rewritten as two JSON files, state kept in memory.
+
+    The `*_async` writes update the state right away and leave the file rewrite
+    to a writer thread, which rewrites each file once for every write queued
+    within `group_commit_seconds`.
+    """
+
+    def __init__(self, participants_file: str = "data/participants.json", votes_file: str = "data/votes.json",
+                 group_commit_seconds: float = DEFAULT_WINDOW_SECONDS):
         self.participants_file = participants_file
         self.votes_file = votes_file
         self._ensure_data_directory()
         self._ensure_files_exist()
+        self.state = self._load_state()
+        # Held while the state changes and while the writer thread copies it out
+        self._state_lock = threading.Lock()
+        # Serializes file rewrites, so a newer copy of the state is never overwritten by an older one
+        self._file_lock = threading.Lock()
+        self._writer = GroupCommitWriter(self._flush_group, window_seconds=group_commit_seconds,
+                                         name="tournament-json-writer")
 
     def _ensure_data_directory(self):
-        os.makedirs("data", exist_ok=True)
+        for path in (self.participants_file, self.votes_file):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
 
     def _ensure_files_exist(self):
         if not os.path.exists(self.participants_file):
@@ -22,65 +45,208 @@ class TournamentJsonRepository(TournamentRepository):
             with open(self.votes_file, 'w') as f:
                 json.dump([], f)
 
+    def _load_state(self) -> TournamentState:
+        state = TournamentState()
+        # Our own files: loaded straight into records without re-validating every row
+        for p in self._load_participants_from_file():
+            state.put_participant(ParticipantRecord.from_wire(p))
+        for v in self._load_votes_from_file():
+            state.put_vote(VoteRecord.from_wire(v))
+        return state
+
     def save_participant(self, participant: Participant) -> None:
-        participants = self._load_participants_from_file()
-        
-        # Remove existing participant with same id if exists
-        participants = [p for p in participants if p.get("id") != participant.id]
-        
-        # Add new participant
-        participants.append(participant.dict(by_alias=True))
-        
-        with open(self.participants_file, 'w') as f:
-            json.dump(participants, f, indent=2)
+        # Replaces any existing participant with the same id
+        self.save_participants([participant])
+
+    def save_participants(self, participants: List[Participant]) -> None:
+        self._write_now(_PendingWrite("participants", self._put_participants(participants)))
 
     def get_all_participants(self) -> List[Participant]:
-        participants_data = self._load_participants_from_file()
-        return [Participant(**p) for p in participants_data]
+        return self.state.get_all_participants()
 
     def get_participant(self, participant_id: str) -> Optional[Participant]:
-        participants = self.get_all_participants()
-        for participant in participants:
-            if participant.id == participant_id:
-                return participant
-        return None
+        return self.state.get_participant(participant_id)
 
     def save_vote(self, vote: Vote) -> None:
-        votes = self._load_votes_from_file()
-        
-        # Remove existing vote from same participant if exists
-        votes = [v for v in votes if v.get("participantId") != vote.participant_id]
-        
-        # Add new vote
-        votes.append(vote.dict(by_alias=True))
-        
-        with open(self.votes_file, 'w') as f:
-            json.dump(votes, f, indent=2)
+        # Replaces any existing vote from the same participant
+        self.save_votes([vote])
+
+    def save_votes(self, votes: List[Vote]) -> None:
+        self._write_now(_PendingWrite("votes", self._put_votes(votes)))
+
+    async def save_vote_async(self, vote: Vote) -> None:
+        await self.save_votes_async([vote])
+
+    async def save_votes_async(self, votes: List[Vote]) -> None:
+        await self._writer.commit(_PendingWrite("votes", self._put_votes(votes)))
+
+    async def save_participants_async(self, participants: List[Participant]) -> None:
+        await self._writer.commit(_PendingWrite("participants", self._put_participants(participants)))
+
+    async def save_participant_within_capacity_async(self, participant: Participant, max_participants_per_wine: int,
+                                                     reserved: Optional[Dict[int, int]] = None) -> bool:
+        # The check and the state change run without yielding, so no other write can slip in between
+        reserved = reserved or {}
+        occupancy = self.get_wine_occupancy(participant.assigned_wines, exclude_participant_id=participant.id)
+        if any(count + reserved.get(wine_id, 0) >= max_participants_per_wine for wine_id, count in occupancy.items()):
+            return False
+        await self.save_participants_async([participant])
+        return True
+
+    def close(self):
+        self._writer.close()
 
     def get_all_votes(self) -> List[Vote]:
-        votes_data = self._load_votes_from_file()
-        return [Vote(**v) for v in votes_data]
+        return self.state.get_all_votes()
+
+    def get_vote(self, participant_id: str) -> Optional[Vote]:
+        return self.state.get_vote(participant_id)
+
+    def get_version(self) -> Optional[int]:
+        return self.state.version
+
+    def iter_participants(self, after: int = 0, has_voted: Optional[bool] = None,
+                          name_prefix: Optional[str] = None) -> Iterator[Tuple[int, ParticipantRecord, bool]]:
+        return self.state.iter_participants(after, has_voted, name_prefix)
+
+    def get_participant_rows(self) -> List[dict]:
+        return self.state.get_participant_rows()
+
+    def count_participants(self) -> int:
+        return self.state.count_participants()
+
+    def count_votes(self) -> int:
+        return self.state.count_votes()
 
     def get_wine_counts(self) -> Dict[int, int]:
-        participants = self.get_all_participants()
-        wine_counts = {}
-        
-        for participant in participants:
-            for wine_id in participant.assigned_wines:
-                wine_counts[wine_id] = wine_counts.get(wine_id, 0) + 1
-        
-        return wine_counts
+        return self.state.get_wine_counts()
 
-    def _load_participants_from_file(self) -> List[dict]:
+    def get_wine_occupancy(self, wine_ids: Iterable[int], exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        return self.state.get_wine_occupancy(wine_ids, exclude_participant_id)
+
+    def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
+        return self.state.get_leaderboard(top)
+
+    def get_leaderboard_rows(self, top: Optional[int] = None) -> List[dict]:
+        return self.state.get_leaderboard_rows(top)
+
+    def get_leaderboard_rows_for(self, wine_ids: Iterable[int]) -> List[dict]:
+        return self.state.get_leaderboard_rows_for(wine_ids)
+
+    def get_place_counts(self) -> np.ndarray:
+        return self.state.get_place_counts()
+
+    def get_ballot_tally(self) -> BallotTally:
+        return self.state.get_ballot_tally()
+
+    def _put_participants(self, participants: List[Participant]) -> list:
+        """Apply to the state; returns (record, previous) pairs to roll back with if the write fails"""
+        records = [ParticipantRecord.from_model(participant) for participant in participants]
+        with self._state_lock:
+            return [(record, self.state.put_participant(record)) for record in records]
+
+    def _put_votes(self, votes: List[Vote]) -> list:
+        records = [VoteRecord.from_model(vote) for vote in votes]
+        with self._state_lock:
+            return [(record, self.state.put_vote(record)) for record in records]
+
+    def _roll_back(self, write: "_PendingWrite"):
+        restore = self.state.restore_participant if write.file == "participants" else self.state.restore_vote
+        with self._state_lock:
+            for record, previous in reversed(write.changes):
+                restore(record, previous)
+
+    def _write_now(self, write: "_PendingWrite"):
         try:
-            with open(self.participants_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            self._write(write.file)
+        except Exception:
+            # Memory must not hold what the file does not
+            self._roll_back(write)
+            raise
+
+    def _write(self, file: str, durable: bool = False):
+        if file == "participants":
+            self._write_participants(durable)
+        else:
+            self._write_votes(durable)
+
+    def _flush_group(self, writes: List["_PendingWrite"]) -> list:
+        # Writer thread: each file is rewritten once however many writes touched it
+        error = None
+        for file in ("participants", "votes"):
+            group = [write for write in writes if write.file == file]
+            if not group:
+                continue
+            # Set when an earlier attempt rolled these writes back; the writer retries items one by one
+            failed = next((write.error for write in group if write.error is not None), None)
+            if failed is None:
+                try:
+                    self._write(file, durable=True)
+                except Exception as e:
+                    for write in reversed(group):
+                        self._roll_back(write)
+                        write.error = e
+                    failed = e
+            error = error or failed
+        if error is not None:
+            raise error
+        return [None] * len(writes)
+
+    def _write_participants(self, durable: bool = False):
+        with self._file_lock:
+            with self._state_lock:
+                participants = self.state.get_participant_rows()
+            self._write_file(self.participants_file, participants, durable)
+
+    def _write_votes(self, durable: bool = False):
+        with self._file_lock:
+            with self._state_lock:
+                votes = [v.to_wire() for v in self.state.get_vote_records()]
+            self._write_file(self.votes_file, votes, durable)
+
+    @staticmethod
+    def _write_file(path: str, rows: List[dict], durable: bool):
+        with time_repository("json", "encode"):
+            text = json.dumps(rows, indent=2)
+        with time_repository("json", "write") as moved:
+            moved.append(len(text))
+            if not durable:
+                with open(path, 'w') as f:
+                    f.write(text)
+                return
+            # Replace atomically so a crash mid-write cannot leave a truncated file
+            tmp_file = path + ".tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, path)
+
+    def _load_participants_from_file(self) -> List[dict]:
+        return self._read_file(self.participants_file)
 
     def _load_votes_from_file(self) -> List[dict]:
+        return self._read_file(self.votes_file)
+
+    @staticmethod
+    def _read_file(path: str) -> List[dict]:
         try:
-            with open(self.votes_file, 'r') as f:
-                return json.load(f)
+            with time_repository("json", "read") as moved:
+                with open(path, 'r') as f:
+                    text = f.read()
+                moved.append(len(text))
+            with time_repository("json", "parse"):
+                return json.loads(text)
         except (FileNotFoundError, json.JSONDecodeError):
-            return []
\ No newline at end of file
+            return []
+
+
+class _PendingWrite:
+    """Changes already applied to the state, waiting for `file` to be rewritten"""
+
+    __slots__ = ("file", "changes", "error")
+
+    def __init__(self, file: str, changes: list):
+        self.file = file
+        self.changes = changes
+        self.error: Optional[Exception] = None
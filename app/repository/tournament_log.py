@@ -0,0 +1,339 @@
+import json
+import os
+import shutil
+import threading
+import time
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
+import numpy as np
+from loguru import logger
+from app.metrics import time_repository
+from app.model.ballot_tally import BallotTally
+from app.repository.group_commit import GroupCommitWriter, DEFAULT_WINDOW_SECONDS
+from app.model.wine_tournament import TournamentRepository, Participant, Vote, WineScore
+from app.model.records import ParticipantRecord, VoteRecord
+from app.repository.tournament_state import TournamentState
+
+
+class TournamentLogRepository(TournamentRepository):
+    """Append-only write-ahead log storage.
+
+    Every write appends one JSON line to the log and is fsync'ed before returning,
+    the current state lives in memory, and a background thread compacts the log
+    into a snapshot once it grows past `compact_every` records.
+
+    The `*_async` writes go through a writer thread instead: writes arriving
+    within `group_commit_seconds` of each other share one write and fsync, and
+    become visible on the event loop once durable, in log order.
+    """
+
+    def __init__(self, data_dir: str = "data", compact_every: int = 1000,
+                 group_commit_seconds: float = DEFAULT_WINDOW_SECONDS):
+        self.data_dir = data_dir
+        self.log_file = os.path.join(data_dir, "tournament.log")
+        self.rotated_log_file = os.path.join(data_dir, "tournament.log.1")
+        self.snapshot_file = os.path.join(data_dir, "tournament.snapshot.json")
+        self.compact_every = compact_every
+
+        self.state = TournamentState()
+        # Guards the log file; the condition guards the in-memory state
+        self._lock = threading.Lock()
+        self._applied = threading.Condition()
+        # Records the writer thread made durable that the event loop has not applied yet
+        self._unapplied = 0
+        self._compaction_lock = threading.Lock()
+        self._compacting = False
+        self._records_since_snapshot = 0
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._recover()
+        self._log = open(self.log_file, 'a', encoding="utf-8")
+        self._writer = GroupCommitWriter(self._flush_group, self._apply_group,
+                                         window_seconds=group_commit_seconds, name="tournament-log-writer")
+
+    def save_participant(self, participant: Participant) -> None:
+        self._append([("participant", ParticipantRecord.from_model(participant))])
+
+    def save_participants(self, participants: List[Participant]) -> None:
+        self._append([("participant", ParticipantRecord.from_model(participant)) for participant in participants])
+
+    def get_all_participants(self) -> List[Participant]:
+        return self.state.get_all_participants()
+
+    def get_participant(self, participant_id: str) -> Optional[Participant]:
+        return self.state.get_participant(participant_id)
+
+    def save_vote(self, vote: Vote) -> None:
+        self._append([("vote", VoteRecord.from_model(vote))])
+
+    def save_votes(self, votes: List[Vote]) -> None:
+        self._append([("vote", VoteRecord.from_model(vote)) for vote in votes])
+
+    def get_all_votes(self) -> List[Vote]:
+        return self.state.get_all_votes()
+
+    async def save_vote_async(self, vote: Vote) -> None:
+        await self._append_async([("vote", VoteRecord.from_model(vote))])
+
+    async def save_votes_async(self, votes: List[Vote]) -> None:
+        await self._append_async([("vote", VoteRecord.from_model(vote)) for vote in votes])
+
+    async def save_participants_async(self, participants: List[Participant]) -> None:
+        await self._append_async([("participant", ParticipantRecord.from_model(p)) for p in participants])
+
+    async def save_participant_within_capacity_async(self, participant: Participant, max_participants_per_wine: int,
+                                                     reserved: Optional[Dict[int, int]] = None) -> bool:
+        # Checked against applied state; callers serialize capacity decisions (see WineTournamentUCImpl)
+        reserved = reserved or {}
+        occupancy = self.get_wine_occupancy(participant.assigned_wines, exclude_participant_id=participant.id)
+        if any(count + reserved.get(wine_id, 0) >= max_participants_per_wine for wine_id, count in occupancy.items()):
+            return False
+        await self.save_participants_async([participant])
+        return True
+
+    def get_vote(self, participant_id: str) -> Optional[Vote]:
+        return self.state.get_vote(participant_id)
+
+    def get_version(self) -> Optional[int]:
+        return self.state.version
+
+    def iter_participants(self, after: int = 0, has_voted: Optional[bool] = None,
+                          name_prefix: Optional[str] = None) -> Iterator[Tuple[int, ParticipantRecord, bool]]:
+        return self.state.iter_participants(after, has_voted, name_prefix)
+
+    def get_participant_rows(self) -> List[dict]:
+        return self.state.get_participant_rows()
+
+    def count_participants(self) -> int:
+        return self.state.count_participants()
+
+    def count_votes(self) -> int:
+        return self.state.count_votes()
+
+    def get_wine_counts(self) -> Dict[int, int]:
+        return self.state.get_wine_counts()
+
+    def get_wine_occupancy(self, wine_ids: Iterable[int], exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        return self.state.get_wine_occupancy(wine_ids, exclude_participant_id)
+
+    def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
+        return self.state.get_leaderboard(top)
+
+    def get_leaderboard_rows(self, top: Optional[int] = None) -> List[dict]:
+        return self.state.get_leaderboard_rows(top)
+
+    def get_leaderboard_rows_for(self, wine_ids: Iterable[int]) -> List[dict]:
+        return self.state.get_leaderboard_rows_for(wine_ids)
+
+    def get_place_counts(self) -> np.ndarray:
+        return self.state.get_place_counts()
+
+    def get_ballot_tally(self) -> BallotTally:
+        return self.state.get_ballot_tally()
+
+    def close(self):
+        self._writer.close()
+        # Wait for an in-flight compaction so it does not reopen the log behind us
+        with self._compaction_lock, self._lock:
+            self._log.close()
+
+    def _append(self, records: List[tuple]):
+        """Append (op, record) pairs with a single write and fsync"""
+        if not records:
+            return
+        lines = self._encode(records)
+        with self._lock:
+            self._write(lines)
+            # Only acknowledged (durable) records become visible
+            self._apply_records(records)
+
+    async def _append_async(self, records: List[tuple]):
+        if records:
+            await self._writer.commit((self._encode(records), records))
+
+    def _flush_group(self, items: List[tuple]) -> list:
+        # Writer thread: one write and fsync for every queued append
+        with self._lock:
+            self._write("".join(lines for lines, _ in items))
+            with self._applied:
+                self._unapplied += sum(len(records) for _, records in items)
+        return [None] * len(items)
+
+    def _apply_group(self, items: List[tuple], _results: list):
+        # Event loop: make the group visible in log order
+        records = [record for _, group in items for record in group]
+        self._apply_records(records)
+        with self._applied:
+            self._unapplied -= len(records)
+            self._applied.notify_all()
+
+    @staticmethod
+    def _encode(records: List[tuple]) -> str:
+        return "".join(
+            json.dumps({"op": op, "data": record.to_wire()}, separators=(",", ":")) + "\n"
+            for op, record in records
+        )
+
+    def _write(self, lines: str):
+        # Everything before this offset is whole, acknowledged records
+        offset = os.fstat(self._log.fileno()).st_size
+        with time_repository("log", "append") as moved:
+            try:
+                self._log.write(lines)
+                self._log.flush()
+                os.fsync(self._log.fileno())
+            except Exception:
+                self._truncate_log(offset)
+                raise
+            moved.append(len(lines))
+
+    def _truncate_log(self, offset: int):
+        """Drop what a failed append left behind, so later appends do not follow a torn record"""
+        try:
+            self._log.close()
+        except OSError:
+            # Its buffered rest is exactly what must not reach the file
+            pass
+        with open(self.log_file, 'r+b') as f:
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log = open(self.log_file, 'a', encoding="utf-8")
+
+    def _apply_records(self, records: List[tuple]):
+        with self._applied:
+            for op, record in records:
+                self._apply(op, record)
+            self._records_since_snapshot += len(records)
+            should_compact = self._records_since_snapshot >= self.compact_every and not self._compacting
+            if should_compact:
+                self._compacting = True
+        if should_compact:
+            threading.Thread(target=self.compact, name="tournament-log-compaction", daemon=True).start()
+
+    def _apply(self, op: str, record):
+        if op == "participant":
+            self.state.put_participant(record)
+        elif op == "vote":
+            self.state.put_vote(record)
+
+    def _apply_data(self, op: str, data: dict):
+        # Records in our own log and snapshots were validated when they were written
+        if op == "participant":
+            self._apply(op, ParticipantRecord.from_wire(data))
+        elif op == "vote":
+            self._apply(op, VoteRecord.from_wire(data))
+
+    def _snapshot(self) -> dict:
+        return {
+            "participants": self.state.get_participant_rows(),
+            "votes": [v.to_wire() for v in self.state.get_vote_records()],
+        }
+
+    def compact(self):
+        """Write the current state to a snapshot and drop the log records it covers."""
+        with self._compaction_lock:
+            self._compact()
+
+    def _compact(self):
+        try:
+            snapshot = self._cut_log()
+            if snapshot is None:
+                logger.warning("Skipped tournament log compaction: committed writes were not applied in time")
+                return
+
+            self._write_snapshot(snapshot)
+            logger.info(f"Compacted tournament log: {len(snapshot['participants'])} participants, "
+                        f"{len(snapshot['votes'])} votes")
+        except Exception as e:
+            logger.error(f"Tournament log compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def _cut_log(self, timeout_seconds: float = 5) -> Optional[dict]:
+        """Rotate the log and capture the state it covers, once every durable record is applied"""
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            with self._lock, self._applied:
+                if not self._unapplied:
+                    # New writes go to a fresh file while the snapshot is written
+                    self._log.close()
+                    if os.path.exists(self.rotated_log_file):
+                        # An earlier compaction failed before its snapshot: keep its records until one covers them
+                        with open(self.log_file, 'rb') as src, open(self.rotated_log_file, 'ab') as dst:
+                            shutil.copyfileobj(src, dst)
+                            dst.flush()
+                            os.fsync(dst.fileno())
+                        os.remove(self.log_file)
+                    else:
+                        os.replace(self.log_file, self.rotated_log_file)
+                    self._log = open(self.log_file, 'a', encoding="utf-8")
+                    self._records_since_snapshot = 0
+                    return self._snapshot()
+            # Not holding the file lock here, so the event loop can apply what was written
+            with self._applied:
+                if not self._applied.wait_for(lambda: not self._unapplied, max(0.0, deadline - time.monotonic())):
+                    return None
+
+    def _recover(self):
+        if os.path.exists(self.snapshot_file):
+            with time_repository("log", "read_snapshot") as moved:
+                with open(self.snapshot_file, 'r', encoding="utf-8") as f:
+                    text = f.read()
+                moved.append(len(text))
+            with time_repository("log", "parse_snapshot"):
+                snapshot = json.loads(text)
+            for p in snapshot.get("participants", []):
+                self._apply_data("participant", p)
+            for v in snapshot.get("votes", []):
+                self._apply_data("vote", v)
+        # A rotated log only survives a crash during compaction; replaying is idempotent
+        if os.path.exists(self.rotated_log_file):
+            self._replay(self.rotated_log_file)
+            self._write_snapshot(self._snapshot())
+        if os.path.exists(self.log_file):
+            self._records_since_snapshot = self._replay(self.log_file)
+
+    def _write_snapshot(self, snapshot: dict):
+        tmp_file = self.snapshot_file + ".tmp"
+        with time_repository("log", "write_snapshot") as moved:
+            text = json.dumps(snapshot, separators=(",", ":"))
+            with open(tmp_file, 'w', encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.snapshot_file)
+            moved.append(len(text))
+        self._fsync_directory()
+        if os.path.exists(self.rotated_log_file):
+            os.remove(self.rotated_log_file)
+
+    def _replay(self, path: str) -> int:
+        replayed = 0
+        valid_until = 0
+        with time_repository("log", "replay") as moved, open(path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Torn write from a crash: the record was never acknowledged
+                    break
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    break
+                self._apply_data(record["op"], record["data"])
+                valid_until += len(raw)
+                replayed += 1
+            moved.append(valid_until)
+        if valid_until != os.path.getsize(path):
+            logger.warning(f"Truncating torn tail of {path} at byte {valid_until}")
+            with open(path, 'r+b') as f:
+                f.truncate(valid_until)
+        return replayed
+
+    def _fsync_directory(self):
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.data_dir, os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
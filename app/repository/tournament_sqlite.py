@@ -0,0 +1,519 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+import numpy as np
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
+from app.metrics import time_repository
+from app.model.wine_tournament import TournamentRepository, Participant, Vote, WineScore, TournamentChange, check_wine_ids
+from app.model.records import ParticipantRecord
+from app.model.ballot_tally import BallotTally, tally_from_rows
+from app.repository.group_commit import GroupCommitWriter, DEFAULT_WINDOW_SECONDS
+from utils.chunks import chunks
+
+WRITE_CHUNK_SIZE = 500
+# Changes kept for other workers to catch up on; older ones are pruned
+CHANGE_RETENTION = 10000
+CHANGE_READ_LIMIT = 1000
+# Rows fetched per query when iterating participants, so no read holds the lock for long
+READ_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS participants (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS participant_wines (
+    participant_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    wine_id INTEGER NOT NULL,
+    PRIMARY KEY (participant_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_participant_wines_wine_id ON participant_wines (wine_id);
+CREATE TABLE IF NOT EXISTS votes (
+    participant_id TEXT PRIMARY KEY,
+    first_place INTEGER NOT NULL,
+    second_place INTEGER NOT NULL,
+    third_place INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    record TEXT NOT NULL,
+    previous TEXT
+);
+"""
+
+UPSERT_PARTICIPANT = (
+    "INSERT INTO participants (id, name) VALUES (?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET name = excluded.name"
+)
+DELETE_PARTICIPANT_WINES = "DELETE FROM participant_wines WHERE participant_id = ?"
+INSERT_PARTICIPANT_WINE = "INSERT INTO participant_wines (participant_id, position, wine_id) VALUES (?, ?, ?)"
+SELECT_PARTICIPANT = "SELECT id, name FROM participants WHERE id = ?"
+SELECT_PARTICIPANTS = "SELECT id, name FROM participants ORDER BY seq"
+SELECT_PARTICIPANT_WINES = "SELECT wine_id FROM participant_wines WHERE participant_id = ? ORDER BY position"
+SELECT_PARTICIPANT_STATUS = (
+    "SELECT p.seq, p.id, p.name, v.participant_id IS NOT NULL FROM participants p "
+    "LEFT JOIN votes v ON v.participant_id = p.id WHERE p.seq > ?"
+)
+SELECT_ALL_PARTICIPANT_WINES = "SELECT participant_id, wine_id FROM participant_wines ORDER BY participant_id, position"
+UPSERT_VOTE = (
+    "INSERT INTO votes (participant_id, first_place, second_place, third_place) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (participant_id) DO UPDATE SET first_place = excluded.first_place, "
+    "second_place = excluded.second_place, third_place = excluded.third_place"
+)
+SELECT_VOTE = "SELECT participant_id, first_place, second_place, third_place FROM votes WHERE participant_id = ?"
+SELECT_VOTES = "SELECT participant_id, first_place, second_place, third_place FROM votes ORDER BY rowid"
+COUNT_PARTICIPANTS = "SELECT COUNT(*) FROM participants"
+COUNT_VOTES = "SELECT COUNT(*) FROM votes"
+INSERT_CHANGE = "INSERT INTO changes (origin, kind, record, previous) VALUES (?, ?, ?, ?)"
+PRUNE_CHANGES = "DELETE FROM changes WHERE seq <= ?"
+SELECT_CHANGES = "SELECT seq, origin, kind, record, previous FROM changes WHERE seq > ? ORDER BY seq LIMIT ?"
+SELECT_LAST_CHANGE_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM changes"
+SELECT_WINE_COUNTS = "SELECT wine_id, COUNT(*) FROM participant_wines GROUP BY wine_id"
+SELECT_PLACE_COUNTS = """
+SELECT wine_id, SUM(place = 1), SUM(place = 2), SUM(place = 3)
+FROM (
+    SELECT first_place AS wine_id, 1 AS place FROM votes
+    UNION ALL SELECT second_place, 2 FROM votes
+    UNION ALL SELECT third_place, 3 FROM votes
+)
+GROUP BY wine_id
+"""
+SELECT_LEADERBOARD = """
+SELECT wine_id, SUM(points), SUM(place = 1), SUM(place = 2), SUM(place = 3)
+FROM (
+    SELECT first_place AS wine_id, 3 AS points, 1 AS place FROM votes
+    UNION ALL SELECT second_place, 2, 2 FROM votes
+    UNION ALL SELECT third_place, 1, 3 FROM votes
+)
+GROUP BY wine_id
+ORDER BY 2 DESC, 3 DESC, 4 DESC, 5 DESC, wine_id
+LIMIT ?
+"""
+
+
+class TournamentSqliteRepository(TournamentRepository):
+    """SQLite storage in WAL mode, safe for concurrent readers and serialized writers.
+
+    Reads and writes use separate connections, so a read never waits for a
+    commit's fsync.
+
+    With `change_feed` every write also appends to a `changes` table in the same
+    transaction, so several worker processes sharing the database can follow
+    each other's writes (see `get_changes_since`).
+
+    The `*_async` writes are queued to a writer thread that commits everything
+    arriving within `group_commit_seconds` in one transaction; async reads run
+    on a worker thread.
+    """
+
+    def __init__(self, db_file: str = "data/tournament.db", change_feed: bool = False,
+                 group_commit_seconds: float = DEFAULT_WINDOW_SECONDS):
+        self.db_file = db_file
+        self.change_feed = change_feed
+        # Tells this process's changes apart from other workers'
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        # Writes get their own connection, so reads never wait behind a COMMIT and its fsync (WAL
+        # lets readers run alongside the writer); each lock guards one connection
+        self._write_lock = threading.Lock()
+        # FULL: under WAL, NORMAL would not fsync on COMMIT and an acknowledged write could be lost
+        self._write_conn = self._connect(synchronous="FULL")
+        self._write_conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        # Built on first use, then kept up to date by this process's writes; the write
+        # connection's data_version it matches tells whether another process wrote in between
+        self._tally: Optional[BallotTally] = None
+        self._tally_version: Optional[int] = None
+        # Set once the tally was handed to a reader: the next write copies it instead of changing it
+        self._tally_shared = False
+        # Commits made on the write connection, to tell whether a tally rebuilt meanwhile missed one
+        self._commits = 0
+        self._writer = GroupCommitWriter(self._flush_group, window_seconds=group_commit_seconds,
+                                         name="tournament-sqlite-writer")
+
+    def _connect(self, synchronous: str = "NORMAL") -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_file, isolation_level=None, check_same_thread=False, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def save_participant(self, participant: Participant) -> None:
+        with self._transaction() as cursor:
+            self._upsert_participant(cursor, participant)
+
+    def save_participants(self, participants: List[Participant]) -> None:
+        with self._transaction() as cursor:
+            for participant in participants:
+                self._upsert_participant(cursor, participant)
+
+    def get_all_participants(self) -> List[Participant]:
+        return [Participant.model_construct(id=p_id, name=name, assigned_wines=wines)
+                for p_id, name, wines in self._participant_tuples()]
+
+    def get_participant_rows(self) -> List[dict]:
+        return [{"id": p_id, "name": name, "assignedWines": wines} for p_id, name, wines in self._participant_tuples()]
+
+    def _participant_tuples(self) -> List[tuple]:
+        with self._snapshot():
+            rows = self._conn.execute(SELECT_PARTICIPANTS).fetchall()
+            wines: Dict[str, List[int]] = {}
+            for participant_id, wine_id in self._conn.execute(SELECT_ALL_PARTICIPANT_WINES):
+                wines.setdefault(participant_id, []).append(wine_id)
+        return [(p_id, name, wines.get(p_id, [])) for p_id, name in rows]
+
+    def iter_participants(self, after: int = 0, has_voted: Optional[bool] = None,
+                          name_prefix: Optional[str] = None) -> Iterator[Tuple[int, ParticipantRecord, bool]]:
+        # Keyset pagination on seq, one short read per chunk
+        query, params = SELECT_PARTICIPANT_STATUS, []
+        if has_voted is not None:
+            query += " AND v.participant_id IS NOT NULL" if has_voted else " AND v.participant_id IS NULL"
+        if name_prefix is not None:
+            query += " AND p.name LIKE ? ESCAPE '\\'"
+            params.append(self._like_prefix(name_prefix))
+        query += " ORDER BY p.seq LIMIT ?"
+        while True:
+            with self._snapshot():
+                rows = self._conn.execute(query, (after, *params, READ_CHUNK_SIZE)).fetchall()
+                wines: Dict[str, List[int]] = {}
+                if rows:
+                    ids = [row[1] for row in rows]
+                    for participant_id, wine_id in self._conn.execute(self._wines_query(len(ids)), ids):
+                        wines.setdefault(participant_id, []).append(wine_id)
+            for seq, participant_id, name, voted in rows:
+                yield seq, ParticipantRecord(participant_id, name, wines.get(participant_id, [])), bool(voted)
+            if len(rows) < READ_CHUNK_SIZE:
+                return
+            after = rows[-1][0]
+
+    def get_participant(self, participant_id: str) -> Optional[Participant]:
+        with self._snapshot():
+            row = self._conn.execute(SELECT_PARTICIPANT, (participant_id,)).fetchone()
+            if row is None:
+                return None
+            wines = [wine_id for (wine_id,) in self._conn.execute(SELECT_PARTICIPANT_WINES, (participant_id,))]
+        return Participant.model_construct(id=row[0], name=row[1], assigned_wines=wines)
+
+    def save_vote(self, vote: Vote) -> None:
+        # Upsert keeps the latest vote per participant
+        with self._transaction() as cursor:
+            self._upsert_votes(cursor, [vote])
+
+    def save_votes(self, votes: List[Vote]) -> None:
+        # One transaction; rows are applied in order, so the latest vote per participant wins
+        with self._transaction() as cursor:
+            self._upsert_votes(cursor, votes)
+
+    def get_all_votes(self) -> List[Vote]:
+        with self._lock:
+            rows = self._conn.execute(SELECT_VOTES).fetchall()
+        return [self._vote_from_row(row) for row in rows]
+
+    def get_vote(self, participant_id: str) -> Optional[Vote]:
+        with self._lock:
+            row = self._conn.execute(SELECT_VOTE, (participant_id,)).fetchone()
+        return self._vote_from_row(row) if row else None
+
+    def get_version(self) -> Optional[int]:
+        with self._lock:
+            return self._version()
+
+    def _version(self) -> int:
+        # The read connection never writes, so commits by our writer and other processes both move it
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _external_version(self) -> int:
+        # Moved only by other processes' commits, never by the write connection's own
+        return self._write_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_changes_since(self, seq: Optional[int]) -> Tuple[Optional[int], List[TournamentChange]]:
+        with self._lock:
+            if seq is None:
+                # First call: follow from the current end of the feed
+                return self._conn.execute(SELECT_LAST_CHANGE_SEQ).fetchone()[0], []
+            rows = self._conn.execute(SELECT_CHANGES, (seq, CHANGE_READ_LIMIT)).fetchall()
+        changes = [
+            TournamentChange(seq=row_seq, kind=kind, record=json.loads(record),
+                             previous=json.loads(previous) if previous else None)
+            for row_seq, origin, kind, record, previous in rows
+            if origin != self.origin
+        ]
+        return (rows[-1][0] if rows else seq), changes
+
+    def count_participants(self) -> int:
+        with self._lock:
+            return self._conn.execute(COUNT_PARTICIPANTS).fetchone()[0]
+
+    def count_votes(self) -> int:
+        with self._lock:
+            return self._conn.execute(COUNT_VOTES).fetchone()[0]
+
+    def get_wine_counts(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._conn.execute(SELECT_WINE_COUNTS).fetchall())
+
+    def get_wine_occupancy(self, wine_ids: Iterable[int], exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        wine_ids = list(wine_ids)
+        occupancy = {wine_id: 0 for wine_id in wine_ids}
+        if not wine_ids:
+            return occupancy
+        query = self._occupancy_query(len(wine_ids))
+        with self._lock:
+            occupancy.update(self._conn.execute(query, (*wine_ids, exclude_participant_id)).fetchall())
+        return occupancy
+
+    def save_participant_within_capacity(self, participant: Participant, max_participants_per_wine: int,
+                                         reserved: Optional[Dict[int, int]] = None) -> bool:
+        # Check and write in one IMMEDIATE transaction so concurrent processes cannot overbook
+        with self._transaction() as cursor:
+            return self._save_within_capacity(cursor, participant, max_participants_per_wine, reserved or {})
+
+    async def save_vote_async(self, vote: Vote) -> None:
+        await self._writer.commit(("votes", [vote]))
+
+    async def save_votes_async(self, votes: List[Vote]) -> None:
+        await self._writer.commit(("votes", votes))
+
+    async def save_participants_async(self, participants: List[Participant]) -> None:
+        await self._writer.commit(("participants", participants))
+
+    async def save_participant_within_capacity_async(self, participant: Participant, max_participants_per_wine: int,
+                                                     reserved: Optional[Dict[int, int]] = None) -> bool:
+        return await self._writer.commit(("capacity", (participant, max_participants_per_wine, reserved or {})))
+
+    async def get_all_participants_async(self) -> List[Participant]:
+        return await asyncio.to_thread(self.get_all_participants)
+
+    async def get_all_votes_async(self) -> List[Vote]:
+        return await asyncio.to_thread(self.get_all_votes)
+
+    async def get_ballot_tally_async(self) -> BallotTally:
+        return await asyncio.to_thread(self.get_ballot_tally)
+
+    def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
+        return [WineScore(**row) for row in self.get_leaderboard_rows(top)]
+
+    def get_leaderboard_rows(self, top: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(SELECT_LEADERBOARD, (top if top is not None else -1,)).fetchall()
+        return [
+            {"wineId": wine_id, "totalPoints": points, "rank": rank,
+             "firstPlaces": firsts, "secondPlaces": seconds, "thirdPlaces": thirds}
+            for rank, (wine_id, points, firsts, seconds, thirds) in enumerate(rows, start=1)
+        ]
+
+    def get_place_counts(self) -> np.ndarray:
+        # Aggregated in SQL: one row per wine instead of one per ballot
+        with self._lock:
+            rows = np.array(self._conn.execute(SELECT_PLACE_COUNTS).fetchall(), dtype=np.int64).reshape(-1, 4)
+        counts = np.zeros((3, int(rows[:, 0].max()) + 1 if len(rows) else 0), dtype=np.int64)
+        counts[:, rows[:, 0]] = rows[:, 1:].T
+        return counts
+
+    def get_ballot_tally(self) -> BallotTally:
+        with self._write_lock:
+            if self._tally is not None and self._tally_version == self._external_version():
+                # Copied by the next write (if any), not here for every read
+                self._tally_shared = True
+                return self._tally
+            commits = self._commits
+            version = self._external_version()
+        # Rebuilt on the read connection, so writers are not held up meanwhile
+        with self._snapshot():
+            votes = [self._vote_from_row(row) for row in self._conn.execute(SELECT_VOTES)]
+            tally = tally_from_rows(votes, self._conn.execute(SELECT_ALL_PARTICIPANT_WINES))
+        with self._write_lock:
+            # Handed to the writer to keep up to date only if nothing was committed since the snapshot
+            if self._commits == commits and self._external_version() == version:
+                self._tally, self._tally_version, self._tally_shared = tally, version, True
+        return tally
+
+    def import_json(self, participants_file: str = "data/participants.json", votes_file: str = "data/votes.json"):
+        """Copy the participants and votes of the JSON repository files that are not in the database yet.
+
+        Rows already in the database are left alone, so the import can run while the
+        JSON backend is still live and again after switching over: the second pass
+        picks up what was only written to JSON and never overwrites newer SQLite rows.
+        Returns how many participants and votes were added.
+        """
+        participants = self._load_json(participants_file)
+        votes = self._load_json(votes_file)
+        with self._transaction() as cursor:
+            known_participants = {row[0] for row in cursor.execute("SELECT id FROM participants")}
+            known_votes = {row[0] for row in cursor.execute("SELECT participant_id FROM votes")}
+            new_participants = [Participant(**p) for p in participants if p["id"] not in known_participants]
+            new_votes = [Vote(**v) for v in votes if v["participantId"] not in known_votes]
+            for participant in new_participants:
+                self._upsert_participant(cursor, participant)
+            self._upsert_votes(cursor, new_votes)
+        return len(new_participants), len(new_votes)
+
+    def close(self):
+        self._writer.close()
+        with self._write_lock:
+            self._write_conn.close()
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _snapshot(self):
+        """Read connection in a read transaction, for reads made of several queries.
+
+        Writes commit on their own connection meanwhile, so without it a participant's
+        row and wine rows could come from different commits.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield
+            finally:
+                self._conn.execute("COMMIT")
+
+    @contextmanager
+    def _transaction(self):
+        with self._write_lock, time_repository("sqlite", "transaction"):
+            # Take the write lock up front so concurrent writers queue instead of failing mid-transaction
+            self._write_conn.execute("BEGIN IMMEDIATE")
+            if self._tally is not None and self._tally_version != self._external_version():
+                # Another process wrote since the tally was built; rebuild it on next use
+                self._tally = None
+            elif self._tally is not None and self._tally_shared:
+                self._tally = self._tally.copy()
+                self._tally_shared = False
+            try:
+                yield self._write_conn.cursor()
+            except Exception:
+                self._write_conn.execute("ROLLBACK")
+                self._tally = None
+                raise
+            with time_repository("sqlite", "commit"):
+                self._write_conn.execute("COMMIT")
+            self._commits += 1
+
+    @staticmethod
+    def _wines_query(participant_count: int) -> str:
+        return (
+            f"SELECT participant_id, wine_id FROM participant_wines "
+            f"WHERE participant_id IN ({','.join('?' * participant_count)}) ORDER BY participant_id, position"
+        )
+
+    @staticmethod
+    def _like_prefix(prefix: str) -> str:
+        return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    @staticmethod
+    def _occupancy_query(wine_count: int) -> str:
+        return (
+            f"SELECT wine_id, COUNT(*) FROM participant_wines "
+            f"WHERE wine_id IN ({','.join('?' * wine_count)}) AND participant_id IS NOT ? GROUP BY wine_id"
+        )
+
+    def _flush_group(self, items: List[tuple]) -> list:
+        # Writer thread: the whole group in one transaction, applied in queue order
+        with self._transaction() as cursor:
+            return [self._write_item(cursor, kind, args) for kind, args in items]
+
+    def _write_item(self, cursor: sqlite3.Cursor, kind: str, args):
+        if kind == "votes":
+            self._upsert_votes(cursor, args)
+        elif kind == "participants":
+            for participant in args:
+                self._upsert_participant(cursor, participant)
+        elif kind == "capacity":
+            return self._save_within_capacity(cursor, *args)
+        return None
+
+    def _save_within_capacity(self, cursor: sqlite3.Cursor, participant: Participant, max_participants_per_wine: int,
+                              reserved: Dict[int, int]) -> bool:
+        wine_ids = participant.assigned_wines
+        if wine_ids:
+            rows = cursor.execute(self._occupancy_query(len(wine_ids)), (*wine_ids, participant.id)).fetchall()
+            if any(count + reserved.get(wine_id, 0) >= max_participants_per_wine for wine_id, count in rows):
+                return False
+        if any(reserved.get(wine_id, 0) >= max_participants_per_wine for wine_id in wine_ids):
+            return False
+        self._upsert_participant(cursor, participant)
+        return True
+
+    def _upsert_participant(self, cursor: sqlite3.Cursor, participant: Participant):
+        check_wine_ids(participant.assigned_wines)
+        if self._tally is not None:
+            vote = cursor.execute(SELECT_VOTE, (participant.id,)).fetchone()
+            if vote is not None:
+                vote = self._vote_from_row(vote)
+                self._tally.replace(vote, self._assigned_wines(cursor, participant.id), vote, participant.assigned_wines)
+        cursor.execute(UPSERT_PARTICIPANT, (participant.id, participant.name))
+        cursor.execute(DELETE_PARTICIPANT_WINES, (participant.id,))
+        cursor.executemany(INSERT_PARTICIPANT_WINE, [
+            (participant.id, position, wine_id) for position, wine_id in enumerate(participant.assigned_wines)
+        ])
+        if self.change_feed:
+            self._record_change(cursor, "participant", participant.dict(by_alias=True))
+
+    def _upsert_votes(self, cursor: sqlite3.Cursor, votes: List[Vote]):
+        for vote in votes:
+            check_wine_ids((vote.first_place, vote.second_place, vote.third_place))
+        if self._tally is not None:
+            self._tally_votes(cursor, votes)
+        if not self.change_feed:
+            for batch in chunks(votes, WRITE_CHUNK_SIZE):
+                cursor.executemany(UPSERT_VOTE, [self._vote_row(vote) for vote in batch])
+            return
+        for vote in votes:
+            # Followers need the replaced ballot to know which scores moved
+            previous = cursor.execute(SELECT_VOTE, (vote.participant_id,)).fetchone()
+            cursor.execute(UPSERT_VOTE, self._vote_row(vote))
+            self._record_change(cursor, "vote", vote.dict(by_alias=True),
+                                self._vote_from_row(previous).dict(by_alias=True) if previous else None)
+
+    def _record_change(self, cursor: sqlite3.Cursor, kind: str, record: dict, previous: Optional[dict] = None):
+        cursor.execute(INSERT_CHANGE, (self.origin, kind, json.dumps(record, separators=(",", ":")),
+                                       json.dumps(previous, separators=(",", ":")) if previous else None))
+        seq = cursor.lastrowid
+        if seq % CHANGE_RETENTION == 0:
+            cursor.execute(PRUNE_CHANGES, (seq - CHANGE_RETENTION,))
+
+    def _tally_votes(self, cursor: sqlite3.Cursor, votes: List[Vote]):
+        # Earlier votes of the same batch are not written yet, so they are tracked here
+        latest: Dict[str, Tuple[Optional[Vote], List[int]]] = {}
+        for vote in votes:
+            if vote.participant_id in latest:
+                previous, assigned_wines = latest[vote.participant_id]
+            else:
+                row = cursor.execute(SELECT_VOTE, (vote.participant_id,)).fetchone()
+                previous = self._vote_from_row(row) if row else None
+                assigned_wines = self._assigned_wines(cursor, vote.participant_id)
+            self._tally.replace(previous, assigned_wines, vote, assigned_wines)
+            latest[vote.participant_id] = vote, assigned_wines
+
+    @staticmethod
+    def _assigned_wines(cursor: sqlite3.Cursor, participant_id: str) -> List[int]:
+        return [wine_id for (wine_id,) in cursor.execute(SELECT_PARTICIPANT_WINES, (participant_id,))]
+
+    @staticmethod
+    def _vote_row(vote: Vote) -> tuple:
+        return vote.participant_id, vote.first_place, vote.second_place, vote.third_place
+
+    @staticmethod
+    def _vote_from_row(row) -> Vote:
+        # Rows were validated on the way in
+        return Vote.model_construct(participant_id=row[0], first_place=row[1], second_place=row[2], third_place=row[3])
+
+    @staticmethod
+    def _load_json(path: str) -> List[dict]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
@@ -0,0 +1,166 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from app.model.leaderboard import Leaderboard
+from app.model.wine_tournament import (
+    Participant, Vote, WineScore, leaderboard_to_scores, leaderboard_to_rows, participant_matches,
+    ranked_to_rows
+)
+from app.model.records import ParticipantRecord, VoteRecord
+from app.model.vote_columns import VoteColumns
+from app.model.ballot_tally import BallotTally
+
+
+class TournamentState:
+    """In-memory indexes shared by the tournament repositories.
+
+    Participants and votes are keyed by participant id and the per-wine occupancy
+    is updated incrementally, so lookups never have to rescan the whole event.
+    They are stored as compact records; models are only built for callers that
+    ask for them, response paths use the records' wire form directly.
+    """
+
+    def __init__(self):
+        self.participants: Dict[str, ParticipantRecord] = {}
+        # Registration order; a participant's index here is its position for cursors
+        self.participant_order: List[str] = []
+        self.votes: Dict[str, VoteRecord] = {}
+        self.wine_counts: Dict[int, int] = {}
+        self.leaderboard = Leaderboard()
+        self.vote_columns = VoteColumns()
+        self.ballot_tally = BallotTally()
+        # Bumped on every write, used to invalidate cached reads
+        self.version = 0
+
+    def put_participant(self, participant: ParticipantRecord) -> Optional[ParticipantRecord]:
+        previous = self.participants.get(participant.id)
+        vote = self.votes.get(participant.id)
+        if vote is not None:
+            # The ballot's unranked wines changed with the assignment. Updated first: it is
+            # the step that can fail, and nothing else has changed yet when it does
+            self.ballot_tally.replace(vote, previous.assigned_wines if previous is not None else (),
+                                      vote, participant.assigned_wines)
+        if previous is not None:
+            self._adjust_counts(previous.assigned_wines, -1)
+        else:
+            self.participant_order.append(participant.id)
+        self.participants[participant.id] = participant
+        self._adjust_counts(participant.assigned_wines, 1)
+        self.version += 1
+        return previous
+
+    def put_vote(self, vote: VoteRecord) -> Optional[VoteRecord]:
+        previous = self.votes.get(vote.participant_id)
+        participant = self.participants.get(vote.participant_id)
+        assigned_wines = participant.assigned_wines if participant is not None else ()
+        # First, see put_participant
+        self.ballot_tally.replace(previous, assigned_wines, vote, assigned_wines)
+        self.votes[vote.participant_id] = vote
+        # A participant's new ballot overwrites the old one, so its points are taken back
+        self.leaderboard.replace_vote(previous, vote)
+        self.vote_columns.put(vote)
+        self.version += 1
+        return previous
+
+    def restore_participant(self, participant: ParticipantRecord, previous: Optional[ParticipantRecord]):
+        """Undo `put_participant(participant)`, unless a later write already replaced it"""
+        if self.participants.get(participant.id) is not participant:
+            return
+        if previous is not None:
+            self.put_participant(previous)
+            return
+        del self.participants[participant.id]
+        self.participant_order.remove(participant.id)
+        self._adjust_counts(participant.assigned_wines, -1)
+        vote = self.votes.get(participant.id)
+        if vote is not None:
+            self.ballot_tally.replace(vote, participant.assigned_wines, vote, ())
+        self.version += 1
+
+    def restore_vote(self, vote: VoteRecord, previous: Optional[VoteRecord]):
+        """Undo `put_vote(vote)`, unless a later write already replaced it"""
+        if self.votes.get(vote.participant_id) is not vote:
+            return
+        if previous is not None:
+            self.put_vote(previous)
+            return
+        del self.votes[vote.participant_id]
+        self.leaderboard.remove_vote(vote)
+        self.vote_columns.remove(vote.participant_id)
+        participant = self.participants.get(vote.participant_id)
+        self.ballot_tally.remove(vote, participant.assigned_wines if participant is not None else ())
+        self.version += 1
+
+    def get_participant(self, participant_id: str) -> Optional[Participant]:
+        record = self.participants.get(participant_id)
+        return record.to_model() if record is not None else None
+
+    def get_vote(self, participant_id: str) -> Optional[Vote]:
+        record = self.votes.get(participant_id)
+        return record.to_model() if record is not None else None
+
+    def get_all_participants(self) -> List[Participant]:
+        return [record.to_model() for record in self.participants.values()]
+
+    def get_all_votes(self) -> List[Vote]:
+        return [record.to_model() for record in self.votes.values()]
+
+    def get_participant_records(self) -> List[ParticipantRecord]:
+        return list(self.participants.values())
+
+    def get_vote_records(self) -> List[VoteRecord]:
+        return list(self.votes.values())
+
+    def get_participant_rows(self) -> List[dict]:
+        return [record.to_wire() for record in self.participants.values()]
+
+    def iter_participants(self, after: int = 0, has_voted: Optional[bool] = None,
+                          name_prefix: Optional[str] = None) -> Iterator[Tuple[int, ParticipantRecord, bool]]:
+        # Indexing (rather than iterating) the order list tolerates participants added mid-iteration
+        position = after
+        while position < len(self.participant_order):
+            participant = self.participants[self.participant_order[position]]
+            position += 1
+            voted = participant.id in self.votes
+            if participant_matches(participant, voted, has_voted, name_prefix):
+                yield position, participant, voted
+
+    def count_participants(self) -> int:
+        return len(self.participants)
+
+    def count_votes(self) -> int:
+        return len(self.votes)
+
+    def get_wine_counts(self) -> Dict[int, int]:
+        return dict(self.wine_counts)
+
+    def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
+        return leaderboard_to_scores(self.leaderboard, top)
+
+    def get_leaderboard_rows(self, top: Optional[int] = None) -> List[dict]:
+        return leaderboard_to_rows(self.leaderboard, top)
+
+    def get_leaderboard_rows_for(self, wine_ids: Iterable[int]) -> List[dict]:
+        return ranked_to_rows(self.leaderboard.ranked(wine_ids))
+
+    def get_place_counts(self) -> np.ndarray:
+        return self.vote_columns.place_counts()
+
+    def get_ballot_tally(self) -> BallotTally:
+        return self.ballot_tally
+
+    def get_wine_occupancy(self, wine_ids: Iterable[int], exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        occupancy = {wine_id: self.wine_counts.get(wine_id, 0) for wine_id in wine_ids}
+        excluded = self.participants.get(exclude_participant_id) if exclude_participant_id else None
+        if excluded is not None:
+            for wine_id in excluded.assigned_wines:
+                if wine_id in occupancy:
+                    occupancy[wine_id] -= 1
+        return occupancy
+
+    def _adjust_counts(self, wine_ids: Iterable[int], delta: int):
+        for wine_id in wine_ids:
+            count = self.wine_counts.get(wine_id, 0) + delta
+            if count:
+                self.wine_counts[wine_id] = count
+            else:
+                self.wine_counts.pop(wine_id, None)
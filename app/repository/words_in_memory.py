@@ -1,18 +1,111 @@
-from typing import Optional
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from app.model.word import Word, WordRepository
+from utils import fast_json
 
 
 class WordsInMemoryRepository(WordRepository):
+    """Words by id, at most `capacity` of them in memory.
 
-    def __init__(self):
-        self.words = []
+    The least recently used word is evicted beyond `capacity`, and words not
+    read or saved for `ttl_seconds` are evicted when next touched or when a
+    save needs room. With a `spill_file`, evicted words go to a SQLite file
+    and are read back (and kept in memory again) when asked for; without one
+    they are gone.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 spill_file: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        # id -> (word, last used), least recently used first
+        self.words: "OrderedDict[str, Tuple[Word, float]]" = OrderedDict()
+        self._spill: Optional[sqlite3.Connection] = None
+        if spill_file is not None:
+            self._spill = sqlite3.connect(spill_file, isolation_level=None, check_same_thread=False)
+            self._spill.execute("PRAGMA journal_mode=WAL")
+            # Spilled words are a second tier of the cache, not a record: no fsync per write
+            self._spill.execute("PRAGMA synchronous=OFF")
+            self._spill.execute("CREATE TABLE IF NOT EXISTS words (id TEXT PRIMARY KEY, body BLOB NOT NULL)")
+
+    def __len__(self) -> int:
+        return len(self.words)
 
     def get_word(self, word_id: str) -> Optional[Word]:
-        for w in self.words:
-            if w.id == word_id:
-                return w
-        return None
+        return self.get_words((word_id,)).get(word_id)
 
     def save(self, word: Word):
-        self.words.append(word)
+        self.save_many([word])
         return word
+
+    def get_words(self, word_ids: Iterable[str]) -> Dict[str, Word]:
+        now = self.clock()
+        found, missing, expired = {}, [], []
+        for word_id in word_ids:
+            entry = self.words.get(word_id)
+            if entry is None:
+                missing.append(word_id)
+            elif self._expired(entry, now):
+                expired.append(self.words.pop(word_id)[0])
+                missing.append(word_id)
+            else:
+                found[word_id] = entry[0]
+                self.words[word_id] = (entry[0], now)
+                self.words.move_to_end(word_id)
+        self._write_spill(expired)
+        if missing and self._spill is not None:
+            spilled = self._read_spill(missing)
+            found.update(spilled)
+            self._insert(spilled.values(), now)
+        return found
+
+    def save_many(self, words: List[Word]) -> List[Word]:
+        self._insert(words, self.clock())
+        return words
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def _insert(self, words: Iterable[Word], now: float):
+        for word in words:
+            self.words[word.id] = (word, now)
+            self.words.move_to_end(word.id)
+        self._write_spill(self._evict(now))
+
+    def _evict(self, now: float) -> List[Word]:
+        evicted = []
+        # Oldest first, so expired words are all at the front
+        while self.words:
+            word_id, entry = next(iter(self.words.items()))
+            over_capacity = self.capacity is not None and len(self.words) > self.capacity
+            if not over_capacity and not self._expired(entry, now):
+                break
+            del self.words[word_id]
+            evicted.append(entry[0])
+        return evicted
+
+    def _expired(self, entry: Tuple[Word, float], now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry[1] >= self.ttl_seconds
+
+    def _write_spill(self, words: List[Word]):
+        if not words or self._spill is None:
+            return
+        rows = [(word.id, fast_json.dumps(word.dict(by_alias=True))) for word in words]
+        with self._spill:
+            self._spill.execute("BEGIN")
+            self._spill.executemany("INSERT OR REPLACE INTO words (id, body) VALUES (?, ?)", rows)
+
+    def _read_spill(self, word_ids: List[str]) -> Dict[str, Word]:
+        found = {}
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(word_ids), 500):
+            chunk = word_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for word_id, body in self._spill.execute(f"SELECT id, body FROM words WHERE id IN ({placeholders})", chunk):
+                found[word_id] = Word(**fast_json.loads(body))
+        return found
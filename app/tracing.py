@@ -0,0 +1,155 @@
+"""Per-request span breakdowns, kept for requests slower than a threshold.
+
+While a request is handled, calls into the use case, the repository and
+response serialization are timed into a RequestSpans held in a context
+variable. Each layer's time is exclusive of the layers it calls, so a slow
+leaderboard shows whether the time went to SQL, to ranking in the use case or
+to encoding the response. Requests over the threshold are kept in a
+SlowRequestLog ring buffer.
+"""
+import inspect
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+REPOSITORY = "repository"
+USE_CASE = "use_case"
+SERIALIZATION = "serialization"
+# Time spent outside the traced layers: routing, validation, middleware, framework encoding
+OTHER = "other"
+
+_current: ContextVar[Optional["RequestSpans"]] = ContextVar("request_spans", default=None)
+# (type, attribute) -> whether the attribute is a coroutine function
+_is_async: Dict[tuple, bool] = {}
+
+
+class RequestSpans:
+    __slots__ = ("started", "exclusive", "operations", "closed", "_children")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # kind -> seconds not spent in nested spans
+        self.exclusive: Dict[str, float] = {}
+        # "kind.name" -> [calls, seconds including nested spans]
+        self.operations: Dict[str, List] = {}
+        self.closed = False
+        # Time of nested spans, one entry per open span
+        self._children: List[float] = []
+
+    @contextmanager
+    def span(self, kind: str, name: str):
+        started = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            if not self.closed:
+                self.exclusive[kind] = self.exclusive.get(kind, 0.0) + elapsed - children
+                operation = self.operations.setdefault(kind + "." + name, [0, 0.0])
+                operation[0] += 1
+                operation[1] += elapsed
+            if self._children:
+                self._children[-1] += elapsed
+
+    def breakdown(self, total_seconds: float) -> dict:
+        """Milliseconds per layer, and per operation sorted slowest first"""
+        layers = {kind: round(seconds * 1000, 3) for kind, seconds in self.exclusive.items()}
+        layers[OTHER] = round(max(0.0, total_seconds - sum(self.exclusive.values())) * 1000, 3)
+        operations = [{"operation": name, "calls": calls, "ms": round(seconds * 1000, 3)}
+                      for name, (calls, seconds) in sorted(self.operations.items(), key=lambda item: -item[1][1])]
+        return {"layers": layers, "operations": operations}
+
+
+def begin() -> Any:
+    """Start collecting spans for the current request; returns the token for `end`"""
+    return _current.set(RequestSpans())
+
+
+def end(token) -> RequestSpans:
+    spans = _current.get()
+    # Tasks started by the request (e.g. a queue drainer) keep a reference; stop recording their work
+    spans.closed = True
+    _current.reset(token)
+    return spans
+
+
+@contextmanager
+def span(kind: str, name: str):
+    spans = _current.get()
+    if spans is None or spans.closed:
+        yield
+        return
+    with spans.span(kind, name):
+        yield
+
+
+def traced(target, kind: str):
+    """`target` with its method calls recorded as `kind` spans, or `target` itself outside a traced request"""
+    spans = _current.get()
+    if spans is None or spans.closed:
+        return target
+    return _TracedProxy(target, kind)
+
+
+class _TracedProxy:
+    __slots__ = ("_target", "_kind")
+
+    def __init__(self, target, kind: str):
+        self._target = target
+        self._kind = kind
+
+    def __getattr__(self, name: str):
+        value = getattr(self._target, name)
+        if name.startswith("__") or not callable(value):
+            return value
+        key = (type(self._target), name)
+        is_async = _is_async.get(key)
+        if is_async is None:
+            is_async = _is_async[key] = inspect.iscoroutinefunction(value)
+        kind = self._kind
+        if is_async:
+            async def call_async(*args, **kwargs):
+                with span(kind, name):
+                    return await value(*args, **kwargs)
+            return call_async
+
+        def call(*args, **kwargs):
+            with span(kind, name):
+                return value(*args, **kwargs)
+        return call
+
+
+class SlowRequestLog:
+    """The last `size` requests that took at least `threshold_ms`, with their span breakdowns"""
+
+    def __init__(self, threshold_ms: float = 500, size: int = 100):
+        self.threshold_ms = threshold_ms
+        self.captured = 0
+        self._entries: Deque[dict] = deque(maxlen=size)
+
+    def observe(self, method: str, path: str, route: str, status: int, total_seconds: float, spans: RequestSpans):
+        total_ms = total_seconds * 1000
+        if total_ms < self.threshold_ms:
+            return
+        self.captured += 1
+        self._entries.append({
+            "timestamp": time.time(),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "total_ms": round(total_ms, 3),
+            **spans.breakdown(total_seconds),
+        })
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Newest first"""
+        entries = list(reversed(self._entries))
+        return entries if limit is None else entries[:limit]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,16 @@
+import asyncio
+from typing import Callable, Iterable
+from loguru import logger
+from app.usecase.wine_tournament import WineTournamentUCImpl
+
+
+async def follow_external_changes(use_cases: Callable[[], Iterable[WineTournamentUCImpl]],
+                                  interval_seconds: float = 0.2):
+    """Keep this worker's allocators and live streams in step with writes made by the other workers"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        for uc in use_cases():
+            try:
+                uc.apply_external_changes()
+            except Exception as e:
+                logger.warning(f"Could not apply changes from other workers: {e}")
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import pytest
+import inject
+from app.model.tournament import TournamentCatalogRepository, CreateTournamentRequest
+from app.model.wine_tournament import CreateParticipantRequest
+from app.repository.tournament_catalog_json import TournamentCatalogJsonRepository
+from app.repository.tournament_json import TournamentJsonRepository
+from app.usecase.tournament_manager import TournamentManagerUCImpl
+
+
+@pytest.fixture
+def manager(tmp_path):
+    catalog = TournamentCatalogJsonRepository(str(tmp_path / "tournaments.json"))
+    inject.clear_and_configure(lambda binder: binder.bind(TournamentCatalogRepository, catalog))
+
+    def repository_factory(tournament_id):
+        return TournamentJsonRepository(
+            participants_file=str(tmp_path / tournament_id / "participants.json"),
+            votes_file=str(tmp_path / tournament_id / "votes.json")
+        )
+
+    yield TournamentManagerUCImpl(repository_factory, max_loaded=1)
+    inject.clear()
+
+
+@pytest.mark.asyncio
+async def test_tournaments_have_isolated_state(manager):
+    small = await manager.create_tournament(CreateTournamentRequest(name="Small", total_wines=5,
+                                                                    max_participants_per_wine=1))
+    large = await manager.create_tournament(CreateTournamentRequest(name="Large", total_wines=50))
+
+    small_uc = await manager.get_tournament_uc(small.id)
+    response = await small_uc.create_participant(CreateParticipantRequest(name="Ana"), total_wines=100)
+    # The tournament's own wine count wins over the request's
+    assert sorted(response.suggested_wines) == [1, 2, 3, 4, 5]
+    assert await small_uc.confirm_participant(response.participant)
+    assert await small_uc.validate_wine_assignment([6]) is False
+
+    large_uc = await manager.get_tournament_uc(large.id)
+    assert await large_uc.get_all_participants() == []
+    assert await large_uc.validate_wine_assignment([1, 2, 3])
+    assert await manager.get_tournament_uc("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_idle_tournaments_are_evicted_and_reloaded(manager):
+    first = await manager.create_tournament(CreateTournamentRequest(name="First", total_wines=10))
+    second = await manager.create_tournament(CreateTournamentRequest(name="Second", total_wines=10))
+
+    first_uc = await manager.get_tournament_uc(first.id)
+    response = await first_uc.create_participant(CreateParticipantRequest(name="Ana"), total_wines=10)
+    # A pending hold keeps the first tournament loaded past the limit
+    await manager.get_tournament_uc(second.id)
+    assert manager.loaded_tournaments() == [first.id, second.id]
+
+    await first_uc.confirm_participant(response.participant)
+    manager.evict()
+    assert manager.loaded_tournaments() == [second.id]
+
+    reloaded = await manager.get_tournament_uc(first.id)
+    assert reloaded is not first_uc
+    assert [p.id for p in await reloaded.get_all_participants()] == [response.participant.id]
+    assert manager.loaded_tournaments() == [first.id]
+
+
+@pytest.mark.asyncio
+async def test_reloaded_tournament_does_not_reuse_cache_versions(manager):
+    first = await manager.create_tournament(CreateTournamentRequest(name="First", total_wines=10))
+    second = await manager.create_tournament(CreateTournamentRequest(name="Second", total_wines=10))
+
+    first_uc = await manager.get_tournament_uc(first.id)
+    response = await first_uc.create_participant(CreateParticipantRequest(name="Ana"), total_wines=10)
+    await first_uc.confirm_participant(response.participant)
+    before = first_uc.tournament_repo.get_cache_version()
+    await manager.get_tournament_uc(second.id)
+
+    reloaded = await manager.get_tournament_uc(first.id)
+    after = reloaded.tournament_repo.get_cache_version()
+    # Loading the saved participant counts the same one write again
+    assert after[1] == before[1]
+    assert after != before
+
+
+@pytest.mark.asyncio
+async def test_tournament_in_use_is_not_unloaded(manager):
+    first = await manager.create_tournament(CreateTournamentRequest(name="First", total_wines=10))
+    second = await manager.create_tournament(CreateTournamentRequest(name="Second", total_wines=10))
+
+    async with manager.use_tournament(first.id) as first_uc:
+        # e.g. a request awaiting its vote batch while another tournament is loaded
+        await manager.get_tournament_uc(second.id)
+        assert manager.loaded_tournaments() == [first.id, second.id]
+        response = await first_uc.create_participant(CreateParticipantRequest(name="Ana"), total_wines=10)
+        assert await first_uc.confirm_participant(response.participant)
+
+    manager.evict()
+    assert manager.loaded_tournaments() == [second.id]
+    async with manager.use_tournament("unknown") as unknown:
+        assert unknown is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_share_one_load_off_the_loop(manager):
+    tournament = await manager.create_tournament(CreateTournamentRequest(name="First", total_wines=10))
+    factory = manager.repository_factory
+    loads = []
+
+    def repository_factory(tournament_id):
+        loads.append(threading.current_thread())
+        return factory(tournament_id)
+
+    manager.repository_factory = repository_factory
+    use_cases = await asyncio.gather(*[manager.get_tournament_uc(tournament.id) for _ in range(5)])
+
+    assert len(loads) == 1
+    assert loads[0] is not threading.current_thread()
+    assert all(uc is use_cases[0] for uc in use_cases)
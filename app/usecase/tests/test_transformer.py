@@ -3,13 +3,14 @@ import inject
 from decouple import config
 from app.usecase.word_transformer import WordTransformerUCImpl
 from app.model.word import WordRepository
+from app.gateway.http_client import SharedHttpClient
 from app.gateway.my_ip import MyIP, MyIPImpl
 from app.repository.words_in_memory import WordsInMemoryRepository
 
 
 def my_config(binder):
     binder.bind(WordRepository, WordsInMemoryRepository())
-    binder.bind(MyIP, MyIPImpl())
+    binder.bind(MyIP, MyIPImpl(SharedHttpClient()))
 
 @pytest.fixture
 def inject_config():
@@ -18,7 +19,7 @@ def inject_config():
 @pytest.mark.skipif(not config("LIVE_TESTS", default=False, cast=bool), reason="Integration tests are disabled")
 @pytest.mark.asyncio
 async def test_reverse_and_concat():
-    my_ip = MyIPImpl()
+    my_ip = MyIPImpl(SharedHttpClient())
 
     word_repo = WordsInMemoryRepository()
     word_transformer = WordTransformerUCImpl(concat_with=" test")
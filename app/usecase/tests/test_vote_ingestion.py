@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+import inject
+from app.model.wine_tournament import TournamentRepository, Participant, Vote
+from app.repository.tournament_log import TournamentLogRepository
+from app.usecase.vote_ingestion import VoteBatchTooLarge, VoteIngestionQueue, VoteQueueFull
+from app.usecase.wine_tournament import WineTournamentUCImpl
+
+
+def ballot(participant_id: str, first: int) -> Vote:
+    second, third = [wine_id for wine_id in (1, 2, 3, 4) if wine_id != first][:2]
+    return Vote(participant_id=participant_id, first_place=first, second_place=second, third_place=third)
+
+
+@pytest.fixture
+def tournament_repo(tmp_path):
+    repo = TournamentLogRepository(data_dir=str(tmp_path))
+    inject.clear_and_configure(lambda binder: binder.bind(TournamentRepository, repo))
+    yield repo
+    repo.close()
+    inject.clear()
+
+
+@pytest.mark.asyncio
+async def test_burst_is_committed_in_batches_and_latest_ballot_wins(tournament_repo):
+    uc = WineTournamentUCImpl()
+    tournament_repo.save_participants([Participant(id=f"p{i}", name=f"Taster {i}", assigned_wines=[1, 2, 3, 4])
+                                       for i in range(20)])
+    ballots = [ballot(f"p{i}", first) for first in (1, 2, 3, 4) for i in range(20)]
+
+    assert all(await asyncio.gather(*(uc.submit_vote(vote) for vote in ballots)))
+
+    assert {vote.participant_id: vote.first_place for vote in tournament_repo.get_all_votes()} == \
+        {f"p{i}": 4 for i in range(20)}
+    stats = uc.vote_queue.stats()
+    assert stats["committed"] == 80 and stats["depth"] == 0
+    assert stats["batches"] < 80
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    release = asyncio.Event()
+    committed = []
+
+    async def commit(votes):
+        await release.wait()
+        committed.extend(votes)
+
+    queue = VoteIngestionQueue(commit, max_pending=3)
+    first = asyncio.create_task(queue.submit([ballot("p1", 1)]))
+    second = asyncio.create_task(queue.submit([ballot("p2", 1), ballot("p3", 1)]))
+    while not queue.stats()["in_flight"]:
+        await asyncio.sleep(0)
+
+    # The batch being written still counts against the bound
+    assert queue.stats()["in_flight"] == 3
+    with pytest.raises(VoteQueueFull) as full:
+        await queue.submit([ballot("p4", 1)])
+    assert full.value.retry_after >= 1
+    assert queue.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert [vote.participant_id for vote in committed] == ["p1", "p2", "p3"]
+
+
+@pytest.mark.asyncio
+async def test_batch_larger_than_the_queue_is_refused_outright():
+    committed = []
+
+    async def commit(votes):
+        committed.extend(votes)
+
+    queue = VoteIngestionQueue(commit, max_pending=3)
+    # Would never fit, even into an empty queue: not worth a retry
+    with pytest.raises(VoteBatchTooLarge) as too_large:
+        await queue.submit([ballot(f"p{i}", 1) for i in range(4)])
+    assert too_large.value.max_size == 3
+    await queue.submit([ballot(f"p{i}", 1) for i in range(3)])
+    assert len(committed) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_commit_fails_its_callers():
+    async def commit(votes):
+        raise OSError("disk full")
+
+    queue = VoteIngestionQueue(commit)
+    with pytest.raises(OSError):
+        await queue.submit([ballot("p1", 1)])
+    assert len(queue) == 0
@@ -0,0 +1,28 @@
+import random
+from app.usecase.wine_allocator import WineAllocator
+
+
+def test_assigns_least_loaded_wines_first():
+    allocator = WineAllocator(total_wines=10, max_participants_per_wine=3, occupancy={1: 2, 2: 1, 3: 3},
+                              rng=random.Random(7))
+    picked = allocator.pick(8)
+    assert set(picked) == {4, 5, 6, 7, 8, 9, 10, 2}
+    assert 3 not in allocator.pick(10)
+
+
+def test_batch_assignment_balances_load_and_respects_capacity():
+    allocator = WineAllocator(total_wines=20, max_participants_per_wine=5, rng=random.Random(1))
+    assignments = allocator.assign_many(count=21, k=5)
+
+    loads = {}
+    for wines in assignments:
+        assert len(wines) == len(set(wines))
+        for wine_id in wines:
+            loads[wine_id] = loads.get(wine_id, 0) + 1
+    assert max(loads.values()) - min(loads.values()) <= 1
+    assert all(len(wines) == 5 for wines in assignments[:20])
+    assert assignments[20] == []
+    assert allocator.available_wines() == 0
+
+    allocator.adjust(assignments[0], -1)
+    assert sorted(allocator.pick(5)) == sorted(assignments[0])
@@ -0,0 +1,269 @@
+import json
+import asyncio
+import time
+import warnings
+import pytest
+import inject
+from pydantic import ValidationError
+from app.model.wine_tournament import TournamentRepository, Participant, Vote, CreateParticipantRequest, MAX_WINES
+from app.repository.tournament_json import TournamentJsonRepository
+from app.repository.tournament_sqlite import TournamentSqliteRepository
+from app.usecase.wine_tournament import WineTournamentUCImpl
+from app.usecase.tournament_events import RESYNC
+
+
+@pytest.fixture
+def tournament_repo(tmp_path):
+    repo = TournamentJsonRepository(
+        participants_file=str(tmp_path / "participants.json"),
+        votes_file=str(tmp_path / "votes.json")
+    )
+    inject.clear_and_configure(lambda binder: binder.bind(TournamentRepository, repo))
+    yield repo
+    inject.clear()
+
+
+@pytest.mark.asyncio
+async def test_suggest_confirm_vote_flow(tournament_repo):
+    uc = WineTournamentUCImpl(max_participants_per_wine=1)
+
+    response = await uc.create_participant(CreateParticipantRequest(name="Ana"), total_wines=10)
+    assert len(response.suggested_wines) == 5
+    assert await uc.confirm_participant(response.participant)
+
+    # Re-confirming the same participant must not count its own previous assignment
+    assert await uc.confirm_participant(response.participant)
+    other = Participant(id="other", name="Bob", assigned_wines=response.suggested_wines[:1])
+    assert not await uc.confirm_participant(other)
+
+    first, second, third = response.suggested_wines[:3]
+    vote = Vote(participant_id=response.participant.id, first_place=first, second_place=second, third_place=third)
+    assert await uc.submit_vote(vote)
+    assert tournament_repo.get_vote(response.participant.id) == vote
+    assert not await uc.submit_vote(Vote(participant_id="missing", first_place=1, second_place=2, third_place=3))
+
+
+def test_wine_occupancy_is_incremental(tournament_repo):
+    tournament_repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[1, 2]))
+    tournament_repo.save_participant(Participant(id="p2", name="Bob", assigned_wines=[2, 3]))
+    tournament_repo.save_participant(Participant(id="p1", name="Ana", assigned_wines=[3, 4]))
+
+    assert tournament_repo.get_wine_counts() == {2: 1, 3: 2, 4: 1}
+    assert tournament_repo.get_wine_occupancy([1, 3], exclude_participant_id="p2") == {1: 0, 3: 1}
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_applies_vote_replacement(tournament_repo):
+    uc = WineTournamentUCImpl()
+    tournament_repo.save_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+    tournament_repo.save_vote(Vote(participant_id="p2", first_place=2, second_place=1, third_place=4))
+    tournament_repo.save_vote(Vote(participant_id="p1", first_place=4, second_place=2, third_place=3))
+
+    leaderboard = await uc.get_leaderboard()
+    assert [(s.wine_id, s.total_points, s.rank) for s in leaderboard] == [(2, 5, 1), (4, 4, 2), (1, 2, 3), (3, 1, 4)]
+    assert (leaderboard[0].first_places, leaderboard[0].second_places) == (1, 1)
+    assert [s.wine_id for s in await uc.get_leaderboard(top=2)] == [2, 4]
+    assert tournament_repo.get_leaderboard() == TournamentRepository.get_leaderboard(tournament_repo)
+
+
+@pytest.mark.asyncio
+async def test_wine_analytics_normalizes_by_assigned_tasters(tournament_repo):
+    uc = WineTournamentUCImpl()
+    tournament_repo.save_participants([Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]),
+                                       Participant(id="p2", name="Bob", assigned_wines=[1, 2, 4]),
+                                       Participant(id="p3", name="Cid", assigned_wines=[1, 5, 6])])
+    tournament_repo.save_votes([Vote(participant_id="p1", first_place=1, second_place=2, third_place=3),
+                                Vote(participant_id="p2", first_place=1, second_place=2, third_place=4),
+                                Vote(participant_id="p3", first_place=5, second_place=1, third_place=6)])
+
+    analytics = await uc.get_wine_analytics()
+    leaderboard = await uc.get_leaderboard()
+    assert [(a["wineId"], a["totalPoints"], a["rank"]) for a in analytics] == \
+        [(s.wine_id, s.total_points, s.rank) for s in leaderboard]
+    assert analytics[0] == {"wineId": 1, "rank": 1, "totalPoints": 8, "firstPlaces": 2, "secondPlaces": 1,
+                            "thirdPlaces": 0, "votes": 3, "assignedTasters": 3, "pointsPerTaster": 2.6667,
+                            "podiumRate": 1.0}
+
+    # Wine 5 was tasted once and won that ballot
+    by_exposure = await uc.get_wine_analytics(top=2, order_by="points_per_taster")
+    assert [(a["wineId"], a["pointsPerTaster"]) for a in by_exposure] == [(5, 3.0), (1, 2.6667)]
+
+
+def test_wine_ids_outside_the_wine_range_are_rejected():
+    # Scoring indexes arrays by wine id, so these never reach the repository
+    with pytest.raises(ValidationError):
+        Participant(id="p1", name="Ana", assigned_wines=[-1, 2, 3])
+    with pytest.raises(ValidationError):
+        Vote(participant_id="p1", first_place=0, second_place=2, third_place=3)
+    with pytest.raises(ValidationError):
+        CreateParticipantRequest(name="Ana", assigned_wines=[1, 2, MAX_WINES + 1])
+
+
+@pytest.mark.asyncio
+async def test_ranking_methods(tournament_repo):
+    uc = WineTournamentUCImpl()
+    tournament_repo.save_participants([Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3]),
+                                       Participant(id="p2", name="Bob", assigned_wines=[1, 2, 4]),
+                                       Participant(id="p3", name="Cid", assigned_wines=[1, 5, 6])])
+    tournament_repo.save_votes([Vote(participant_id="p1", first_place=1, second_place=2, third_place=3),
+                                Vote(participant_id="p2", first_place=1, second_place=2, third_place=4),
+                                Vote(participant_id="p3", first_place=5, second_place=1, third_place=6)])
+
+    def top3(rows):
+        return [(row["wineId"], row["score"]) for row in rows[:3]]
+
+    assert [row["wineId"] for row in await uc.get_rankings("points")] == \
+        [score.wine_id for score in await uc.get_leaderboard()]
+    # Wine 5 won the only ballot it was on
+    assert top3(await uc.get_rankings("normalized")) == [(5, 3.0), (1, 2.6667), (2, 2.0)]
+    # ...which the prior (2 points per tasting, weighted 1.5 ballots) discounts
+    assert top3(await uc.get_rankings("bayesian")) == [(1, 2.4444), (5, 2.4), (2, 2.0)]
+    # 5 beats 1 head to head, and 1 beats everything else
+    assert top3(await uc.get_rankings("schulze")) == [(5, 5.0), (1, 4.0), (2, 2.0)]
+    assert len(await uc.get_rankings("schulze", top=2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_ranking_methods_on_an_empty_tournament(tournament_repo):
+    uc = WineTournamentUCImpl()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        for method in ("points", "normalized", "bayesian", "schulze"):
+            assert await uc.get_rankings(method) == []
+
+
+@pytest.mark.asyncio
+async def test_suggestions_hold_capacity_until_expiry(tournament_repo):
+    uc = WineTournamentUCImpl(max_participants_per_wine=1)
+    responses = await asyncio.gather(*[
+        uc.create_participant(CreateParticipantRequest(name=f"P{i}"), total_wines=10) for i in range(3)
+    ])
+    held = [wine for r in responses for wine in r.suggested_wines]
+    assert sorted(held) == list(range(1, 11))
+    assert responses[2].suggested_wines == []
+
+    # A confirm that grabs a wine held by someone else is rejected
+    intruder = responses[1].participant.model_copy(update={"assigned_wines": responses[0].suggested_wines[:1]})
+    assert not await uc.confirm_participant(intruder)
+    assert await uc.confirm_participant(responses[0].participant)
+
+    uc.reservations.expire(now=time.time() + uc.reservations.ttl_seconds + 1)
+    late = await uc.create_participant(CreateParticipantRequest(name="Late"), total_wines=10)
+    assert sorted(late.suggested_wines) == sorted(responses[1].suggested_wines)
+
+
+@pytest.mark.asyncio
+async def test_batch_registration_and_votes(tournament_repo):
+    uc = WineTournamentUCImpl(max_participants_per_wine=2)
+    requests = [CreateParticipantRequest(name=f"P{i}") for i in range(5)]
+    requests.insert(1, CreateParticipantRequest(name="Picky", assigned_wines=[1, 2, 3]))
+
+    results = await uc.register_participants(requests, total_wines=10)
+    # The last successful registrant only gets the two slots left
+    assert [r.success for r in results] == [True, True, True, True, True, False]
+    assert len(results[4].assigned_wines) == 2
+    assert tournament_repo.get_wine_counts() == {wine_id: 2 for wine_id in range(1, 11)}
+
+    registered = results[:4]
+    votes = [Vote(participant_id=r.id, first_place=r.assigned_wines[0], second_place=r.assigned_wines[1],
+                  third_place=r.assigned_wines[2]) for r in registered]
+    votes.append(votes[0].model_copy(update={"first_place": votes[0].third_place, "third_place": votes[0].first_place}))
+    votes.append(Vote(participant_id="missing", first_place=1, second_place=2, third_place=3))
+
+    vote_results = await uc.submit_votes(votes)
+    assert [r.success for r in vote_results] == [True, True, True, True, True, False]
+    assert len(tournament_repo.get_all_votes()) == 4
+    assert tournament_repo.get_vote(registered[0].id).first_place == registered[0].assigned_wines[2]
+
+
+@pytest.mark.asyncio
+async def test_commits_publish_deltas_to_subscribers(tournament_repo):
+    uc = WineTournamentUCImpl()
+    queue = uc.events.subscribe()
+    participant = Participant(id="p1", name="Ana", assigned_wines=[1, 2, 3, 4])
+    assert await uc.confirm_participant(participant)
+    assert await uc.submit_vote(Vote(participant_id="p1", first_place=1, second_place=2, third_place=3))
+    assert await uc.submit_vote(Vote(participant_id="p1", first_place=4, second_place=2, third_place=3))
+
+    events = [queue.get_nowait().decode() for _ in range(queue.qsize())]
+    assert [e.split("\n")[0] for e in events] == [
+        "event: participants", "event: progress", "event: leaderboard", "event: progress",
+        "event: leaderboard", "event: progress"
+    ]
+    last_leaderboard = json.loads(events[4].split("\n")[1][len("data: "):])
+    assert {row["wineId"]: row["totalPoints"] for row in last_leaderboard["changed"]} == {1: 0, 2: 2, 3: 1, 4: 3}
+    uc.events.unsubscribe(queue)
+
+
+@pytest.mark.asyncio
+async def test_workers_follow_each_other_through_the_change_feed(tmp_path):
+    uc_a, uc_b = [
+        WineTournamentUCImpl(max_participants_per_wine=1,
+                             tournament_repo=TournamentSqliteRepository(str(tmp_path / "t.db"), change_feed=True))
+        for _ in range(2)
+    ]
+    uc_b.apply_external_changes()
+    assert uc_b._allocator(5).available_wines() == 5
+    queue = uc_b.events.subscribe()
+
+    response = await uc_a.create_participant(CreateParticipantRequest(name="Ana"), total_wines=5)
+    await uc_a.confirm_participant(response.participant)
+    wines = response.suggested_wines
+    await uc_a.submit_vote(Vote(participant_id=response.participant.id,
+                                first_place=wines[0], second_place=wines[1], third_place=wines[2]))
+
+    assert uc_b.apply_external_changes() == 2
+    events = [queue.get_nowait().decode().split("\n")[0] for _ in range(queue.qsize())]
+    assert events == ["event: participants", "event: progress", "event: leaderboard", "event: progress"]
+    # B's allocator now counts A's participant
+    assert uc_b._allocator(5).available_wines() == 0
+    assert uc_b.apply_external_changes() == 0
+
+
+@pytest.mark.asyncio
+async def test_participant_pages_follow_registration_order(tournament_repo):
+    uc = WineTournamentUCImpl()
+    for i in range(5):
+        tournament_repo.save_participant(Participant(id=f"p{i}", name=f"Taster {i}", assigned_wines=[1, 2, 3]))
+    tournament_repo.save_vote(Vote(participant_id="p3", first_place=1, second_place=2, third_place=3))
+    # Re-registering keeps the participant's position
+    tournament_repo.save_participant(Participant(id="p0", name="Taster 0", assigned_wines=[4, 5, 6]))
+
+    rows, after = await uc.get_participants_page(limit=2)
+    assert [p.id for p, _ in rows] == ["p0", "p1"]
+    rows, after = await uc.get_participants_page(after, limit=2)
+    assert [(p.id, voted) for p, voted in rows] == [("p2", False), ("p3", True)]
+    rows, after = await uc.get_participants_page(after, limit=2)
+    assert [p.id for p, _ in rows] == ["p4"] and after is None
+
+    rows, _ = await uc.get_participants_page(limit=10, has_voted=False, name_prefix="TASTER")
+    assert [p.id for p, _ in rows] == ["p0", "p1", "p2", "p4"]
+
+    stats = await uc.get_voting_stats()
+    assert stats["total_votes"] == 1 and stats["voting_percentage"] == 20.0
+    assert [status["has_voted"] for status in stats["participant_status"]] == [False, False, False, True, False]
+
+
+def test_allocators_are_kept_for_a_few_tournament_sizes(tournament_repo):
+    uc = WineTournamentUCImpl()
+    for total_wines in range(1, 20):
+        uc._allocator(total_wines)
+    assert list(uc._allocators) == [16, 17, 18, 19]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_resynced_instead_of_losing_deltas(tournament_repo):
+    uc = WineTournamentUCImpl()
+    uc.events.queue_size = 2
+    queue = uc.events.subscribe()
+    tournament_repo.save_participants([Participant(id=f"p{i}", name=f"Taster {i}", assigned_wines=[1, 2, 3, 4])
+                                       for i in range(3)])
+    await uc.submit_vote(Vote(participant_id="p0", first_place=1, second_place=4, third_place=2))
+    leaderboard = json.loads(queue.get_nowait().split(b"data: ")[1])
+    # Ranks included, as in the full leaderboard
+    assert leaderboard["changed"] == sorted(tournament_repo.get_leaderboard_rows(), key=lambda row: row["wineId"])
+
+    # Two events per ballot overflow the queue: the backlog is replaced by a resync
+    for i in (1, 2):
+        await uc.submit_vote(Vote(participant_id=f"p{i}", first_place=1 + i, second_place=4, third_place=1))
+    assert queue.get_nowait() is RESYNC and queue.empty()
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Set
+from utils import fast_json
+
+# Queued in place of events a slow subscriber missed; the stream answers it with a snapshot
+RESYNC = object()
+
+
+class TournamentBroadcaster:
+    """Fan-out of tournament change events to Server-Sent Events subscribers.
+
+    Each event is serialized once and the same bytes are queued for every
+    subscriber. Subscribers apply events as deltas, so none may be lost: when a
+    slow subscriber's bounded queue is full, its backlog is replaced by `RESYNC`
+    and the stream sends it a fresh snapshot instead of the missed events.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: str, data) -> None:
+        if not self._subscribers:
+            return
+        payload = format_event(event, data)
+        for queue in list(self._subscribers):
+            if queue.full():
+                # The snapshot it will get covers this event and everything dropped here
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+            else:
+                queue.put_nowait(payload)
+
+
+def format_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + fast_json.dumps(data) + b"\n\n"
@@ -0,0 +1,179 @@
+import abc
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import inject
+from loguru import logger
+from app.model.tournament import Tournament, CreateTournamentRequest, TournamentCatalogRepository
+from app.model.wine_tournament import TournamentRepository
+from app.usecase.wine_tournament import WineTournamentUCImpl
+from app.usecase.vote_ingestion import DEFAULT_MAX_PENDING
+
+
+class TournamentManagerUC(abc.ABC):
+    @abc.abstractmethod
+    async def create_tournament(self, request: CreateTournamentRequest) -> Tournament:
+        pass
+
+    @abc.abstractmethod
+    async def get_tournament(self, tournament_id: str) -> Optional[Tournament]:
+        pass
+
+    @abc.abstractmethod
+    async def get_all_tournaments(self) -> List[Tournament]:
+        pass
+
+    @abc.abstractmethod
+    async def get_tournament_uc(self, tournament_id: str) -> Optional[WineTournamentUCImpl]:
+        pass
+
+    @abc.abstractmethod
+    def use_tournament(self, tournament_id: str) -> AsyncIterator[Optional[WineTournamentUCImpl]]:
+        pass
+
+
+class TournamentManagerUCImpl(TournamentManagerUC):
+    """Loads one use case (own repository, lock, holds and stream) per tournament on first use.
+
+    Tournaments never share files or locks, so writes to one event do not wait
+    on or rescan another. Loaded tournaments are kept in LRU order and the
+    least recently used idle ones are unloaded beyond `max_loaded` or after
+    `idle_seconds` without requests. Tournaments pinned by `use_tournament` are
+    never unloaded, so a request never sees its repository closed under it.
+
+    Repositories are opened (files parsed, logs replayed) and closed on worker
+    threads so requests for other tournaments never wait on them, and
+    concurrent first requests for a tournament share one load.
+    """
+    catalog_repo: TournamentCatalogRepository = inject.attr(TournamentCatalogRepository)
+
+    def __init__(self, repository_factory: Callable[[str], TournamentRepository], max_loaded: int = 32,
+                 idle_seconds: float = 3600, reservation_ttl_seconds: float = 120,
+                 vote_queue_size: int = DEFAULT_MAX_PENDING):
+        self.repository_factory = repository_factory
+        self.max_loaded = max_loaded
+        self.idle_seconds = idle_seconds
+        self.reservation_ttl_seconds = reservation_ttl_seconds
+        self.vote_queue_size = vote_queue_size
+        # tournament id -> [use case, last access time], least recently used first
+        self._loaded: "OrderedDict[str, List]" = OrderedDict()
+        # tournament id -> requests using it; counted before the load so it cannot be unloaded under them
+        self._users: Dict[str, int] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._closing: Dict[str, asyncio.Task] = {}
+
+    async def create_tournament(self, request: CreateTournamentRequest) -> Tournament:
+        tournament = Tournament(
+            id=uuid.uuid4().hex,
+            name=request.name,
+            total_wines=request.total_wines,
+            max_participants_per_wine=request.max_participants_per_wine,
+            created_at=time.time()
+        )
+        self.catalog_repo.save_tournament(tournament)
+        return tournament
+
+    async def get_tournament(self, tournament_id: str) -> Optional[Tournament]:
+        return self.catalog_repo.get_tournament(tournament_id)
+
+    async def get_all_tournaments(self) -> List[Tournament]:
+        return self.catalog_repo.get_all_tournaments()
+
+    async def get_tournament_uc(self, tournament_id: str) -> Optional[WineTournamentUCImpl]:
+        entry = await self._touch(tournament_id)
+        return entry[0] if entry is not None else None
+
+    @asynccontextmanager
+    async def use_tournament(self, tournament_id: str) -> AsyncIterator[Optional[WineTournamentUCImpl]]:
+        """The tournament's use case, kept loaded until the block exits (None if unknown)"""
+        self._users[tournament_id] = self._users.get(tournament_id, 0) + 1
+        try:
+            entry = await self._touch(tournament_id)
+            yield entry[0] if entry is not None else None
+        finally:
+            self._users[tournament_id] -= 1
+            if not self._users[tournament_id]:
+                del self._users[tournament_id]
+
+    async def _touch(self, tournament_id: str) -> Optional[list]:
+        entry = self._loaded.get(tournament_id)
+        if entry is None:
+            loading = self._loading.get(tournament_id)
+            if loading is None:
+                tournament = self.catalog_repo.get_tournament(tournament_id)
+                if tournament is None:
+                    return None
+                loading = asyncio.ensure_future(self._load(tournament))
+                self._loading[tournament_id] = loading
+            # Shielded so a request giving up does not cancel the load others are waiting for
+            entry = await asyncio.shield(loading)
+        now = time.time()
+        entry[1] = now
+        if tournament_id in self._loaded:
+            self._loaded.move_to_end(tournament_id)
+        self.evict(now)
+        return entry
+
+    def loaded_tournaments(self) -> List[str]:
+        return list(self._loaded)
+
+    def loaded_use_cases(self) -> List[WineTournamentUCImpl]:
+        return [uc for uc, _ in self._loaded.values()]
+
+    def evict(self, now: Optional[float] = None):
+        """Unload idle tournaments over the size limit or past the idle timeout"""
+        now = time.time() if now is None else now
+        excess = len(self._loaded) - self.max_loaded
+        # The most recently used tournament is never unloaded (it is the one being requested)
+        for tournament_id, (uc, last_access) in list(self._loaded.items())[:-1]:
+            if excess <= 0 and now - last_access < self.idle_seconds:
+                # Everything after this one was used more recently
+                break
+            if tournament_id in self._users or not uc.is_idle():
+                continue
+            self._unload(tournament_id)
+            excess -= 1
+
+    async def wait_closed(self):
+        """Wait until the repositories of unloaded tournaments are closed"""
+        await asyncio.gather(*self._closing.values())
+
+    async def _load(self, tournament: Tournament) -> list:
+        try:
+            closing = self._closing.get(tournament.id)
+            if closing is not None:
+                # The previous instance has to let go of the files before they are opened again
+                await asyncio.shield(closing)
+            logger.info(f"Loading tournament {tournament.id}")
+            repo = await asyncio.to_thread(self.repository_factory, tournament.id)
+            uc = WineTournamentUCImpl(
+                max_participants_per_wine=tournament.max_participants_per_wine,
+                reservation_ttl_seconds=self.reservation_ttl_seconds,
+                tournament_repo=repo,
+                total_wines=tournament.total_wines,
+                vote_queue_size=self.vote_queue_size
+            )
+            entry = [uc, time.time()]
+            self._loaded[tournament.id] = entry
+            return entry
+        finally:
+            del self._loading[tournament.id]
+
+    def _unload(self, tournament_id: str):
+        uc, _ = self._loaded.pop(tournament_id)
+        logger.info(f"Unloading tournament {tournament_id}")
+        self._closing[tournament_id] = asyncio.ensure_future(self._close(tournament_id, uc))
+
+    async def _close(self, tournament_id: str, uc: WineTournamentUCImpl):
+        try:
+            close = getattr(uc.tournament_repo, "close", None)
+            if close is not None:
+                await asyncio.to_thread(close)
+        except Exception as e:
+            logger.error(f"Closing tournament {tournament_id} failed: {e}")
+        finally:
+            if self._closing.get(tournament_id) is asyncio.current_task():
+                del self._closing[tournament_id]
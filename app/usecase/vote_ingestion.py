@@ -0,0 +1,131 @@
+import asyncio
+import math
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+from app.metrics import VOTE_COMMIT_BATCH, VOTE_COMMIT_SECONDS, VOTES_REJECTED
+from app.model.wine_tournament import Vote
+
+DEFAULT_MAX_PENDING = 5000
+DEFAULT_MAX_BATCH = 1000
+# Commit latencies kept for the percentiles in `stats`
+LATENCY_WINDOW = 1000
+
+
+class VoteQueueFull(Exception):
+    """The ingestion queue cannot take more ballots right now; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Vote queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class VoteBatchTooLarge(Exception):
+    """More ballots in one submission than the queue can ever hold; retrying cannot help"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"At most {max_size} ballots can be submitted at once")
+        self.max_size = max_size
+
+
+class VoteIngestionQueue:
+    """Bounded queue between validated ballots and the repository.
+
+    Callers wait until the batch holding their ballot is durable. A single
+    committer task drains the queue: everything that arrived while the
+    previous batch was being written goes out as the next batch, so a burst of
+    ballots turns into a few large writes instead of one write per ballot.
+    Within a batch only each participant's latest ballot is written, which is
+    what saving them one by one would have left behind.
+    """
+
+    def __init__(self, commit: Callable[[List[Vote]], Awaitable[None]], max_pending: int = DEFAULT_MAX_PENDING,
+                 max_batch: int = DEFAULT_MAX_BATCH):
+        self.commit = commit
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self._pending: Deque[Tuple[Vote, asyncio.Future]] = deque()
+        self._committer: Optional[asyncio.Task] = None
+        # Ballots taken off the queue by the batch being written
+        self._in_flight = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.committed = 0
+        self.batches = 0
+        self.rejected = 0
+
+    def __len__(self):
+        """Ballots not yet durable, queued or being written"""
+        return len(self._pending) + self._in_flight
+
+    async def submit(self, votes: List[Vote]):
+        """Queue ballots (all or none) and wait until they are durable"""
+        if not votes:
+            return
+        if len(votes) > self.max_pending:
+            raise VoteBatchTooLarge(self.max_pending)
+        if len(self) + len(votes) > self.max_pending:
+            self.rejected += len(votes)
+            VOTES_REJECTED.inc(len(votes))
+            raise VoteQueueFull(self.retry_after())
+        loop = asyncio.get_running_loop()
+        futures = []
+        for vote in votes:
+            future = loop.create_future()
+            self._pending.append((vote, future))
+            futures.append(future)
+        if self._committer is None or self._committer.done():
+            self._committer = asyncio.create_task(self._drain())
+        await asyncio.gather(*futures)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should be written, from recent commit latency"""
+        batches = math.ceil(len(self._pending) / self.max_batch) + 1
+        return max(1, math.ceil(batches * self._mean_latency()))
+
+    def stats(self) -> dict:
+        ordered = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))] * 1000 if ordered else 0.0
+
+        return {
+            "depth": len(self._pending),
+            "in_flight": self._in_flight,
+            "max_pending": self.max_pending,
+            "committed": self.committed,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "commit_p50_ms": pct(50),
+            "commit_p99_ms": pct(99),
+        }
+
+    def _mean_latency(self) -> float:
+        return sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            # Latest ballot per participant, in the order those ballots arrived
+            latest = {}
+            for vote, _ in batch:
+                latest.pop(vote.participant_id, None)
+                latest[vote.participant_id] = vote
+            started = loop.time()
+            self._in_flight = len(batch)
+            try:
+                await self.commit(list(latest.values()))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._in_flight = 0
+            self._latencies.append(loop.time() - started)
+            VOTE_COMMIT_SECONDS.observe(self._latencies[-1])
+            VOTE_COMMIT_BATCH.observe(len(batch))
+            self.committed += len(batch)
+            self.batches += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
@@ -0,0 +1,83 @@
+import random
+from typing import Dict, List, Optional
+
+
+class _Bucket:
+    """Set of wine ids with O(1) add, remove and random sampling"""
+
+    def __init__(self):
+        self.items: List[int] = []
+        self._index: Dict[int, int] = {}
+
+    def add(self, wine_id: int):
+        self._index[wine_id] = len(self.items)
+        self.items.append(wine_id)
+
+    def remove(self, wine_id: int):
+        index = self._index.pop(wine_id)
+        last = self.items.pop()
+        if last != wine_id:
+            self.items[index] = last
+            self._index[last] = index
+
+    def __len__(self):
+        return len(self.items)
+
+
+class WineAllocator:
+    """Bucket queue of wines by current occupancy.
+
+    Bucket `n` holds the wines currently tasted by `n` participants; full wines are
+    in no bucket. Picking the k least-loaded wines walks the buckets from the
+    bottom and samples inside a bucket, so ties are broken at random and the
+    cost does not depend on the number of wines.
+    """
+
+    def __init__(self, total_wines: int, max_participants_per_wine: int, occupancy: Optional[Dict[int, int]] = None,
+                 rng: Optional[random.Random] = None):
+        self.total_wines = total_wines
+        self.max_participants_per_wine = max_participants_per_wine
+        self._rng = rng or random.Random()
+        self._load: Dict[int, int] = {}
+        self._buckets = [_Bucket() for _ in range(max_participants_per_wine)]
+        occupancy = occupancy or {}
+        for wine_id in range(1, total_wines + 1):
+            load = occupancy.get(wine_id, 0)
+            self._load[wine_id] = load
+            if load < max_participants_per_wine:
+                self._buckets[load].add(wine_id)
+
+    def pick(self, k: int) -> List[int]:
+        """The k least-loaded wines with free capacity (fewer if the tournament is nearly full)"""
+        picked: List[int] = []
+        for bucket in self._buckets:
+            missing = k - len(picked)
+            if missing <= 0:
+                break
+            picked.extend(self._rng.sample(bucket.items, min(len(bucket), missing)))
+        return picked
+
+    def assign(self, k: int) -> List[int]:
+        """Pick k wines and count the assignment against them"""
+        wine_ids = self.pick(k)
+        self.adjust(wine_ids, 1)
+        return wine_ids
+
+    def assign_many(self, count: int, k: int) -> List[List[int]]:
+        return [self.assign(k) for _ in range(count)]
+
+    def adjust(self, wine_ids: List[int], delta: int):
+        for wine_id in wine_ids:
+            load = self._load.get(wine_id)
+            if load is None:
+                # Outside this tournament's wine range
+                continue
+            new_load = max(load + delta, 0)
+            if load < self.max_participants_per_wine:
+                self._buckets[load].remove(wine_id)
+            if new_load < self.max_participants_per_wine:
+                self._buckets[new_load].add(wine_id)
+            self._load[wine_id] = new_load
+
+    def available_wines(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets)
@@ -0,0 +1,72 @@
+import heapq
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class WineReservations:
+    """Short-lived holds on wine slots between suggest and confirm.
+
+    A hold counts against a wine's capacity until it is committed, released or
+    its TTL runs out. Expired holds are dropped lazily on every access.
+    Not thread-safe: callers serialize access (the use case holds a lock).
+    """
+
+    def __init__(self, ttl_seconds: float = 120, on_change: Optional[Callable[[List[int], int], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        # Called with (wine_ids, +1/-1) whenever held slots change, including expiry
+        self.on_change = on_change
+        self._holds: Dict[str, Tuple[List[int], float]] = {}
+        self._held_counts: Dict[int, int] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def hold(self, participant_id: str, wine_ids: List[int]) -> float:
+        """Hold `wine_ids` for the participant, replacing any previous hold, and return its expiry time"""
+        self.release(participant_id)
+        expires_at = time.time() + self.ttl_seconds
+        self._holds[participant_id] = (list(wine_ids), expires_at)
+        self._adjust(list(wine_ids), 1)
+        heapq.heappush(self._expiry_heap, (expires_at, participant_id))
+        return expires_at
+
+    def release(self, participant_id: str):
+        hold = self._holds.pop(participant_id, None)
+        if hold is not None:
+            self._adjust(hold[0], -1)
+
+    def get_held_counts(self, wine_ids: Optional[Iterable[int]] = None,
+                        exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        """Held slots per wine, optionally ignoring the participant's own hold"""
+        self.expire()
+        if wine_ids is None:
+            held = dict(self._held_counts)
+        else:
+            held = {wine_id: self._held_counts.get(wine_id, 0) for wine_id in wine_ids}
+        own = self._holds.get(exclude_participant_id) if exclude_participant_id else None
+        if own is not None:
+            for wine_id in own[0]:
+                if wine_id in held:
+                    held[wine_id] -= 1
+        return held
+
+    def expire(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, participant_id = heapq.heappop(self._expiry_heap)
+            hold = self._holds.get(participant_id)
+            # Skip heap entries left behind by holds that were replaced or released
+            if hold is not None and hold[1] == expires_at:
+                self.release(participant_id)
+
+    def __len__(self):
+        self.expire()
+        return len(self._holds)
+
+    def _adjust(self, wine_ids: List[int], delta: int):
+        if self.on_change is not None:
+            self.on_change(wine_ids, delta)
+        for wine_id in wine_ids:
+            count = self._held_counts.get(wine_id, 0) + delta
+            if count:
+                self._held_counts[wine_id] = count
+            else:
+                self._held_counts.pop(wine_id, None)
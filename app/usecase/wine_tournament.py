@@ -1,7 +1,9 @@
 import abc
+import asyncio
 import uuid
-import random
-from typing import List, Dict
+from itertools import islice
+from collections import OrderedDict
+from typing import List, Dict, Iterator, Optional, Tuple
 import inject
 from app.model.wine_tournament import (
     TournamentRepository, 
@@ -9,8 +11,23 @@ from app.model.wine_tournament import (
     Vote, 
     WineScore, 
     CreateParticipantRequest,
-    CreateParticipantResponse
+    CreateParticipantResponse,
+    BatchItemResult
 )
+from app.model.records import ParticipantRecord, VoteRecord
+from app.model.vote_columns import wine_analytics_rows, counts_to_array
+from app.model.ranking import ranking_rows
+from utils.chunks import chunks
+from app.usecase.wine_allocator import WineAllocator
+from app.usecase.wine_reservations import WineReservations
+from app.usecase.tournament_events import TournamentBroadcaster
+from app.usecase.vote_ingestion import VoteIngestionQueue, DEFAULT_MAX_PENDING
+from app.tracing import REPOSITORY, traced
+
+WINES_PER_PARTICIPANT = 5
+BATCH_CHUNK_SIZE = 500
+# Allocators kept for tournament sizes seen recently; each one is O(total_wines)
+MAX_ALLOCATORS = 4
 
 
 class WineTournamentUC(abc.ABC):
@@ -27,7 +44,7 @@ class WineTournamentUC(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def get_leaderboard(self) -> List[WineScore]:
+    async def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
         pass
 
     @abc.abstractmethod
@@ -36,31 +53,64 @@ class WineTournamentUC(abc.ABC):
 
 
 class WineTournamentUCImpl(WineTournamentUC):
-    tournament_repo: TournamentRepository = inject.attr(TournamentRepository)
+    _injected_repo: TournamentRepository = inject.attr(TournamentRepository)
 
-    def __init__(self, max_participants_per_wine: int = 5):
+    def __init__(self, max_participants_per_wine: int = 5, reservation_ttl_seconds: float = 120,
+                 tournament_repo: Optional[TournamentRepository] = None, total_wines: Optional[int] = None,
+                 vote_queue_size: int = DEFAULT_MAX_PENDING):
         self.max_participants_per_wine = max_participants_per_wine
+        # Per-tournament instances get their own repository; the default one uses the injected binding
+        self._tournament_repo = tournament_repo
+        # Fixed wine count of a configured tournament, overriding the per-request value
+        self.total_wines = total_wines
+        # Suggested wines are held until confirmed or expired so parallel suggestions cannot overbook
+        self.reservations = WineReservations(ttl_seconds=reservation_ttl_seconds, on_change=self._on_occupancy_change)
+        # Single writer for every capacity decision (suggest, confirm)
+        self._capacity_lock = asyncio.Lock()
+        # Occupancy bucket queues (stored assignments + holds), for the most recently used tournament sizes
+        self._allocators: "OrderedDict[int, WineAllocator]" = OrderedDict()
+        # Slots taken by a batch registration that is validated but not yet saved
+        self._pending_batch: Dict[int, int] = {}
+        # Live leaderboard / voting progress pushed to stream subscribers
+        self.events = TournamentBroadcaster()
+        # Validated ballots wait here for the next group commit
+        self.vote_queue = VoteIngestionQueue(self._commit_votes, max_pending=vote_queue_size)
+        # Position in the repository's change feed (writes by other worker processes)
+        self._change_seq: Optional[int] = None
+        # method -> (repository version, full ranking); Schulze is cubic in the wine count
+        self._rankings: Dict[str, Tuple[int, List[dict]]] = {}
+
+    @property
+    def tournament_repo(self) -> TournamentRepository:
+        repo = self._tournament_repo if self._tournament_repo is not None else self._injected_repo
+        return traced(repo, REPOSITORY)
+
+    def is_idle(self) -> bool:
+        """No stream subscribers, pending holds or ballots, or capacity decision in progress"""
+        return (not self.events.subscriber_count and not len(self.reservations) and not len(self.vote_queue)
+                and not self._capacity_lock.locked())
 
     async def create_participant(self, request: CreateParticipantRequest, total_wines: int) -> CreateParticipantResponse:
+        async with self._capacity_lock:
+            return await self._suggest_and_hold(request, total_wines)
+
+    async def create_participants(self, requests: List[CreateParticipantRequest],
+                                  total_wines: int) -> List[CreateParticipantResponse]:
+        """Suggest and hold wines for a whole list of registrants in one pass"""
+        async with self._capacity_lock:
+            return [await self._suggest_and_hold(request, total_wines) for request in requests]
+
+    async def _suggest_and_hold(self, request: CreateParticipantRequest, total_wines: int) -> CreateParticipantResponse:
+        total_wines = self._resolve_total_wines(total_wines)
         participant_id = str(uuid.uuid4())
-        
-        # If wines not provided, generate random suggestions
-        if not request.assigned_wines:
-            suggested_wines = await self._generate_wine_suggestions(total_wines)
-        else:
-            suggested_wines = request.assigned_wines
-            # Validate the wine assignment
-            is_valid = await self.validate_wine_assignment(suggested_wines)
-            if not is_valid:
-                # If invalid, generate new suggestions
-                suggested_wines = await self._generate_wine_suggestions(total_wines)
-        
-        # Always validate the final suggestions before returning
-        is_valid = await self.validate_wine_assignment(suggested_wines)
-        if not is_valid:
-            # If even generated suggestions are invalid, try one more time
+
+        suggested_wines = request.assigned_wines
+        # Requested wines are kept only if they still fit, otherwise the allocator picks
+        if not suggested_wines or not await self.validate_wine_assignment(suggested_wines):
             suggested_wines = await self._generate_wine_suggestions(total_wines)
 
+        hold_expires_at = self.reservations.hold(participant_id, suggested_wines)
+
         participant = Participant(
             id=participant_id,
             name=request.name,
@@ -69,130 +119,306 @@ class WineTournamentUCImpl(WineTournamentUC):
 
         return CreateParticipantResponse(
             participant=participant,
-            suggested_wines=suggested_wines
+            suggested_wines=suggested_wines,
+            hold_expires_at=hold_expires_at
         )
 
     async def confirm_participant(self, participant: Participant) -> bool:
-        # Final validation before saving (exclude current participant from wine counts)
-        is_valid = await self.validate_wine_assignment_for_participant(participant.assigned_wines, participant.id)
-        if is_valid:
-            self.tournament_repo.save_participant(participant)
-            return True
-        return False
+        if not self._is_valid_wine_list(participant.assigned_wines):
+            return False
+
+        async with self._capacity_lock:
+            # Slots held by other pending participants count against capacity, our own hold does not
+            held_by_others = self.reservations.get_held_counts(participant.assigned_wines, participant.id)
+            previous = self.tournament_repo.get_participant(participant.id)
+            saved = await self.tournament_repo.save_participant_within_capacity_async(
+                participant, self.max_participants_per_wine, reserved=held_by_others
+            )
+            if saved:
+                if previous is not None:
+                    self._on_occupancy_change(previous.assigned_wines, -1)
+                self._on_occupancy_change(participant.assigned_wines, 1)
+                self.reservations.release(participant.id)
+        if saved:
+            self._publish_participants([participant])
+        return saved
 
     async def get_all_participants(self) -> List[Participant]:
-        return self.tournament_repo.get_all_participants()
+        return await self.tournament_repo.get_all_participants_async()
 
     async def submit_vote(self, vote: Vote) -> bool:
+        """Validate the ballot and return once it is durable; raises VoteQueueFull under overload"""
+        if self._vote_error(vote) is not None:
+            return False
+
+        await self.vote_queue.submit([vote])
+        return True
+
+    async def _commit_votes(self, votes: List[Vote]):
+        previous = []
+        if self.events.subscriber_count:
+            previous = [v for v in (self.tournament_repo.get_vote(vote.participant_id) for vote in votes) if v]
+        await self.tournament_repo.save_votes_async(votes)
+        self._publish_votes(votes, previous)
+
+    async def register_participants(self, requests: List[CreateParticipantRequest],
+                                    total_wines: int) -> List[BatchItemResult]:
+        """Assign and confirm a list of registrants, validated in one pass and saved in one write"""
+        results: List[BatchItemResult] = []
+        accepted: List[Participant] = []
+        async with self._capacity_lock:
+            self.reservations.expire()
+            allocator = self._allocator(self._resolve_total_wines(total_wines))
+            for batch in chunks(list(enumerate(requests)), BATCH_CHUNK_SIZE):
+                for index, request in batch:
+                    wine_ids = request.assigned_wines
+                    if wine_ids and not await self.validate_wine_assignment(wine_ids):
+                        results.append(BatchItemResult(index=index, success=False,
+                                                       error="Invalid wine assignment - some wines exceed maximum participants"))
+                        continue
+                    wine_ids = wine_ids or allocator.pick(WINES_PER_PARTICIPANT)
+                    if not wine_ids:
+                        results.append(BatchItemResult(index=index, success=False, error="Tournament is full"))
+                        continue
+                    participant = Participant(id=str(uuid.uuid4()), name=request.name, assigned_wines=wine_ids)
+                    # Later items in the batch are validated and allocated against this one
+                    self._batch_occupancy_change(wine_ids, 1)
+                    accepted.append(participant)
+                    results.append(BatchItemResult(index=index, success=True, id=participant.id,
+                                                   assigned_wines=wine_ids))
+                # Let other requests run between chunks of a large batch
+                await asyncio.sleep(0)
+
+            try:
+                await self.tournament_repo.save_participants_async(accepted)
+            except Exception:
+                # Nothing was stored, so rebuild the allocators from the repository
+                self.reset_allocators()
+                raise
+            finally:
+                self._pending_batch.clear()
+        self._publish_participants(accepted)
+        return results
+
+    async def submit_votes(self, votes: List[Vote]) -> List[BatchItemResult]:
+        """Validate a list of ballots in one pass and save the valid ones in one write"""
+        results: List[BatchItemResult] = []
+        accepted: List[Vote] = []
+        for batch in chunks(list(enumerate(votes)), BATCH_CHUNK_SIZE):
+            for index, vote in batch:
+                error = self._vote_error(vote)
+                if error is None:
+                    accepted.append(vote)
+                results.append(BatchItemResult(index=index, success=error is None, id=vote.participant_id, error=error))
+            await asyncio.sleep(0)
+
+        await self.vote_queue.submit(accepted)
+        return results
+
+    def _vote_error(self, vote: Vote) -> Optional[str]:
         # Validate that participant exists
         participant = self.tournament_repo.get_participant(vote.participant_id)
         if not participant:
-            return False
+            return "Unknown participant"
 
         # Validate that all voted wines are assigned to the participant
         voted_wines = {vote.first_place, vote.second_place, vote.third_place}
         if not voted_wines.issubset(set(participant.assigned_wines)):
-            return False
+            return "Voted wines must be assigned to the participant"
 
-        # Validate that all positions are different wines
+        # Validate that all positions are different wines.
+        # Participants with fewer than 5 wines (tournament nearly full) still need 3 different wines
         if len(voted_wines) != 3:
-            return False
-        
-        # Handle case where participant has fewer than 5 wines (when tournament is nearly full)
-        if len(participant.assigned_wines) < 5:
-            # Allow voting with fewer wines, but all 3 votes must still be for different wines
-            pass
+            return "First, second and third place must be different wines"
 
-        self.tournament_repo.save_vote(vote)
-        return True
+        return None
+
+    async def get_voting_stats(self) -> dict:
+        statuses = [participant_status(participant, voted) for _, participant, voted in self.iter_participants()]
+        return {**await self.get_voting_totals(), "participant_status": statuses}
+
+    async def get_voting_totals(self) -> dict:
+        return self._voting_totals(self.tournament_repo.count_votes(), self.tournament_repo.count_participants())
+
+    def iter_participants(self, after: int = 0, has_voted: Optional[bool] = None,
+                          name_prefix: Optional[str] = None) -> Iterator[Tuple[int, Participant, bool]]:
+        """(position, participant, has_voted) in registration order, lazily, for streaming"""
+        return self.tournament_repo.iter_participants(after, has_voted, name_prefix)
+
+    async def get_participants_page(self, after: int = 0, limit: int = 100, has_voted: Optional[bool] = None,
+                                    name_prefix: Optional[str] = None) -> Tuple[List[Tuple[Participant, bool]], Optional[int]]:
+        """One page of (participant, has_voted) and the position to continue after, or None on the last page"""
+        rows = list(islice(self.iter_participants(after, has_voted, name_prefix), limit + 1))
+        next_after = rows[limit - 1][0] if len(rows) > limit else None
+        return [(participant, voted) for _, participant, voted in rows[:limit]], next_after
+
+    async def get_stream_snapshot(self) -> dict:
+        """Full state a new stream subscriber starts from before applying deltas"""
+        return {
+            "leaderboard": await self.get_leaderboard_rows(),
+            "voting": await self.get_voting_stats(),
+            "participants": await self.get_participant_rows(),
+        }
 
-    async def get_leaderboard(self) -> List[WineScore]:
-        votes = self.tournament_repo.get_all_votes()
-        wine_scores = {}
+    @staticmethod
+    def _voting_totals(total_votes: int, total_participants: int) -> dict:
+        voting_percentage = (total_votes / total_participants * 100) if total_participants > 0 else 0
+        return {
+            "total_votes": total_votes,
+            "total_participants": total_participants,
+            "voting_percentage": round(voting_percentage, 1),
+        }
 
+    def apply_external_changes(self) -> int:
+        """Catch up with writes committed by other worker processes sharing the repository.
+
+        Allocators are rebuilt from the store and the changes are republished to
+        this process's stream subscribers. Holds stay per process: the capacity
+        check on confirm is what keeps workers from overbooking.
+        """
+        self._change_seq, changes = self.tournament_repo.get_changes_since(self._change_seq)
+        if not changes:
+            return 0
+        # Written (and validated) by another worker
+        participants = [ParticipantRecord.from_wire(c.record) for c in changes if c.kind == "participant"]
+        votes = [VoteRecord.from_wire(c.record) for c in changes if c.kind == "vote"]
+        previous_votes = [VoteRecord.from_wire(c.previous) for c in changes if c.kind == "vote" and c.previous]
+        if participants:
+            self.reset_allocators()
+            self._publish_participants(participants)
+        self._publish_votes(votes, previous_votes)
+        return len(changes)
+
+    def _publish_votes(self, votes: List[Vote], previous_votes: List[Vote]):
+        if not votes or not self.events.subscriber_count:
+            return
+        # Every wine whose score moved: the new ballots' and the replaced ballots'
+        changed = {wine_id for vote in votes + previous_votes
+                   for wine_id in (vote.first_place, vote.second_place, vote.third_place)}
+        scores = {row["wineId"]: row for row in self.tournament_repo.get_leaderboard_rows_for(changed)}
+        self.events.publish("leaderboard", {"changed": [
+            scores.get(wine_id) or WineScore(wine_id=wine_id, total_points=0).dict(by_alias=True)
+            for wine_id in sorted(changed)
+        ]})
+        statuses = {}
         for vote in votes:
-            # First place: 3 points
-            wine_scores[vote.first_place] = wine_scores.get(vote.first_place, 0) + 3
-            # Second place: 2 points
-            wine_scores[vote.second_place] = wine_scores.get(vote.second_place, 0) + 2
-            # Third place: 1 point
-            wine_scores[vote.third_place] = wine_scores.get(vote.third_place, 0) + 1
-
-        # Convert to list of WineScore objects and sort by points descending
-        leaderboard = [
-            WineScore(wine_id=wine_id, total_points=points)
-            for wine_id, points in wine_scores.items()
-        ]
-        
-        return sorted(leaderboard, key=lambda x: x.total_points, reverse=True)
+            participant = self.tournament_repo.get_participant(vote.participant_id)
+            statuses[vote.participant_id] = participant_status(participant, True)
+        self._publish_progress(list(statuses.values()))
+
+    def _publish_participants(self, participants: List[Participant]):
+        if not participants or not self.events.subscriber_count:
+            return
+        self.events.publish("participants", {"participants": [p.to_wire() for p in participants]})
+        self._publish_progress([
+            participant_status(p, self.tournament_repo.get_vote(p.id) is not None) for p in participants
+        ])
+
+    def _publish_progress(self, participant_status: List[dict]):
+        totals = self._voting_totals(self.tournament_repo.count_votes(), self.tournament_repo.count_participants())
+        self.events.publish("progress", {**totals, "participant_status": participant_status})
+
+    async def get_leaderboard(self, top: Optional[int] = None) -> List[WineScore]:
+        # Ranked by points, then first/second/third places, then wine id
+        return self.tournament_repo.get_leaderboard(top)
+
+    async def get_leaderboard_rows(self, top: Optional[int] = None) -> List[dict]:
+        """The leaderboard ready to encode, without building a model per wine"""
+        return self.tournament_repo.get_leaderboard_rows(top)
+
+    async def get_wine_analytics(self, top: Optional[int] = None, order_by: str = "points") -> List[dict]:
+        """Per-wine scoring with exposure-normalized figures, ready to encode"""
+        repo = self.tournament_repo
+        return wine_analytics_rows(repo.get_place_counts(), counts_to_array(repo.get_wine_counts()), top, order_by)
+
+    async def get_rankings(self, method: str = "points", top: Optional[int] = None) -> List[dict]:
+        """Wines ranked by one of the RANKING_METHODS, ready to encode"""
+        version = self.tournament_repo.get_version()
+        cached = self._rankings.get(method)
+        if version is None or cached is None or cached[0] != version:
+            rows = ranking_rows(await self.tournament_repo.get_ballot_tally_async(), method)
+            if version is None:
+                return rows[:top]
+            cached = self._rankings[method] = version, rows
+        return cached[1][:top]
+
+    async def get_participant_rows(self) -> List[dict]:
+        """All participants ready to encode, without building a model per participant"""
+        return self.tournament_repo.get_participant_rows()
 
     async def validate_wine_assignment(self, wine_ids: List[int]) -> bool:
-        # Allow fewer than 5 wines when tournament is nearly full
-        if len(wine_ids) < 1 or len(wine_ids) > 5:
+        if not self._is_valid_wine_list(wine_ids):
             return False
 
-        # Check for duplicate wine IDs
-        if len(wine_ids) != len(set(wine_ids)):
+        occupancy = self._effective_occupancy(wine_ids)
+        return all(count < self.max_participants_per_wine for count in occupancy.values())
+
+    async def validate_wine_assignment_for_participant(self, wine_ids: List[int], participant_id: str) -> bool:
+        if not self._is_valid_wine_list(wine_ids):
             return False
 
-        wine_counts = self.tournament_repo.get_wine_counts()
-        
-        for wine_id in wine_ids:
-            current_count = wine_counts.get(wine_id, 0)
-            if current_count >= self.max_participants_per_wine:
-                return False
+        # Occupancy excluding this participant's previous assignment and hold
+        occupancy = self._effective_occupancy(wine_ids, exclude_participant_id=participant_id)
+        return all(count < self.max_participants_per_wine for count in occupancy.values())
 
-        return True
-
-    async def validate_wine_assignment_for_participant(self, wine_ids: List[int], participant_id: str) -> bool:
+    def _is_valid_wine_list(self, wine_ids: List[int]) -> bool:
         # Allow fewer than 5 wines when tournament is nearly full
-        if len(wine_ids) < 1 or len(wine_ids) > 5:
+        if len(wine_ids) < 1 or len(wine_ids) > WINES_PER_PARTICIPANT:
             return False
 
-        # Check for duplicate wine IDs
-        if len(wine_ids) != len(set(wine_ids)):
+        # Configured tournaments know their wines
+        if self.total_wines is not None and not all(1 <= wine_id <= self.total_wines for wine_id in wine_ids):
             return False
 
-        # Get current wine counts excluding this participant
-        all_participants = self.tournament_repo.get_all_participants()
-        wine_counts = {}
-        
-        for participant in all_participants:
-            # Skip the current participant to exclude their previous assignment
-            if participant.id == participant_id:
-                continue
-                
-            for wine_id in participant.assigned_wines:
-                wine_counts[wine_id] = wine_counts.get(wine_id, 0) + 1
-        
-        # Now validate the new assignment
-        for wine_id in wine_ids:
-            current_count = wine_counts.get(wine_id, 0)
-            if current_count >= self.max_participants_per_wine:
-                return False
+        # Check for duplicate wine IDs
+        return len(wine_ids) == len(set(wine_ids))
 
-        return True
+    def _effective_occupancy(self, wine_ids: List[int], exclude_participant_id: Optional[str] = None) -> Dict[int, int]:
+        """Stored assignments plus pending holds for each wine"""
+        occupancy = self.tournament_repo.get_wine_occupancy(wine_ids, exclude_participant_id=exclude_participant_id)
+        held = self.reservations.get_held_counts(wine_ids, exclude_participant_id)
+        return {
+            wine_id: count + held.get(wine_id, 0) + self._pending_batch.get(wine_id, 0)
+            for wine_id, count in occupancy.items()
+        }
 
     async def _generate_wine_suggestions(self, total_wines: int) -> List[int]:
-        wine_counts = self.tournament_repo.get_wine_counts()
-        
-        # Get available wines (those with less than max participants)
-        available_wines = [
-            wine_id for wine_id in range(1, total_wines + 1)
-            if wine_counts.get(wine_id, 0) < self.max_participants_per_wine
-        ]
-        
-        # If we have enough available wines, great! If not, we'll use what we have
-        # and the validation will handle any edge cases
-        
-        if len(available_wines) >= 5:
-            # Normal case: randomly select 5 from available wines
-            return random.sample(available_wines, 5)
-        elif len(available_wines) > 0:
-            # Tournament nearly full: use all available wines
-            # This gives participants the best possible wine selection
-            return available_wines
+        # Least-loaded wines first; nearly full tournaments get fewer wines, full ones none
+        self.reservations.expire()
+        return self._allocator(total_wines).pick(WINES_PER_PARTICIPANT)
+
+    def _resolve_total_wines(self, total_wines: int) -> int:
+        return self.total_wines if self.total_wines is not None else total_wines
+
+    def _allocator(self, total_wines: int) -> WineAllocator:
+        allocator = self._allocators.get(total_wines)
+        if allocator is None:
+            occupancy = self.tournament_repo.get_wine_counts()
+            for wine_id, held in self.reservations.get_held_counts().items():
+                occupancy[wine_id] = occupancy.get(wine_id, 0) + held
+            for wine_id, pending in self._pending_batch.items():
+                occupancy[wine_id] = occupancy.get(wine_id, 0) + pending
+            allocator = WineAllocator(total_wines, self.max_participants_per_wine, occupancy)
+            self._allocators[total_wines] = allocator
+            if len(self._allocators) > MAX_ALLOCATORS:
+                self._allocators.popitem(last=False)
         else:
-            # Tournament completely full: return empty list 
-            # This will trigger appropriate error handling upstream
-            return []
\ No newline at end of file
+            self._allocators.move_to_end(total_wines)
+        return allocator
+
+    def _on_occupancy_change(self, wine_ids: List[int], delta: int):
+        for allocator in self._allocators.values():
+            allocator.adjust(wine_ids, delta)
+
+    def _batch_occupancy_change(self, wine_ids: List[int], delta: int):
+        for wine_id in wine_ids:
+            self._pending_batch[wine_id] = self._pending_batch.get(wine_id, 0) + delta
+        self._on_occupancy_change(wine_ids, delta)
+
+    def reset_allocators(self):
+        """Drop the allocators so they are rebuilt from the repository (after external writes)"""
+        self._allocators.clear()
+
+
+def participant_status(participant: Participant, voted: bool) -> dict:
+    return {"id": participant.id, "name": participant.name, "has_voted": voted}
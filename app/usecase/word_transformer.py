@@ -1,5 +1,6 @@
 import abc
 import uuid
+from typing import AsyncIterable, AsyncIterator, List
 
 import inject
 from app.model.word import WordRepository, Word
@@ -11,6 +12,11 @@ class WordTransformerUC(abc.ABC):
     async def reverse_and_concat(self, new_word: str) -> dict:
         pass
 
+    @abc.abstractmethod
+    async def reverse_and_concat_many(self, chunks: AsyncIterable[List[str]]) -> AsyncIterator[List[dict]]:
+        """Transform chunks of words as they arrive, yielding one list of results per chunk"""
+        pass
+
 
 class WordTransformerUCImpl(WordTransformerUC):
     word_repo: WordRepository = inject.attr(WordRepository)
@@ -30,3 +36,19 @@ class WordTransformerUCImpl(WordTransformerUC):
         )
         self.word_repo.save(word)
         return word.dict(by_alias=True)
+
+    async def reverse_and_concat_many(self, chunks: AsyncIterable[List[str]]) -> AsyncIterator[List[dict]]:
+        # Looked up before the first chunk so a failing gateway is reported before any result is produced
+        my_ip = await self.ip_gw.get_ip()
+        return self._transform_chunks(chunks, my_ip)
+
+    async def _transform_chunks(self, chunks: AsyncIterable[List[str]], my_ip: str) -> AsyncIterator[List[dict]]:
+        async for new_words in chunks:
+            words = [Word(
+                id=str(uuid.uuid4()),
+                word=new_word,
+                transformed_word=new_word[::-1] + self.concat_with,
+                from_ip=my_ip
+            ) for new_word in new_words]
+            self.word_repo.save_many(words)
+            yield [word.dict(by_alias=True) for word in words]
@@ -0,0 +1,120 @@
+"""Micro benchmarks for the tournament use case and repositories.
+
+    python -m benchmarks.bench_usecase --sizes 100 10000 100000 --backends json log sqlite \
+        --output benchmarks/results/usecase.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+import inject
+
+from app.model.wine_tournament import TournamentRepository, Participant, Vote
+from app.model.ranking import ranking_rows
+from app.repository.tournament_json import TournamentJsonRepository
+from app.repository.tournament_log import TournamentLogRepository
+from app.repository.tournament_sqlite import TournamentSqliteRepository
+from app.usecase.wine_tournament import WineTournamentUCImpl, WINES_PER_PARTICIPANT
+from benchmarks.harness import bench, print_table, write_results
+from utils import fast_json
+
+MAX_PARTICIPANTS_PER_WINE = 5
+
+
+def new_repository(backend: str, data_dir: str) -> TournamentRepository:
+    if backend == "json":
+        return TournamentJsonRepository(participants_file=os.path.join(data_dir, "participants.json"),
+                                        votes_file=os.path.join(data_dir, "votes.json"))
+    if backend == "log":
+        return TournamentLogRepository(data_dir=data_dir)
+    if backend == "sqlite":
+        return TournamentSqliteRepository(db_file=os.path.join(data_dir, "tournament.db"))
+    raise ValueError(f"Unknown backend {backend}")
+
+
+def total_wines_for(participants: int) -> int:
+    # Leave ~20% of the slots free so suggestions and validations have room
+    return max(WINES_PER_PARTICIPANT, int(participants * WINES_PER_PARTICIPANT / MAX_PARTICIPANTS_PER_WINE * 1.25))
+
+
+def populate(repo: TournamentRepository, participants: int, total_wines: int, rng: random.Random):
+    """Fill the repository with a realistic event: balanced assignments and one ballot per taster"""
+    loads = [0] * (total_wines + 1)
+    pool = list(range(1, total_wines + 1))
+    batch, votes = [], []
+    for i in range(participants):
+        wines = []
+        while len(wines) < WINES_PER_PARTICIPANT:
+            wine_id = rng.choice(pool)
+            if wine_id not in wines and loads[wine_id] < MAX_PARTICIPANTS_PER_WINE:
+                wines.append(wine_id)
+        for wine_id in wines:
+            loads[wine_id] += 1
+        participant_id = f"p{i}"
+        batch.append(Participant(id=participant_id, name=f"Taster {i}", assigned_wines=wines))
+        first, second, third = rng.sample(wines, 3)
+        votes.append(Vote(participant_id=participant_id, first_place=first, second_place=second, third_place=third))
+    repo.save_participants(batch)
+    repo.save_votes(votes)
+
+
+def run(sizes, backends, rounds: int, seed: int):
+    results = []
+    for backend in backends:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as data_dir:
+                rng = random.Random(seed)
+                repo = new_repository(backend, data_dir)
+                total_wines = total_wines_for(size)
+                populate(repo, size, total_wines, rng)
+                inject.clear_and_configure(lambda binder: binder.bind(TournamentRepository, repo))
+                uc = WineTournamentUCImpl(max_participants_per_wine=MAX_PARTICIPANTS_PER_WINE)
+                labels = {"backend": backend, "participants": size}
+
+                results.append(bench("get_leaderboard", uc.get_leaderboard, rounds=rounds, **labels))
+                results.append(bench("get_wine_counts", repo.get_wine_counts, rounds=rounds, **labels))
+                results.append(bench("get_wine_analytics", uc.get_wine_analytics, rounds=rounds, **labels))
+                # Uncached: the use case memoizes rankings per repository version
+                results.append(bench("ranking_schulze", lambda: ranking_rows(repo.get_ballot_tally(), "schulze"),
+                                     rounds=rounds, **labels))
+
+                async def validate():
+                    return await uc.validate_wine_assignment(rng.sample(range(1, total_wines + 1), 5))
+                results.append(bench("validate_wine_assignment", validate, rounds=rounds, **labels))
+
+                async def suggest():
+                    return await uc._generate_wine_suggestions(total_wines)
+                results.append(bench("_generate_wine_suggestions", suggest, rounds=rounds, **labels))
+
+                # Response body for GET /participants: through the models vs straight from stored rows
+                def participants_via_models():
+                    return json.dumps([p.dict(by_alias=True) for p in repo.get_all_participants()]).encode()
+                results.append(bench("participants_json_models", participants_via_models, rounds=rounds, **labels))
+                results.append(bench("participants_json_rows", lambda: fast_json.dumps(repo.get_participant_rows()),
+                                     rounds=rounds, **labels))
+
+                if hasattr(repo, "close"):
+                    repo.close()
+                inject.clear()
+            print_table(results[-8:])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--backends", nargs="+", default=["json", "log", "sqlite"])
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.backends, args.rounds, args.seed)
+    write_results(results, args.output, suite="usecase", sizes=args.sizes, backends=args.backends, seed=args.seed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
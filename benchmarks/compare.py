@@ -0,0 +1,47 @@
+"""Compare two benchmark result files (e.g. two repository backends or two commits).
+
+    python -m benchmarks.compare benchmarks/results/json.json benchmarks/results/sqlite.json \
+        --metric p95_ms --ignore-backend
+"""
+import argparse
+import json
+import sys
+
+LABELS = ("name", "phase", "backend", "participants", "workers")
+
+
+def key(row: dict, ignore_backend: bool) -> tuple:
+    return tuple(row.get(label) for label in LABELS if not (ignore_backend and label == "backend"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Flag rows where candidate/baseline exceeds this ratio (exit code 1)")
+    parser.add_argument("--ignore-backend", action="store_true",
+                        help="Match rows across backends, to compare one backend against another")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = {key(row, args.ignore_backend): row for row in json.load(f)["results"]}
+    with open(args.candidate) as f:
+        candidate = {key(row, args.ignore_backend): row for row in json.load(f)["results"]}
+
+    regressions = 0
+    for row_key in sorted(baseline.keys() & candidate.keys(), key=str):
+        before, after = baseline[row_key][args.metric], candidate[row_key][args.metric]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            regressions += 1
+            flag = "  <-- regression"
+        labels = " ".join(str(v) for v in row_key if v is not None)
+        print(f"{labels:<60} {before:>10.3f} {after:>10.3f} {ratio:>7.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import asyncio
+import inspect
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency stats in milliseconds for a list of durations in seconds"""
+    return {
+        "rounds": len(samples),
+        "min_ms": min(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+        "ops_per_second": len(samples) / sum(samples) if sum(samples) else 0.0,
+    }
+
+
+def bench(name: str, fn: Callable, rounds: int = 50, warmup: int = 3, min_time: float = 0.0, **labels) -> dict:
+    """Time `fn` (sync or async, no arguments) pytest-benchmark style"""
+    is_async = inspect.iscoroutinefunction(fn)
+    loop = asyncio.new_event_loop() if is_async else None
+    try:
+        def call():
+            return loop.run_until_complete(fn()) if is_async else fn()
+
+        for _ in range(warmup):
+            call()
+        samples = []
+        started = time.perf_counter()
+        while len(samples) < rounds or time.perf_counter() - started < min_time:
+            t0 = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - t0)
+    finally:
+        if loop is not None:
+            loop.close()
+    return {"name": name, **labels, **summarize(samples)}
+
+
+def write_results(results: List[dict], output: Optional[str], **meta) -> dict:
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **meta,
+        },
+        "results": results,
+    }
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def print_table(results: List[dict], columns=("p50_ms", "p95_ms", "p99_ms", "ops_per_second"),
+                labels=("phase", "backend", "participants", "workers")):
+    for row in results:
+        labels_text = " ".join(f"{k}={row[k]}" for k in labels if k in row)
+        stats = " ".join(f"{c}={row[c]:.3f}" for c in columns if c in row)
+        print(f"{row['name']:<32} {labels_text:<48} {stats}")
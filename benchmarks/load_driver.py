@@ -0,0 +1,158 @@
+"""In-process HTTP load driver for the tournament API.
+
+Replays an event against the FastAPI app through httpx's ASGI transport:
+a registration burst (suggest + confirm), then a voting burst, while a set
+of big screens keep polling the read endpoints the whole time. Reports
+p50/p95/p99 latency and throughput per endpoint.
+
+    python -m benchmarks.load_driver --backend sqlite --participants 2000 \
+        --output benchmarks/results/load-sqlite.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.harness import summarize, print_table, write_results
+
+API = "/api/v1/tournament"
+POLLED_ENDPOINTS = ("/leaderboard", "/voting-stats", "/participants")
+
+
+class LoadRecorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.not_modified: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        t0 = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[name].append(time.perf_counter() - t0)
+        if response.status_code == 304:
+            self.not_modified[name] += 1
+        elif response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, duration: float, **labels) -> List[dict]:
+        return [
+            {
+                "name": name,
+                **labels,
+                **summarize(samples),
+                "requests": len(samples),
+                "throughput_rps": len(samples) / duration if duration else 0.0,
+                "errors": self.errors[name],
+                "not_modified": self.not_modified[name],
+            }
+            for name, samples in sorted(self.samples.items())
+        ]
+
+
+async def register(client, recorder, index: int, total_wines: int):
+    response = await recorder.call(client, "POST /participants/suggest", "POST",
+                                   f"{API}/participants/suggest", params={"total_wines": total_wines},
+                                   json={"name": f"Taster {index}"})
+    participant = response.json()["participant"]
+    await recorder.call(client, "POST /participants/confirm", "POST", f"{API}/participants/confirm", json=participant)
+    return participant
+
+
+async def vote(client, recorder, participant: dict, rng: random.Random):
+    if len(participant["assignedWines"]) < 3:
+        return
+    first, second, third = rng.sample(participant["assignedWines"], 3)
+    await recorder.call(client, "POST /votes", "POST", f"{API}/votes", json={
+        "participantId": participant["id"], "firstPlace": first, "secondPlace": second, "thirdPlace": third
+    })
+
+
+async def big_screen(client, recorder, stop: asyncio.Event, interval: float):
+    # Browsers revalidate with the ETag they already have
+    etags = {}
+    while not stop.is_set():
+        for endpoint in POLLED_ENDPOINTS:
+            headers = {"If-None-Match": etags[endpoint]} if endpoint in etags else {}
+            response = await recorder.call(client, f"GET {endpoint}", "GET", API + endpoint, headers=headers)
+            if "etag" in response.headers:
+                etags[endpoint] = response.headers["etag"]
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_bounded(coroutines, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(bounded(c) for c in coroutines))
+
+
+async def run_event(app, participants: int, total_wines: int, concurrency: int, screens: int,
+                    poll_interval: float, seed: int, labels: dict) -> List[dict]:
+    rng = random.Random(seed)
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        for phase in ("registration", "voting"):
+            recorder = LoadRecorder()
+            pollers = [asyncio.create_task(big_screen(client, recorder, stop, poll_interval)) for _ in range(screens)]
+            started = time.perf_counter()
+            if phase == "registration":
+                registered = await run_bounded(
+                    [register(client, recorder, i, total_wines) for i in range(participants)], concurrency
+                )
+            else:
+                await run_bounded([vote(client, recorder, p, rng) for p in registered], concurrency)
+            duration = time.perf_counter() - started
+            stop.set()
+            await asyncio.gather(*pollers)
+            stop.clear()
+            results.extend(recorder.report(duration, phase=phase, **labels))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="json", choices=["json", "log", "sqlite"])
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--total-wines", type=int, default=None, help="Defaults to enough wines for everyone")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--screens", type=int, default=20, help="Concurrent big screens polling the read endpoints")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    total_wines = args.total_wines or max(5, int(args.participants * 1.25))
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # The app wires its repository from the environment at import time
+        os.environ.setdefault("ENVIRONMENT", "benchmark")
+        os.environ.setdefault("LOCAL_ENV", "true")
+        os.environ["TOURNAMENT_STORAGE"] = args.backend
+        os.environ["TOURNAMENT_DATA_DIR"] = data_dir
+        os.environ.pop("TOURNAMENT_SQLITE_FILE", None)
+        from app.app import app
+
+        labels = {"backend": args.backend, "participants": args.participants}
+        results = asyncio.run(run_event(app, args.participants, total_wines, args.concurrency, args.screens,
+                                        args.poll_interval, args.seed, labels))
+    print_table(results, columns=("p50_ms", "p95_ms", "p99_ms", "throughput_rps"))
+    write_results(results, args.output, suite="load", **{k: v for k, v in vars(args).items() if k != "output"})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Event loop lag during a voting burst, blocking writes vs group-committed async writes.
+
+Every participant votes `--rounds` times, `--concurrency` ballots in flight at
+once, while a LoopLagMonitor samples how late the loop runs. `sync` calls
+`save_vote` on the loop the way the use case used to; `async` awaits
+`save_vote_async`.
+
+    python -m benchmarks.loop_lag --backends json log sqlite --participants 500 \
+        --output benchmarks/results/loop-lag.json
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+
+from app.model.wine_tournament import Vote
+from benchmarks.bench_usecase import new_repository, populate, total_wines_for
+from benchmarks.harness import print_table, write_results
+from benchmarks.load_driver import run_bounded
+from utils.loop_lag import LoopLagMonitor
+
+LAG_INTERVAL_SECONDS = 0.005
+
+
+async def burst(repo, mode: str, rounds: int, concurrency: int, rng: random.Random) -> dict:
+    ballots = []
+    for _ in range(rounds):
+        for participant in repo.get_all_participants():
+            first, second, third = rng.sample(participant.assigned_wines, 3)
+            ballots.append(Vote(participant_id=participant.id, first_place=first, second_place=second,
+                                third_place=third))
+
+    async def vote(vote: Vote):
+        if mode == "async":
+            await repo.save_vote_async(vote)
+        else:
+            repo.save_vote(vote)
+            # Give the monitor a chance to notice, like a request handler returning would
+            await asyncio.sleep(0)
+
+    monitor = LoopLagMonitor(interval_seconds=LAG_INTERVAL_SECONDS, window=100000)
+    monitor_task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(LAG_INTERVAL_SECONDS * 2)
+    started = time.perf_counter()
+    await run_bounded([vote(ballot) for ballot in ballots], concurrency)
+    duration = time.perf_counter() - started
+    monitor_task.cancel()
+    lag = monitor.stats()
+    return {"votes": len(ballots), "throughput_rps": len(ballots) / duration,
+            "lag_p50_ms": lag["p50_ms"], "lag_p99_ms": lag["p99_ms"], "lag_max_ms": lag["max_ms"]}
+
+
+def run(backend: str, mode: str, participants: int, rounds: int, concurrency: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        rng = random.Random(seed)
+        repo = new_repository(backend, data_dir)
+        populate(repo, participants, total_wines_for(participants), rng)
+        try:
+            result = asyncio.run(burst(repo, mode, rounds, concurrency, rng))
+        finally:
+            if hasattr(repo, "close"):
+                repo.close()
+    return {"name": f"save_vote {mode}", "backend": backend, "participants": participants, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["json", "log", "sqlite"])
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"])
+    parser.add_argument("--participants", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = [run(backend, mode, args.participants, args.rounds, args.concurrency, args.seed)
+               for backend in args.backends for mode in args.modes]
+    print_table(results, columns=("throughput_rps", "lag_p50_ms", "lag_p99_ms", "lag_max_ms"))
+    write_results(results, args.output, suite="loop_lag", **{k: v for k, v in vars(args).items() if k != "output"})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Per-request overhead of the CORS/compression layer: the old BaseHTTPMiddleware stack vs EdgeMiddleware.
+
+Both stacks wrap the same FastAPI app and are called directly as ASGI apps,
+without a server or HTTP client, so the difference is the middleware itself.
+`legacy` is what app/app.py used to have: GZipMiddleware, a catch-all OPTIONS
+route and CORS headers set by an `@app.middleware("http")` function.
+
+    python -m benchmarks.middleware --rounds 2000 --output benchmarks/results/middleware.json
+"""
+import argparse
+import asyncio
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+
+from app.api.edge_middleware import CORSPolicy, EdgeMiddleware
+from benchmarks.harness import bench, print_table, write_results
+from utils import fast_json
+
+ROW = {"wineId": 12, "totalPoints": 31, "firstPlaces": 5, "secondPlaces": 4, "thirdPlaces": 3}
+LARGE_BODY = fast_json.dumps([ROW] * 200)
+CASES = {
+    # name: (method, path, extra headers)
+    "small_json": ("GET", "/small", []),
+    "large_json_gzip": ("GET", "/large", [(b"accept-encoding", b"gzip, deflate, br")]),
+    "ndjson_stream": ("GET", "/stream", [(b"accept-encoding", b"gzip, deflate, br")]),
+    "precompressed": ("GET", "/precompressed", [(b"accept-encoding", b"gzip, deflate, br")]),
+    "preflight": ("OPTIONS", "/small", [(b"access-control-request-method", b"POST")]),
+}
+
+
+def endpoints() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"message":"pong"}', media_type="application/json")
+
+    @app.get("/large")
+    async def large():
+        return Response(LARGE_BODY, media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for _ in range(50):
+                yield fast_json.dumps(ROW) + b"\n"
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return Response(LARGE_BODY, media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    return app
+
+
+def legacy_stack() -> FastAPI:
+    app = endpoints()
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+    @app.options('/{rest_of_path:path}', include_in_schema=False)
+    async def preflight_handler(request: Request, rest_of_path: str) -> Response:
+        response = Response()
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Allow-Methods'] = 'POST, GET, DELETE, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type'
+        return response
+
+    @app.middleware("http")
+    async def add_CORS_header(request: Request, call_next):
+        response = await call_next(request)
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Allow-Methods'] = 'POST, GET, PUT, DELETE, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = 'Authorization, Content-Type'
+        return response
+
+    return app
+
+
+def edge_stack() -> FastAPI:
+    app = endpoints()
+    app.add_middleware(EdgeMiddleware, cors=CORSPolicy())
+    return app
+
+
+STACKS = {"legacy": legacy_stack, "edge": edge_stack}
+
+
+def request(app, method: str, path: str, headers: list):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"bench"), (b"origin", b"http://venue.example"), *headers],
+             "client": ("127.0.0.1", 50000), "server": ("bench", 80)}
+
+    async def call():
+        received = False
+        sent = []
+
+        async def receive():
+            nonlocal received
+            if received:
+                # Only asked for when the response is done
+                await asyncio.Event().wait()
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        assert sent[0]["status"] < 300, sent[0]
+        return sent
+
+    return call
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stacks", nargs="+", default=list(STACKS))
+    parser.add_argument("--cases", nargs="+", default=list(CASES))
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in args.cases:
+        method, path, headers = CASES[case]
+        for stack in args.stacks:
+            app = STACKS[stack]()
+            results.append(bench(case, request(app, method, path, headers), rounds=args.rounds, warmup=50,
+                                 phase=stack))
+    print_table(results, columns=("mean_ms", "p50_ms", "p99_ms", "ops_per_second"))
+    write_results(results, args.output, suite="middleware", **{k: v for k, v in vars(args).items() if k != "output"})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
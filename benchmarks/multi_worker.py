@@ -0,0 +1,125 @@
+"""Vote throughput against a real multi-process server.
+
+Starts `uvicorn --workers N` on a shared SQLite database for each worker
+count, registers participants through the batch endpoint, then has every
+participant vote `--rounds` times over HTTP and reports votes per second.
+
+    python -m benchmarks.multi_worker --workers 1 2 4 --participants 500 \
+        --output benchmarks/results/multi-worker.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.harness import summarize, print_table, write_results
+from benchmarks.load_driver import run_bounded
+
+API = "/api/v1/tournament"
+STARTUP_TIMEOUT_SECONDS = 30
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, data_dir: str, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "ENVIRONMENT": "benchmark",
+        "LOCAL_ENV": "true",
+        "TOURNAMENT_STORAGE": "sqlite",
+        "TOURNAMENT_DATA_DIR": data_dir,
+        "WORKERS": str(workers),
+    }
+    env.pop("TOURNAMENT_SQLITE_FILE", None)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_until_ready(base_url: str):
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/ping")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def drive_votes(base_url: str, participants: int, rounds: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        response = await client.post(f"{API}/participants:batch", params={"total_wines": max(5, participants)},
+                                     json=[{"name": f"Taster {i}"} for i in range(participants)])
+        registered = [r for r in response.json()["results"] if r["success"] and len(r["assignedWines"]) >= 3]
+
+        latencies: List[float] = []
+        errors = 0
+
+        async def vote(result: dict):
+            nonlocal errors
+            first, second, third = rng.sample(result["assignedWines"], 3)
+            t0 = time.perf_counter()
+            response = await client.post(f"{API}/votes", json={
+                "participantId": result["id"], "firstPlace": first, "secondPlace": second, "thirdPlace": third
+            })
+            latencies.append(time.perf_counter() - t0)
+            errors += response.status_code >= 400
+
+        ballots = [vote(result) for _ in range(rounds) for result in registered]
+        started = time.perf_counter()
+        await run_bounded(ballots, concurrency)
+        duration = time.perf_counter() - started
+    return {**summarize(latencies), "votes": len(latencies), "errors": errors,
+            "throughput_rps": len(latencies) / duration if duration else 0.0}
+
+
+def run(workers: int, participants: int, rounds: int, concurrency: int, seed: int = 42) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        port = free_port()
+        server = start_server(workers, data_dir, port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            asyncio.run(wait_until_ready(base_url))
+            result = asyncio.run(drive_votes(base_url, participants, rounds, concurrency, seed))
+        finally:
+            server.terminate()
+            server.wait(timeout=STARTUP_TIMEOUT_SECONDS)
+    return {"name": "POST /votes", "workers": workers, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--participants", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=4, help="Votes per participant (later ones replace earlier)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = [run(workers, args.participants, args.rounds, args.concurrency, args.seed) for workers in args.workers]
+    print_table(results, columns=("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "errors"))
+    write_results(results, args.output, suite="multi_worker", **{k: v for k, v in vars(args).items() if k != "output"})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
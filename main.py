@@ -1,4 +1,8 @@
 import uvicorn
+from decouple import config
 
 if __name__ == "__main__":
-    uvicorn.run("app.app:app", host="0.0.0.0", port=8080, reload=True)
+    workers = config("WORKERS", default=1, cast=int)
+    # Auto-reload is for local single-process development only
+    reload = config("LOCAL_ENV", default=False, cast=bool) and workers == 1
+    uvicorn.run("app.app:app", host="0.0.0.0", port=8080, workers=workers, reload=reload)
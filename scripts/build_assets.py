@@ -0,0 +1,38 @@
+"""Build the frontend under static/ into hashed, precompressed files for the server.
+
+The app serves the build from STATIC_BUILD_DIR when it has a manifest, and
+falls back to the plain files under static/ otherwise.
+
+    python scripts/build_assets.py --source static --output build/static
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.asset_pipeline import build, DEFAULT_MAX_IMAGE_WIDTH  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="static")
+    parser.add_argument("--output", default="build/static")
+    parser.add_argument("--max-image-width", type=int, default=DEFAULT_MAX_IMAGE_WIDTH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    manifest = build(args.source, args.output, max_image_width=args.max_image_width)
+    for logical, asset in sorted(manifest["assets"].items()):
+        source_size = os.path.getsize(os.path.join(args.source, logical))
+        sizes = {"file": os.path.getsize(os.path.join(args.output, asset["file"]))}
+        for name, file in {**asset["encodings"], **asset.get("variants", {})}.items():
+            sizes[name] = os.path.getsize(os.path.join(args.output, file))
+        built = ", ".join(f"{name} {size / 1024:.1f} KB" for name, size in sizes.items())
+        print(f"{logical}: {source_size / 1024:.1f} KB -> {built}")
+    print(f"Built {len(manifest['assets'])} assets into {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Copy the JSON tournament data into the SQLite backend.
+
+Only rows missing from the database are added, so it can run while the JSON
+backend is still serving. Run it once to backfill, switch TOURNAMENT_STORAGE to
+sqlite, then run it again to pick up anything written in between; rows written
+to SQLite after the switch are never overwritten by the older JSON copy.
+
+    python scripts/import_json_to_sqlite.py --db data/tournament.db
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repository.tournament_sqlite import TournamentSqliteRepository  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participants", default="data/participants.json")
+    parser.add_argument("--votes", default="data/votes.json")
+    parser.add_argument("--db", default="data/tournament.db")
+    args = parser.parse_args()
+
+    repo = TournamentSqliteRepository(db_file=args.db)
+    participants, votes = repo.import_json(args.participants, args.votes)
+    repo.close()
+    print(f"Added {participants} participants and {votes} votes to {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,96 @@ const API_BASE = '/api/v1/tournament';
 let currentParticipant = null;
 let allParticipants = [];
 
+// Live state pushed by the server over Server-Sent Events.
+// While the stream is up, the views render from here instead of fetching.
+const liveState = {
+    ready: false,
+    leaderboard: new Map(),
+    participants: new Map(),
+    voting: null,
+};
+let liveStream = null;
+
+function isLive() {
+    return liveState.ready && liveStream && liveStream.readyState === EventSource.OPEN;
+}
+
+function connectLiveStream() {
+    if (!window.EventSource) return;
+
+    liveStream = new EventSource(`${API_BASE}/stream`);
+
+    liveStream.addEventListener('snapshot', (event) => {
+        const snapshot = JSON.parse(event.data);
+        liveState.leaderboard = new Map(snapshot.leaderboard.map(wine => [wine.wineId, wine]));
+        liveState.participants = new Map(snapshot.participants.map(p => [p.id, p]));
+        liveState.voting = {
+            ...snapshot.voting,
+            participant_status: new Map(snapshot.voting.participant_status.map(p => [p.id, p])),
+        };
+        liveState.ready = true;
+        refreshActiveSection();
+    });
+
+    liveStream.addEventListener('leaderboard', (event) => {
+        JSON.parse(event.data).changed.forEach(wine => {
+            if (wine.totalPoints > 0) liveState.leaderboard.set(wine.wineId, wine);
+            else liveState.leaderboard.delete(wine.wineId);
+        });
+        if (isSectionActive('voting')) displayLeaderboard(liveLeaderboard());
+    });
+
+    liveStream.addEventListener('participants', (event) => {
+        JSON.parse(event.data).participants.forEach(p => liveState.participants.set(p.id, p));
+        allParticipants = Array.from(liveState.participants.values());
+        if (isSectionActive('participants')) {
+            displayParticipants([...allParticipants]);
+            displayWineCapacity(allParticipants);
+        }
+    });
+
+    liveStream.addEventListener('progress', (event) => {
+        if (!liveState.voting) return;
+        const { participant_status, ...totals } = JSON.parse(event.data);
+        Object.assign(liveState.voting, totals);
+        participant_status.forEach(p => liveState.voting.participant_status.set(p.id, p));
+        if (isSectionActive('voting')) renderVotingProgress(liveVotingStats());
+    });
+
+    liveStream.onerror = () => {
+        // EventSource reconnects by itself and the next snapshot resyncs the state
+        liveState.ready = false;
+    };
+}
+
+function liveLeaderboard() {
+    return Array.from(liveState.leaderboard.values()).sort((a, b) =>
+        b.totalPoints - a.totalPoints ||
+        b.firstPlaces - a.firstPlaces ||
+        b.secondPlaces - a.secondPlaces ||
+        b.thirdPlaces - a.thirdPlaces ||
+        a.wineId - b.wineId
+    );
+}
+
+function liveVotingStats() {
+    return {
+        ...liveState.voting,
+        participant_status: Array.from(liveState.voting.participant_status.values()),
+    };
+}
+
+function isSectionActive(sectionId) {
+    return document.getElementById(sectionId).classList.contains('active');
+}
+
+function refreshActiveSection() {
+    const active = document.querySelector('.section.active');
+    if (active && (active.id === 'participants' || active.id === 'voting')) {
+        loadSectionData(active.id);
+    }
+}
+
 // Navigation
 function showSection(sectionId, event = null) {
     document.querySelectorAll('.section').forEach(section => {
@@ -29,6 +119,10 @@ function showSection(sectionId, event = null) {
     }
 
     // Load data when switching to certain sections
+    loadSectionData(sectionId);
+}
+
+function loadSectionData(sectionId) {
     if (sectionId === 'participants') {
         loadParticipants();
         loadWineCapacity();
@@ -251,6 +345,11 @@ async function confirmParticipant() {
 
 // View Participants
 async function loadParticipants() {
+    if (isLive()) {
+        allParticipants = Array.from(liveState.participants.values());
+        displayParticipants([...allParticipants]);
+        return;
+    }
     try {
         const response = await fetch(`${API_BASE}/participants`);
         const participants = await response.json();
@@ -308,10 +407,17 @@ function displayParticipants(participants) {
 // Voting
 async function loadParticipantsForVoting() {
     try {
-        const response = await fetch(`${API_BASE}/participants`);
-        const participants = await response.json();
+        let participants;
+        let ok = true;
+        if (isLive()) {
+            participants = Array.from(liveState.participants.values());
+        } else {
+            const response = await fetch(`${API_BASE}/participants`);
+            participants = await response.json();
+            ok = response.ok;
+        }
         
-        if (response.ok) {
+        if (ok) {
             const select = document.getElementById('vote-participant');
             select.innerHTML = '<option value="">Choose participant...</option>';
             
@@ -436,6 +542,10 @@ document.getElementById('vote-form').addEventListener('submit', async (e) => {
 
 // Leaderboard
 async function loadLeaderboard() {
+    if (isLive()) {
+        displayLeaderboard(liveLeaderboard());
+        return;
+    }
     try {
         const response = await fetch(`${API_BASE}/leaderboard`);
         const leaderboard = await response.json();
@@ -494,35 +604,43 @@ function displayLeaderboard(leaderboard) {
 }
 
 async function updateVotingProgress() {
+    if (isLive()) {
+        renderVotingProgress(liveVotingStats());
+        return;
+    }
     try {
         const response = await fetch(`${API_BASE}/voting-stats`);
         const votingStats = await response.json();
         
         if (response.ok) {
-            // Update stats
-            document.getElementById('total-votes-progress').textContent = votingStats.total_votes;
-            document.getElementById('voting-percentage').textContent = `${votingStats.voting_percentage}%`;
-            
-            // Update progress bar with animation
-            const progressBar = document.getElementById('progress-bar');
-            progressBar.style.width = `${votingStats.voting_percentage}%`;
-            
-            // Update participant pills
-            updateParticipantPills(votingStats.participant_status);
-            
-            // Check if voting is complete (100%)
-            if (votingStats.voting_percentage >= 100) {
-                // Small delay to let the progress bar animation complete
-                setTimeout(() => {
-                    showCelebration();
-                }, 1000);
-            }
+            renderVotingProgress(votingStats);
         }
     } catch (error) {
         console.error('Error updating voting progress:', error);
     }
 }
 
+function renderVotingProgress(votingStats) {
+    // Update stats
+    document.getElementById('total-votes-progress').textContent = votingStats.total_votes;
+    document.getElementById('voting-percentage').textContent = `${votingStats.voting_percentage}%`;
+    
+    // Update progress bar with animation
+    const progressBar = document.getElementById('progress-bar');
+    progressBar.style.width = `${votingStats.voting_percentage}%`;
+    
+    // Update participant pills
+    updateParticipantPills(votingStats.participant_status);
+    
+    // Check if voting is complete (100%)
+    if (votingStats.voting_percentage >= 100) {
+        // Small delay to let the progress bar animation complete
+        setTimeout(() => {
+            showCelebration();
+        }, 1000);
+    }
+}
+
 function updateParticipantPills(participantStatus) {
     const container = document.getElementById('participant-pills');
     container.innerHTML = '';
@@ -571,6 +689,10 @@ function showResult(message, type) {
 
 // Wine Capacity Visualization
 async function loadWineCapacity() {
+    if (isLive()) {
+        displayWineCapacity(Array.from(liveState.participants.values()));
+        return;
+    }
     try {
         const response = await fetch(`${API_BASE}/participants`);
         const participants = await response.json();
@@ -726,4 +848,5 @@ function closeCelebration() {
 // Initialize the app
 document.addEventListener('DOMContentLoaded', () => {
     showSection('participants');
+    connectLiveStream();
 });
\ No newline at end of file
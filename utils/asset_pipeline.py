@@ -0,0 +1,204 @@
+"""Build step for the frontend: content-hashed names, precompressed text and re-encoded images.
+
+Every file under the source directory is copied to the output directory as
+`name.<hash>.ext`, so its URL changes whenever its content does and can be
+cached forever. References to `/static/...` paths in CSS, JS and HTML are
+rewritten to the hashed names; HTML pages keep their own names, since their
+URLs are the entry points. Images are scaled down to `max_image_width` and
+also encoded as AVIF and WebP; CSS backgrounds offer those through
+`image-set()`, after a plain declaration kept for browsers without it. Text
+files get `.br` and `.gz` siblings compressed at the highest levels, so the
+server only picks a file per request.
+
+`manifest.json` in the output directory maps each source path to what was
+built from it. Needs Pillow and brotli; the server reading the output does not.
+"""
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import shutil
+from typing import Dict, Optional
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+TEXT_EXTENSIONS = {".css", ".js", ".html", ".svg", ".json", ".txt", ".map"}
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+# Pages keep their names; everything they reference is hashed
+PAGE_EXTENSIONS = {".html"}
+# Below this, compression saves less than the extra header costs
+MIN_COMPRESS_SIZE = 256
+
+DEFAULT_MAX_IMAGE_WIDTH = 1280
+# Pillow quality settings; AVIF holds up at lower values than WebP
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+IMAGE_VARIANTS = (("image/avif", ".avif", "AVIF", AVIF_QUALITY), ("image/webp", ".webp", "WEBP", WEBP_QUALITY))
+
+URL_PREFIX = "/static/"
+REFERENCE_RE = re.compile(re.escape(URL_PREFIX) + r"([\w./-]+)")
+# One CSS declaration whose value has a url(), e.g. `background: url('/static/a.png') center / cover`
+DECLARATION_RE = re.compile(r"(?P<property>[\w-]+)\s*:\s*(?P<value>[^;{}]*url\([^;{}]*)(?P<end>;|(?=}))")
+CSS_URL_RE = re.compile(r"url\(\s*(['\"]?)" + re.escape(URL_PREFIX) + r"([\w./-]+)\1\s*\)")
+
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/webp", ".webp")
+
+
+def build(source_dir: str, output_dir: str, max_image_width: int = DEFAULT_MAX_IMAGE_WIDTH) -> dict:
+    """Build every asset under `source_dir` into `output_dir` (replaced) and return the manifest"""
+    staging_dir = output_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    sources = sorted(
+        os.path.relpath(os.path.join(root, name), source_dir).replace(os.sep, "/")
+        for root, _, names in os.walk(source_dir) for name in names
+    )
+    assets: Dict[str, dict] = {}
+    # Referenced files first, so the files referencing them can be rewritten: images, CSS, JS, then pages
+    for logical in sorted(sources, key=_build_order):
+        with open(os.path.join(source_dir, logical), "rb") as f:
+            content = f.read()
+        extension = os.path.splitext(logical)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            assets[logical] = _build_image(staging_dir, logical, content, max_image_width)
+        elif extension in TEXT_EXTENSIONS:
+            text = content.decode("utf-8")
+            if extension == ".css":
+                text = _rewrite_css(text, assets)
+            text = _rewrite_references(text, assets)
+            assets[logical] = _write_text(staging_dir, logical, text.encode("utf-8"),
+                                          hashed=extension not in PAGE_EXTENSIONS)
+        else:
+            assets[logical] = {"file": _write(staging_dir, _hashed_name(logical, content), content),
+                               "type": _content_type(logical), "immutable": True, "encodings": {}}
+
+    manifest = {"version": MANIFEST_VERSION, "assets": assets}
+    with open(os.path.join(staging_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(staging_dir, output_dir)
+    return manifest
+
+
+def load_manifest(output_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported asset manifest version {manifest.get('version')}; rebuild the assets")
+    return manifest
+
+
+def _build_order(logical: str) -> tuple:
+    extension = os.path.splitext(logical)[1].lower()
+    order = [IMAGE_EXTENSIONS, {".css"}, {".js"}, PAGE_EXTENSIONS]
+    rank = next((i for i, extensions in enumerate(order) if extension in extensions), 0)
+    return rank, logical
+
+
+def _build_image(output_dir: str, logical: str, content: bytes, max_width: int) -> dict:
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(content))
+    source_format = image.format
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        fallback = _encode_image(image, source_format)
+    else:
+        # Not resized: the source is the best fallback we have
+        fallback = content
+
+    base = os.path.splitext(logical)[0]
+    variants = {}
+    for content_type, extension, image_format, quality in IMAGE_VARIANTS:
+        encoded = _encode_image(image, image_format, quality=quality)
+        # Only worth a request header if it saves bytes over the fallback
+        if len(encoded) < len(fallback):
+            variants[content_type] = _write(output_dir, _hashed_name(base + extension, encoded), encoded)
+    return {"file": _write(output_dir, _hashed_name(logical, fallback), fallback), "type": _content_type(logical),
+            "immutable": True, "encodings": {}, "variants": variants, "width": image.width, "height": image.height}
+
+
+def _encode_image(image, image_format: str, **options) -> bytes:
+    out = io.BytesIO()
+    if image_format == "PNG":
+        options.setdefault("optimize", True)
+    elif image_format == "JPEG":
+        options.setdefault("optimize", True)
+        options.setdefault("quality", 85)
+        image = image.convert("RGB")
+    image.save(out, format=image_format, **options)
+    return out.getvalue()
+
+
+def _write_text(output_dir: str, logical: str, content: bytes, hashed: bool) -> dict:
+    import brotli
+
+    name = _hashed_name(logical, content) if hashed else logical
+    encodings = {}
+    if len(content) >= MIN_COMPRESS_SIZE:
+        compressed = {
+            "br": (".br", brotli.compress(content, quality=11)),
+            # mtime=0 keeps the output, and so the build, reproducible
+            "gzip": (".gz", gzip.compress(content, compresslevel=9, mtime=0)),
+        }
+        for encoding, (suffix, body) in compressed.items():
+            if len(body) < len(content):
+                encodings[encoding] = _write(output_dir, name + suffix, body)
+    return {"file": _write(output_dir, name, content), "type": _content_type(logical), "immutable": hashed,
+            "encodings": encodings}
+
+
+def _rewrite_css(text: str, assets: Dict[str, dict]) -> str:
+    """Offer the AVIF/WebP variants of a url() through image-set(), after the plain declaration"""
+    def declaration(match: re.Match) -> str:
+        urls = CSS_URL_RE.findall(match["value"])
+        variants = assets.get(urls[0][1], {}).get("variants") if len(urls) == 1 else None
+        if not variants:
+            return match[0]
+        asset = assets[urls[0][1]]
+        candidates = [*variants.items(), (asset["type"], asset["file"])]
+        image_set = "image-set(" + ", ".join(f'url("{URL_PREFIX}{file}") type("{content_type}")'
+                                             for content_type, file in candidates) + ")"
+        with_image_set = CSS_URL_RE.sub(lambda _: image_set, match["value"])
+        return f"{match['property']}: {match['value'].rstrip()}; {match['property']}: {with_image_set}{match['end']}"
+
+    return DECLARATION_RE.sub(declaration, text)
+
+
+def _rewrite_references(text: str, assets: Dict[str, dict]) -> str:
+    def reference(match: re.Match) -> str:
+        asset = assets.get(match[1])
+        return URL_PREFIX + asset["file"] if asset is not None else match[0]
+
+    return REFERENCE_RE.sub(reference, text)
+
+
+def _hashed_name(logical: str, content: bytes) -> str:
+    base, extension = os.path.splitext(logical)
+    return f"{base}.{hashlib.blake2b(content, digest_size=8).hexdigest()}{extension}"
+
+
+def _write(output_dir: str, name: str, content: bytes) -> str:
+    path = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return name
+
+
+def _content_type(logical: str) -> str:
+    content_type = mimetypes.guess_type(logical)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml"):
+        content_type += "; charset=utf-8"
+    return content_type
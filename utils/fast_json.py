@@ -0,0 +1,15 @@
+"""Compact JSON encoding to bytes, with orjson when it is installed and the standard library otherwise."""
+try:
+    import orjson
+
+    def dumps(content) -> bytes:
+        return orjson.dumps(content)
+
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - exercised only without orjson
+    import json
+
+    def dumps(content) -> bytes:
+        return json.dumps(content, separators=(",", ":")).encode()
+
+    loads = json.loads
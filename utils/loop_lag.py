@@ -0,0 +1,46 @@
+"""Event loop lag: how late the loop wakes up a task that asked to sleep for a fixed interval.
+
+Anything that blocks the loop (disk I/O, heavy CPU work in a handler) shows up
+as lag, since every other request waits exactly as long.
+"""
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+
+class LoopLagMonitor:
+    def __init__(self, interval_seconds: float = 0.05, window: int = 1200,
+                 on_sample: Optional[Callable[[float], None]] = None):
+        self.interval_seconds = interval_seconds
+        # Called with every lag in seconds, e.g. to feed a metrics histogram
+        self.on_sample = on_sample
+        # Most recent lags in seconds, for percentiles
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self.record(max(0.0, loop.time() - expected))
+
+    def record(self, lag: float):
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if self.on_sample is not None:
+            self.on_sample(lag)
+
+    def stats(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> float:
+            return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))] * 1000 if ordered else 0.0
+
+        return {
+            "samples": len(ordered),
+            "last_ms": self.samples[-1] * 1000 if self.samples else 0.0,
+            "p50_ms": pct(50),
+            "p99_ms": pct(99),
+            "max_ms": self.max_lag * 1000,
+        }
@@ -0,0 +1,91 @@
+"""Statistical profiler: a background thread samples every thread's Python stack at a fixed interval.
+
+The result is in the collapsed-stack format read by flamegraph.pl, speedscope
+and most flamegraph viewers: one line per distinct stack, frames separated by
+`;` from the thread down to the innermost call, then the sample count.
+Nothing is hooked into the profiled code, so the cost is one stack walk per
+thread per sample, paid by the sampling thread.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# Frames kept per stack; deeper stacks lose their outermost frames
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval_seconds = interval_seconds
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.samples = 0
+        self._stacks.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        labels: Dict[object, str] = {}
+        lines = []
+        for (thread_name, codes), count in self._stacks.most_common():
+            frames = [thread_name]
+            for code in codes:
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                frames.append(label)
+            lines.append(";".join(frames) + f" {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self._stacks[(names.get(thread_id, str(thread_id)), _stack(frame))] += 1
+            self.samples += 1
+
+
+def _stack(frame) -> Tuple:
+    codes = []
+    while frame is not None and len(codes) < MAX_DEPTH:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return tuple(codes)
+
+
+def _frame_label(code) -> str:
+    # `;` separates frames in the collapsed format
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _short_path(path: str) -> str:
+    """Path relative to the working directory or site-packages, so frames of same-named modules stay apart"""
+    cwd = os.getcwd() + os.sep
+    if path.startswith(cwd):
+        return path[len(cwd):]
+    _, found, rest = path.rpartition("site-packages" + os.sep)
+    return rest if found else os.path.basename(path)